@@ -4,8 +4,10 @@ Created on Jun 2, 2009
 @author: guillaume.aubert@gmail.com
 '''
 import copy
+import datetime
 
 import nms_common.parser.common.validator_const as const 
+from nms_common.parser.common.lru_cache import LRUCache
 
 from nms_common.utils.logging_utils import LoggerFactory
 
@@ -18,6 +20,10 @@ from nms_common.parser.common import validator_const
 
 
 
+# version of the validation rules. Increase it when a rule changes the validation result
+# to invalidate the cached results (see ims_result_cache)
+RULES_VERSION = 1
+
 class SemanticValidationError(ParserError):
     """Semantic Validation Errors"""
     
@@ -25,6 +31,76 @@ class SemanticValidationError(ParserError):
     def __init__(self, a_msg):
         super(SemanticValidationError, self).__init__(a_msg, None, -1, -1) 
 
+def get_typed_value(a_value, a_converter):
+    """ return the typed value computed by the lexer when a_value is a TypedString otherwise convert a_value with a_converter """
+    typed_value = getattr(a_value, 'typed_value', None)
+    
+    return typed_value if typed_value is not None else a_converter(a_value)
+
+# optional catalog of the known stations and channels (see ims_station_catalog)
+_STATION_CATALOG = None
+
+def set_station_catalog(a_catalog):
+    """ Set the catalog used to check the station and channel names and to expand their wildcards.
+        None deactivates the checks.
+    """
+    global _STATION_CATALOG #pylint: disable-msg=W0603
+    
+    _STATION_CATALOG = a_catalog
+
+def get_station_catalog():
+    """ return the current station catalog (None if there is none) """
+    return _STATION_CATALOG
+
+def expand_with_catalog(a_catalog, a_kind, a_names, a_product_type):
+    """ Expand the wildcards of a list of stations or channels and check that the names are known.
+    
+        Args: a_catalog      : the station catalog
+              a_kind         : const.STALIST_K or const.CHANLIST_K
+              a_names        : the list of names
+              a_product_type : product type used in the error message
+        
+        Returns: the expanded list
+        
+        Raises:
+           exception SemanticValidationError if a name is unknown or a pattern does not match anything
+    """
+    (expanded, unknown) = a_catalog.expand_list(a_names, a_kind)
+    
+    if unknown:
+        raise SemanticValidationError("The %s product contains unknown %s: %s" \
+                                      % (a_product_type, 'stations' if a_kind == const.STALIST_K else 'channels', ', '.join(unknown)))
+    
+    return expanded
+
+# values returned as is by copy_structure
+IMMUTABLE_TYPES = (basestring, int, long, float, bool, type(None), datetime.datetime, datetime.date, datetime.timedelta)
+
+def freeze_value(a_value):
+    """ return a key that is equal for structurally equal dictionaries, lists and values.
+        The key is hashable if all the leaf values are hashable.
+    """
+    if isinstance(a_value, dict):
+        return (dict, tuple(sorted([(key, freeze_value(val)) for (key, val) in a_value.iteritems()])))
+    elif isinstance(a_value, (list, tuple)):
+        return (a_value.__class__, tuple([freeze_value(val) for val in a_value]))
+    elif isinstance(a_value, basestring):
+        return a_value
+    else:
+        # the class is part of the key to not mix 1, 1.0 and True
+        return (a_value.__class__, a_value)
+
+def copy_structure(a_value):
+    """ faster deepcopy for the validated dictionaries: copy the dicts and lists and share the immutable values """
+    if isinstance(a_value, dict):
+        return dict([(key, copy_structure(val)) for (key, val) in a_value.iteritems()])
+    elif isinstance(a_value, list):
+        return [copy_structure(val) for val in a_value]
+    elif isinstance(a_value, IMMUTABLE_TYPES):
+        return a_value
+    else:
+        return copy.deepcopy(a_value)
+
 # pylint: disable-msg=R0903,R0201        
    
 class DateRule(object):
@@ -52,8 +128,8 @@ class DateRule(object):
         try:
             start = time['START']
             end   = time['END']
-            start_datetime = parser_time.imsdate_to_datetime(start)
-            end_datetime   = parser_time.imsdate_to_datetime(end)
+            start_datetime = get_typed_value(start, parser_time.imsdate_to_datetime)
+            end_datetime   = get_typed_value(end, parser_time.imsdate_to_datetime)
         except Exception, err:
             msg = "The start date [%s] or end date [%s] is invalid and not following the IMS Format.\n Received Error - %s"\
                   % (time['START'], time['END'], err)
@@ -129,7 +205,7 @@ class FloatRule(object):
             return cls.MINMAX[a_type][a_value]
         else:
             try:
-                the_value = float(a_value)
+                the_value = float(get_typed_value(a_value, float))
             except ValueError, v_err:
                 LoggerFactory.get_logger('RequestSemanticValidator')\
                 .error("Cannot convert %s in float. %s is not a numerical value.\n Err %s" %(a_type, a_value, v_err))
@@ -174,7 +250,7 @@ class LatLonRule(object):
             return cls.MAX[a_type]
         else:
             try:
-                return float(a_value)
+                return float(get_typed_value(a_value, float))
             except ValueError, v_err:
                 LoggerFactory.get_logger('RequestSemanticValidator')\
                 .error("Cannot convert %s in float. %s is not a numerical value.\n Err %s" %(a_type, a_value, v_err))
@@ -518,7 +594,7 @@ class RelativeToRule(object):
         
 class StaListRule(object):
     """ 
-       Check that StaList contains the right stations (to be done)
+       Check that StaList contains the right stations (when a station catalog has been set)
        Check that StaList is not mixed with Lat or Lon
     """
     
@@ -554,6 +630,11 @@ class StaListRule(object):
             raise SemanticValidationError("The %s product cannot have sta_list and a lat or lon env variable in the same request message"\
                                            %(a_original_dict['TYPE']))
         
+        catalog = get_station_catalog()
+        
+        if catalog is not None:
+            stalist = expand_with_catalog(catalog, const.STALIST_K, stalist, a_original_dict['TYPE'])
+        
         #remove it
         a_prod_keys.remove(a_env)
         
@@ -610,6 +691,30 @@ class RemoveEnvRule(object):
         #remove it
         a_prod_keys.remove(a_env)
 
+class ChanListRule(object):
+    """ 
+       Check that ChanList contains known channels and expand the wildcards (when a station catalog has been set)
+    """
+    
+    @classmethod
+    def check(cls, a_env, a_prod_keys, a_prod_dict , a_original_dict): # pylint: disable-msg=W0613
+        """ check the channels and remove the env from the prod_keys
+            Args:
+                a_env      : the type treated
+                a_prod_keys : the different env var names
+                a_prod_dict : a product directory  
+            Returns:
+        
+            Raises:
+               exception SemanticValidationError if one of the constraints are not respected
+        """
+        RemoveEnvRule.check(a_env, a_prod_keys, a_prod_dict, a_original_dict)
+        
+        catalog = get_station_catalog()
+        
+        if catalog is not None:
+            a_prod_dict[a_env] = expand_with_catalog(catalog, const.CHANLIST_K, a_prod_dict[a_env], a_original_dict['TYPE'])
+
 class FilterdWaveformRule(object): 
     """ 
        Filtered SHI Rule: Arrival, Event and Origin product
@@ -1283,7 +1388,7 @@ ENV_RULES = {
     'RELATIVETO'        : RelativeToRule.check,
     'LAT'               : LatLonRule.check,
     'LON'               : LatLonRule.check,
-    'CHANLIST'          : RemoveEnvRule.check, #simple chanlist for the moment (in the future check if the chan exists
+    'CHANLIST'          : ChanListRule.check,
     'BEAMLIST'          : RemoveEnvRule.check,
     'AUXLIST'           : RemoveEnvRule.check,   
     'ORIGINLIST'        : RemoveEnvRule.check,
@@ -1337,16 +1442,58 @@ class RequestSemanticValidator(object):
     '''
        The  RequestSemanticValidator is like a RuleEngine
     '''
-    def __init__(self):
+    def __init__(self, a_memo_size = 0):
         '''
         The simple Constructor
+        
+        Args: a_memo_size : number of validated products memoized by check_product (no memoization if 0)
         '''
         self.__log__ = LoggerFactory.get_logger(self)
         
         self._required_env_vars = REQUIRED_REQUEST_ENV_VAR
         
+        self._product_memo = LRUCache(a_memo_size) if a_memo_size > 0 else None
+    
+    @property
+    def product_memo(self):
+        """ return the LRU cache of the validated products (None if there is no memoization) """
+        return self._product_memo
+        
     def check_product(self, a_orig_prod_dict):
-        """ Check the internal rules for each this particular product
+        """ Check the internal rules for each this particular product.
+            When memoization is activated, a product equal to an already validated one 
+            gets a copy of the memoized result.
+        
+            Args: a_orig_dict : original product directory
+               
+            Returns: the modified product directory
+        
+            Raises:
+               exception SemanticValidationError if one of the constraints are not respected
+        """
+        if self._product_memo is None:
+            return self._check_product(a_orig_prod_dict)
+        
+        try:
+            # the validation depends on the station catalog content
+            catalog = get_station_catalog()
+            key     = (catalog.fingerprint if catalog is not None else None, freeze_value(a_orig_prod_dict))
+            hash(key)
+        except TypeError:
+            # unhashable value: cannot be memoized
+            return self._check_product(a_orig_prod_dict)
+        
+        validated = self._product_memo.get(key)
+        
+        if validated is None:
+            validated = self._check_product(a_orig_prod_dict)
+            self._product_memo.put(key, validated)
+        
+        # the memoized product is never given to the caller
+        return copy_structure(validated)
+    
+    def _check_product(self, a_orig_prod_dict):
+        """ Check the internal rules for each this particular product (no memoization)
         
             Args: a_orig_dict : original product directory
                
@@ -1504,8 +1651,8 @@ class RequestSemanticValidator(object):
                 
 class SubscriptionSemanticValidator(RequestSemanticValidator):
     
-    def __init__(self):
-        super(SubscriptionSemanticValidator, self).__init__()
+    def __init__(self, a_memo_size = 0):
+        super(SubscriptionSemanticValidator, self).__init__(a_memo_size)
         
         self._required_env_vars = REQUIRED_SUBSCRIPTION_ENV_VAR
 
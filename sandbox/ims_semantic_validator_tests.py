@@ -0,0 +1,115 @@
+'''
+Created on Oct 19, 2026
+
+'''
+
+# unit tests part
+import unittest
+import copy
+
+from nms_common.parser.ims20_language.ims_message_parser import IMSParser
+from nms_common.parser.ims20_language.ims_semantic_validator import RequestSemanticValidator, \
+    set_station_catalog, get_station_catalog, freeze_value, copy_structure
+from nms_common.parser.ims20_language.ims_station_catalog import StationCatalog
+
+
+def tests():
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestProductMemo)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+
+class TestProductMemo(unittest.TestCase):
+
+    REQUEST  = "BEGIN IMS2.0\nMSG_TYPE request\nMSG_ID 1 any_ndc\nE-MAIL foo.bar@gmail.com\n" \
+               "TIME 2009/01/01 to 2009/01/02\nSTA_LIST AR*, NOA\nCHAN_LIST SH*\nWAVEFORM IMS2.0\nSTOP\n"
+
+    CHANNELS = ['SHZ', 'SHN', 'BHZ']
+
+    def setUp(self):
+        self._saved     = get_station_catalog()
+        self._product   = IMSParser().parse_str(self.REQUEST)['PRODUCTLIST'][0]
+        self._validator = RequestSemanticValidator(a_memo_size = 8)
+
+        set_station_catalog(None)
+
+    def tearDown(self):
+        set_station_catalog(self._saved)
+
+    def _check(self):
+        """ validate a copy of the parsed product """
+        return self._validator.check_product(copy.deepcopy(self._product))
+
+    def test_freeze_and_copy(self):
+        """ the frozen keys are equal for equal structures and the copies share the immutable values only """
+
+        value = { 'A' : [1, 'x', { 'B' : (1.0, True) }], 'C' : None }
+
+        self.assertEqual(freeze_value(value), freeze_value(copy.deepcopy(value)))
+        self.assertNotEqual(freeze_value([1]), freeze_value([1.0]))
+        self.assertNotEqual(freeze_value([1]), freeze_value((1,)))
+        self.assertRaises(TypeError, hash, freeze_value({ 'A' : set([1]) }))
+
+        copied = copy_structure(value)
+
+        self.assertEqual(copied, value)
+        self.assertFalse(copied['A'] is value['A'] or copied['A'][2] is value['A'][2])
+        self.assertTrue(copied['A'][1] is value['A'][1])
+
+    def test_memo_hit_is_a_copy(self):
+        """ a memo hit returns an independent copy of the validated product """
+
+        first  = self._check()
+        second = self._check()
+
+        self.assertEqual(self._validator.product_memo.stats()['HITS'], 1)
+        self.assertEqual(first, second)
+        self.assertFalse(first is second)
+        self.assertFalse(first['LOC'] is second['LOC'] or first['LOC']['STATIONS'] is second['LOC']['STATIONS'])
+
+        # changing a returned product changes neither the memo nor the other results
+        expected = copy.deepcopy(second)
+
+        first['LOC']['STATIONS'].append('FINES')
+        first['CHANLIST'][0] = 'BHZ'
+        del first['DATE']
+        second['FORMAT'] = 'GSE2.0'
+
+        self.assertEqual(self._check(), expected)
+        self.assertEqual(self._validator.product_memo.stats()['HITS'], 2)
+
+        # without memo the result is the same
+        self.assertEqual(RequestSemanticValidator().check_product(copy.deepcopy(self._product)), expected)
+
+    def test_catalog_change_invalidates_memo(self):
+        """ the memo key contains the station catalog fingerprint """
+
+        unexpanded = self._check()
+
+        self.assertEqual(unexpanded['LOC']['STATIONS'], ['AR*', 'NOA'])
+
+        catalog = StationCatalog(['ARCES', 'ARA0', 'NOA'], self.CHANNELS)
+        set_station_catalog(catalog)
+
+        self.assertEqual(self._check()['LOC']['STATIONS'], ['ARA0', 'ARCES', 'NOA'])
+
+        # same catalog object with a new content
+        catalog.load(['ARCES', 'ARZ9', 'NOA'], self.CHANNELS)
+
+        validated = self._check()
+
+        self.assertEqual(validated['LOC']['STATIONS'], ['ARCES', 'ARZ9', 'NOA'])
+        self.assertEqual(validated['CHANLIST'], ['SHN', 'SHZ'])
+        self.assertEqual(self._validator.product_memo.stats()['HITS'], 0)
+
+        # a catalog with the same content reuses the memoized product
+        set_station_catalog(StationCatalog(['NOA', 'ARZ9', 'ARCES'], self.CHANNELS))
+
+        self.assertEqual(self._check(), validated)
+
+        set_station_catalog(None)
+
+        self.assertEqual(self._check(), unexpanded)
+        self.assertEqual(self._validator.product_memo.stats()['HITS'], 2)
+
+if __name__ == '__main__':
+    tests()
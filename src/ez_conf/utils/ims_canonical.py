@@ -0,0 +1,181 @@
+'''
+Created on Oct 19, 2026
+
+Canonical form and fingerprint of the IMS2.0 request dictionaries (output of IMSParser.parse or parse_and_validate).
+
+Two requests with the same meaning get the same canonical form even if they differ by the case of the
+keywords, the spacing, the order of the environment lines or the order of the elements of a list environment.
+The message identification (MSG_ID, source, REF_ID, PROD_ID), the raw subscription text and the annotations
+added after the validation (COST, SPLIT) are not part of the canonical form so a re-submitted or an
+estimated request has the fingerprint of the original one.
+'''
+import datetime
+import hashlib
+
+import nms_common.parser.common.time as parser_time
+import nms_common.parser.common.validator_const as const
+from nms_production_engine_api import product_dict_const
+from nms_common.parser.ims20_language.ims_id_list import PackedIdList
+
+# keys removed from the MSGINFO dictionary
+IGNORED_MSGINFO_KEYS  = frozenset(['ID', 'SOURCE', 'REFID', 'PRODID'])
+
+# keys removed at any level (the COST and SPLIT annotations of ims_cost and ims_waveform_splitter included)
+IGNORED_KEYS          = frozenset([product_dict_const.SUB_PRODUCT_DESC, const.COST_K, const.SPLIT_K])
+
+# list environments whose order (and duplicates) have no meaning
+UNORDERED_LIST_KEYS   = frozenset([const.STALIST_K, const.STATIONS_K, 'CHANLIST', 'EVENTLIST', 'ARRIVALLIST',
+                                   'BEAMLIST', 'AUXLIST', 'COMMLIST', 'GROUPBULLLIST', 'ORIGINLIST',
+                                   const.MAGTYPE_K, const.SUBSCRLIST_K, const.PRODIDLIST_K])
+
+# dictionaries whose START and END string values are dates
+DATE_KEYS             = frozenset([const.DATE_K])
+
+# string values that keep their case
+CASE_SENSITIVE_KEYS   = frozenset(['EMAILADDR'])
+
+def _canonical_date(a_value):
+    """ return the UTC datetime of a date value """
+    if isinstance(a_value, basestring):
+        typed_value = getattr(a_value, 'typed_value', None)
+        a_value     = typed_value if isinstance(typed_value, datetime.datetime) \
+                                  else parser_time.imsdate_to_datetime(a_value.strip())
+
+    if a_value.tzinfo is not None:
+        return a_value.astimezone(parser_time.EPOCH.tzinfo)
+
+    return a_value.replace(tzinfo = parser_time.EPOCH.tzinfo)
+
+def _canonical_value(a_value, a_key, a_parent_key):
+    """ return the canonical form of a value
+
+        Args:
+           a_value     : the value
+           a_key       : the key of the value in its dictionary (None in a list)
+           a_parent_key: the key of the dictionary containing the value
+    """
+    if isinstance(a_value, dict):
+        return _canonical_dict(a_value, a_key)
+
+    elif isinstance(a_value, PackedIdList):
+        # same form as the list of the numeric strings
+        return sorted(a_value.to_strings())
+
+    elif isinstance(a_value, (list, tuple)):
+        values = [_canonical_value(val, None, a_key) for val in a_value]
+
+        if a_key in UNORDERED_LIST_KEYS:
+            try:
+                values = sorted(set(values))
+            except TypeError:
+                # unhashable elements: keep the list as it is
+                pass
+
+        return values
+
+    elif isinstance(a_value, bool) or a_value is None:
+        return a_value
+
+    elif isinstance(a_value, (int, long, float)):
+        # 5 and 5.0 are the same value
+        return float(a_value)
+
+    elif isinstance(a_value, datetime.datetime):
+        return _canonical_date(a_value)
+
+    elif isinstance(a_value, basestring):
+
+        if a_parent_key in DATE_KEYS:
+            return _canonical_date(a_value)
+
+        # lexer typed values: numbers and dates
+        typed_value = getattr(a_value, 'typed_value', None)
+
+        if isinstance(typed_value, datetime.datetime):
+            return _canonical_date(typed_value)
+        elif isinstance(typed_value, (int, long, float)) and not isinstance(typed_value, bool):
+            return float(typed_value)
+
+        value = a_value.strip()
+
+        return value if a_key in CASE_SENSITIVE_KEYS else value.upper()
+
+    return a_value
+
+def _canonical_dict(a_dict, a_key):
+    """ return the canonical form of a dictionary """
+    result = {}
+
+    for (key, value) in a_dict.iteritems():
+
+        if key in IGNORED_KEYS or (a_key == 'MSGINFO' and key in IGNORED_MSGINFO_KEYS):
+            continue
+
+        result[key] = _canonical_value(value, key, a_key)
+
+    return result
+
+def canonicalize(a_request_dict):
+    """ Return the canonical form of a request dictionary.
+        The strings are stripped and upper cased, the numbers are floats, the dates UTC datetimes,
+        the list environments sorted and the message identification removed.
+
+        Args:
+           a_request_dict: dictionary returned by IMSParser.parse or parse_and_validate
+
+        Returns:
+           a new dictionary
+
+        Raises:
+           exception InvalidDateError or ValueError if a date string cannot be converted
+    """
+    return _canonical_dict(a_request_dict, None)
+
+def _serialize(a_value, a_out):
+    """ append a stable string representation of a canonical value to a_out """
+    if isinstance(a_value, dict):
+        a_out.append('d%d:' % (len(a_value)))
+        for key in sorted(a_value.keys()):
+            _serialize(key, a_out)
+            _serialize(a_value[key], a_out)
+
+    elif isinstance(a_value, (list, tuple)):
+        a_out.append('l%d:' % (len(a_value)))
+        for val in a_value:
+            _serialize(val, a_out)
+
+    elif isinstance(a_value, str):
+        a_out.append('s%d:%s' % (len(a_value), a_value))
+
+    elif isinstance(a_value, unicode):
+        utf8 = a_value.encode('utf-8')
+        a_out.append('u%d:%s' % (len(utf8), utf8))
+
+    elif isinstance(a_value, datetime.datetime):
+        a_out.append('t%d;' % (parser_time.datetime_to_epoch(a_value)))
+
+    elif isinstance(a_value, float):
+        a_out.append('f%r;' % (a_value))
+
+    elif a_value is None:
+        a_out.append('n')
+
+    else:
+        a_out.append('%s%r;' % (type(a_value).__name__, a_value))
+
+def fingerprint(a_request_dict, a_is_canonical = False):
+    """ Return a stable fingerprint of the meaning of a request.
+
+        Args:
+           a_request_dict: dictionary returned by IMSParser.parse or parse_and_validate
+           a_is_canonical: True if a_request_dict has already been returned by canonicalize
+
+        Returns:
+           the hexadecimal sha1 of the canonical form
+    """
+    canonical = a_request_dict if a_is_canonical else canonicalize(a_request_dict)
+
+    out = []
+    _serialize(canonical, out)
+
+    return hashlib.sha1(''.join(out)).hexdigest()
@@ -0,0 +1,74 @@
+'''
+Created on Oct 19, 2026
+
+'''
+
+# unit tests part
+import unittest
+
+import nms_common.parser.ims20_language.ims_canonical as ims_canonical
+from nms_common.parser.ims20_language.ims_cost import CostEstimator
+from nms_common.parser.ims20_language.ims_message_parser import IMSParser
+
+
+def tests():
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestCanonical)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+
+class TestCanonical(unittest.TestCase):
+
+    REQUEST = "BEGIN IMS2.0\nMSG_TYPE request\nMSG_ID 1 any_ndc\nE-MAIL foo.bar@gmail.com\n" \
+              "TIME 2009/01/01 to 2009/01/02\nSTA_LIST ARCES,FINES,NOA\nCHAN_LIST SHZ\nWAVEFORM IMS2.0\nSTOP\n"
+
+    # same request: other case, spacing, line order, station order and message id
+    SAME    = "begin ims2.0\nmsg_type request\nmsg_id 77 other_ndc\nE-MAIL foo.bar@gmail.com\n" \
+              "sta_list   noa , arces,  fines, arces\nchan_list shz\ntime 2009/01/01 00:00 to   2009/01/02\n" \
+              "waveform ims2.0\nstop\n"
+
+    def setUp(self):
+        self._parser = IMSParser()
+
+    def _fingerprints(self, a_message):
+        """ return the fingerprints of the parsed and of the validated message """
+        return (ims_canonical.fingerprint(self._parser.parse_str(a_message)), \
+                ims_canonical.fingerprint(self._parser.parse_and_validate_str(a_message)[1]))
+
+    def test_same_meaning(self):
+        """ case, spacing, line order, station order and message id do not change the fingerprint """
+
+        self.assertEqual(self._fingerprints(self.SAME), self._fingerprints(self.REQUEST))
+
+        canonical = ims_canonical.canonicalize(self._parser.parse_str(self.SAME))
+
+        self.assertEqual(canonical, ims_canonical.canonicalize(self._parser.parse_str(self.REQUEST)))
+        self.assertEqual(ims_canonical.fingerprint(canonical, a_is_canonical = True), self._fingerprints(self.SAME)[0])
+
+    def test_other_meaning(self):
+        """ a different DATE or STA_LIST gives a different fingerprint """
+
+        reference = self._fingerprints(self.REQUEST)
+
+        for (old, new) in (('2009/01/02', '2009/01/03'), ('2009/01/01 to', '2009/01/01 00:00:01 to'), \
+                           ('ARCES,FINES,NOA', 'ARCES,FINES'), ('ARCES,FINES,NOA', 'ARCES,FINES,NOA,SPITS')):
+
+            other = self._fingerprints(self.REQUEST.replace(old, new))
+
+            self.assertNotEqual(other[0], reference[0], new)
+            self.assertNotEqual(other[1], reference[1], new)
+
+    def test_cost_annotation(self):
+        """ the COST written by the estimator and a SPLIT annotation do not change the fingerprint """
+
+        (_, validated) = self._parser.parse_and_validate_str(self.REQUEST)
+        reference      = ims_canonical.fingerprint(validated)
+
+        self.assertTrue(CostEstimator().estimate(validated) > 0)
+        self.assertTrue('COST' in validated and 'COST' in validated['PRODUCTLIST'][0])
+
+        validated['PRODUCTLIST'][0]['SPLIT'] = { 'INDEX' : 0, 'COUNT' : 1 }
+
+        self.assertEqual(ims_canonical.fingerprint(validated), reference)
+
+if __name__ == '__main__':
+    tests()
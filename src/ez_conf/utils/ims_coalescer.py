@@ -0,0 +1,183 @@
+'''
+Created on Oct 19, 2026
+
+Coalesce the products of a batch of validated requests into a minimal set of backend fetches.
+
+The products are grouped by their canonical form without the DATE and the station list (same type, format,
+channels, ...). In each group the products whose time intervals overlap (or touch) and whose station sets share
+a station are merged, transitively, so a single fetch covers the union of their stations over the union of their
+intervals. A fan-out map gives for each fetch the (request, product) pairs it serves; each user still gets the
+data of its own DATE window and stations from the fetched data.
+The COST and SPLIT annotations describe the original product only and are not copied in the merged fetches.
+'''
+import datetime
+
+import nms_common.parser.common.time as parser_time
+import nms_common.parser.common.validator_const as const
+from nms_production_engine_api import product_dict_const
+from nms_common.parser.ims20_language.ims_canonical import canonicalize, fingerprint
+from nms_common.parser.ims20_language.ims_semantic_validator import copy_structure
+
+START, END = 'START', 'END'
+
+# annotations that are not valid for a merged fetch
+STALE_KEYS = (const.COST_K, const.SPLIT_K)
+
+def _to_datetime(a_value):
+    """ return the datetime of a DATE bound (validated datetime or date string) """
+    if isinstance(a_value, datetime.datetime):
+        return a_value
+
+    return parser_time.imsdate_to_datetime(a_value)
+
+def _product_stations(a_product):
+    """ return the set of stations of a product with a station list LOC (None for the other products) """
+    loc = a_product.get('LOC', None)
+
+    if isinstance(loc, dict) and loc.get(const.TYPE_K, None) == const.STALIST_K and const.STATIONS_K in loc:
+        return frozenset(loc[const.STATIONS_K])
+
+    return None
+
+def _product_interval(a_product):
+    """ return (key, start, end, stations) for a product.
+        start and end are None when the product has no DATE, stations None when it has no station list
+    """
+    date = a_product.get(const.DATE_K, None)
+
+    if isinstance(date, dict) and START in date and END in date:
+        without_date = dict(a_product)
+        del without_date[const.DATE_K]
+
+        stations = _product_stations(a_product)
+
+        if stations is not None:
+            without_date['LOC'] = dict(a_product['LOC'])
+            del without_date['LOC'][const.STATIONS_K]
+
+        return ((True, fingerprint(canonicalize(without_date), True)), _to_datetime(date[START]), \
+                _to_datetime(date[END]), stations)
+
+    return ((False, fingerprint(canonicalize(a_product), True)), None, None, None)
+
+def _find(a_parents, a_index):
+    """ return the root of a member in the union-find parents list (with path halving) """
+    while a_parents[a_index] != a_index:
+        a_parents[a_index] = a_parents[a_parents[a_index]]
+        a_index = a_parents[a_index]
+
+    return a_index
+
+def _merge_members(a_members, a_max_gap):
+    """ Merge the members of a group whose intervals overlap and whose station sets intersect.
+
+        Args:
+           a_members: list of (start, end, request index, product index, stations) sorted by start
+           a_max_gap: datetime.timedelta added to the end of the intervals
+
+        Returns:
+           a list of [start, end, stations, members] ordered by start. stations is None for products
+           without station list
+    """
+    parents = range(len(a_members))
+
+    # sweep the sorted intervals keeping the ones that can still overlap the next starts
+    active  = []
+
+    for (index, (start, end, _, _, stations)) in enumerate(a_members):
+
+        active = [other for other in active if start <= a_members[other][1] + a_max_gap]
+
+        for other in active:
+            other_stations = a_members[other][4]
+
+            if stations is None or other_stations is None or not stations.isdisjoint(other_stations):
+                parents[_find(parents, index)] = _find(parents, other)
+
+        active.append(index)
+
+    # the merged intervals in the order of their first member
+    merged, roots = [], {}
+
+    for (index, (start, end, req_index, prod_index, stations)) in enumerate(a_members):
+        root = _find(parents, index)
+
+        if root not in roots:
+            roots[root] = len(merged)
+            merged.append([start, end, stations, []])
+
+        interval = merged[roots[root]]
+
+        interval[1] = max(interval[1], end)
+        if stations is not None:
+            interval[2] = interval[2] | stations
+        interval[3].append((req_index, prod_index))
+
+    return merged
+
+def coalesce(a_requests, a_max_gap = None):
+    """ Merge the products of a batch of requests.
+
+        Args:
+           a_requests: list of request dictionaries (output of parse_and_validate)
+           a_max_gap : datetime.timedelta. Intervals separated by less than a_max_gap are merged as well
+                       (default: only overlapping or touching intervals are merged)
+
+        Returns:
+           a tuple (fetches, fanout) where fetches is the list of product dictionaries to fetch
+           (with the merged DATE and stations) and fanout a dictionary {fetch index : [(request index, product index), ...]}
+    """
+    max_gap = a_max_gap if a_max_gap is not None else datetime.timedelta(0)
+
+    # key -> list of (start, end, request index, product index, stations)
+    groups     = {}
+    group_keys = []
+    products   = {}
+
+    for (req_index, request) in enumerate(a_requests):
+        for (prod_index, product) in enumerate(request.get(product_dict_const.PRODUCTLIST, None) or []):
+
+            (key, start, end, stations) = _product_interval(product)
+
+            if key not in groups:
+                groups[key] = []
+                group_keys.append(key)
+
+            groups[key].append((start, end, req_index, prod_index, stations))
+            products[(req_index, prod_index)] = product
+
+    fetches, fanout = [], {}
+
+    # keep the order of the first appearance of each group to have a stable result
+    for key in group_keys:
+        members = groups[key]
+
+        if members[0][0] is None:
+            # no DATE: identical products are fetched once
+            fanout[len(fetches)] = [(req_index, prod_index) for (_, _, req_index, prod_index, _) in members]
+            fetches.append(copy_structure(products[(members[0][2], members[0][3])]))
+            continue
+
+        # equal starts are kept in input order
+        members.sort(key = lambda member: (member[0], member[2], member[3]))
+
+        for interval in _merge_members(members, max_gap):
+            fanout[len(fetches)] = interval[3]
+            fetches.append(_make_fetch(products, interval))
+
+    return (fetches, fanout)
+
+def _make_fetch(a_products, a_interval):
+    """ return the product dictionary fetching the merged interval [start, end, stations, members] """
+    (start, end, stations, members) = a_interval
+
+    fetch = copy_structure(a_products[members[0]])
+    fetch[const.DATE_K] = { START : start, END : end }
+
+    if stations is not None:
+        fetch['LOC'][const.STATIONS_K] = sorted(stations)
+
+    for key in STALE_KEYS:
+        fetch.pop(key, None)
+
+    return fetch
@@ -0,0 +1,132 @@
+'''
+Created on Oct 19, 2026
+
+'''
+
+# unit tests part
+import unittest
+import datetime
+
+import nms_common.parser.common.time as parser_time
+from nms_common.parser.ims20_language.ims_coalescer import coalesce
+from nms_common.parser.ims20_language.ims_message_parser import IMSParser
+
+
+def tests():
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestCoalescer)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+
+class TestCoalescer(unittest.TestCase):
+
+    REQUEST = "BEGIN IMS2.0\nMSG_TYPE request\nMSG_ID %d any_ndc\nE-MAIL foo.bar@gmail.com\n%sSTOP\n"
+
+    def setUp(self):
+        self._parser = IMSParser()
+        self._nb_requests = 0
+
+    def _request(self, *a_products):
+        """ return a validated request with a WAVEFORM product for each (start, end, stations) """
+        lines = ''.join(["TIME %s to %s\nSTA_LIST %s\nWAVEFORM IMS2.0\n" % product for product in a_products])
+
+        self._nb_requests += 1
+
+        return self._parser.parse_and_validate_str(self.REQUEST % (self._nb_requests, lines))[1]
+
+    @classmethod
+    def _dates(cls, a_fetch):
+        """ return the (start, end) strings of the DATE of a fetch """
+        return tuple([a_fetch['DATE'][bound].strftime('%Y/%m/%d %H:%M') for bound in ('START', 'END')])
+
+    def test_overlapping_and_touching(self):
+        """ the overlapping and touching intervals of the same product are fetched once """
+
+        requests = [ self._request(('2009/01/01', '2009/01/03', 'ARCES'), ('2009/01/01', '2009/01/02', 'FINES')),
+                     self._request(('2009/01/02', '2009/01/04', 'ARCES')),
+                     self._request(('2009/01/04', '2009/01/05', 'ARCES'), ('2009/01/03', '2009/01/04', 'FINES')),
+                   ]
+
+        (fetches, fanout) = coalesce(requests)
+
+        self.assertEqual([(fetch['LOC']['STATIONS'], self._dates(fetch)) for fetch in fetches], \
+                         [(['ARCES'], ('2009/01/01 00:00', '2009/01/05 00:00')), \
+                          (['FINES'], ('2009/01/01 00:00', '2009/01/02 00:00')), \
+                          (['FINES'], ('2009/01/03 00:00', '2009/01/04 00:00'))])
+
+        # fan-out: fetch index -> (request index, product index)
+        self.assertEqual(fanout, { 0 : [(0, 0), (1, 0), (2, 0)], 1 : [(0, 1)], 2 : [(2, 1)] })
+
+        # the requests are not modified
+        self.assertEqual(requests[1]['PRODUCTLIST'][0]['DATE']['END'], parser_time.imsdate_to_datetime('2009/01/04'))
+
+    def test_overlapping_station_sets(self):
+        """ the overlapping intervals of station sets sharing a station are fetched once for the union of stations """
+
+        requests = [ self._request(('2009/01/01', '2009/01/03', 'ARCES, FINES')),
+                     self._request(('2009/01/02', '2009/01/04', 'FINES, NOA'), ('2009/01/02', '2009/01/04', 'HFS')),
+                     self._request(('2009/01/03 12:00', '2009/01/05', 'NOA'), ('2009/01/06', '2009/01/07', 'ARCES')),
+                   ]
+
+        # annotations of the original products
+        requests[0]['PRODUCTLIST'][0]['COST'] = 12.5
+        requests[0]['PRODUCTLIST'][0]['SPLIT'] = { 'INDEX' : 0, 'COUNT' : 2 }
+
+        (fetches, fanout) = coalesce(requests)
+
+        self.assertEqual([(fetch['LOC']['STATIONS'], self._dates(fetch)) for fetch in fetches], \
+                         [(['ARCES', 'FINES', 'NOA'], ('2009/01/01 00:00', '2009/01/05 00:00')), \
+                          (['HFS'], ('2009/01/02 00:00', '2009/01/04 00:00')), \
+                          (['ARCES'], ('2009/01/06 00:00', '2009/01/07 00:00'))])
+
+        self.assertEqual(fanout, { 0 : [(0, 0), (1, 0), (2, 0)], 1 : [(1, 1)], 2 : [(2, 1)] })
+
+        # the stale annotations are not copied, the requests are not modified
+        self.assertFalse('COST' in fetches[0] or 'SPLIT' in fetches[0])
+        self.assertEqual(requests[0]['PRODUCTLIST'][0]['COST'], 12.5)
+        self.assertEqual(requests[1]['PRODUCTLIST'][0]['LOC']['STATIONS'], ['FINES', 'NOA'])
+
+        # disjoint station sets stay separate even when the intervals overlap
+        requests = [ self._request(('2009/01/01', '2009/01/03', 'ARCES, FINES')),
+                     self._request(('2009/01/02', '2009/01/04', 'NOA')),
+                   ]
+
+        self.assertEqual(coalesce(requests)[1], { 0 : [(0, 0)], 1 : [(1, 0)] })
+
+    def test_max_gap(self):
+        """ the intervals separated by less than a_max_gap are merged """
+
+        requests = [ self._request(('2009/01/01', '2009/01/02', 'ARCES')),
+                     self._request(('2009/01/02 02:00', '2009/01/03', 'ARCES')),
+                   ]
+
+        self.assertEqual(len(coalesce(requests)[0]), 2)
+        self.assertEqual(len(coalesce(requests, datetime.timedelta(hours = 1))[0]), 2)
+
+        (fetches, fanout) = coalesce(requests, datetime.timedelta(hours = 2))
+
+        self.assertEqual([self._dates(fetch) for fetch in fetches], [('2009/01/01 00:00', '2009/01/03 00:00')])
+        self.assertEqual(fanout, { 0 : [(0, 0), (1, 0)] })
+
+    def test_products_without_date(self):
+        """ identical products without DATE are fetched once and are not merged with the dated ones """
+
+        requests = [ self._request(('2009/01/01', '2009/01/02', 'ARCES'), ('2009/01/01', '2009/01/02', 'FINES')),
+                     self._request(('2009/01/01', '2009/01/02', 'ARCES')),
+                   ]
+
+        for request in requests:
+            del request['PRODUCTLIST'][0]['DATE']
+
+        requests.append(self._request(('2009/01/01', '2009/01/02', 'ARCES')))
+
+        (fetches, fanout) = coalesce(requests)
+
+        self.assertEqual(fanout, { 0 : [(0, 0), (1, 0)], 1 : [(0, 1)], 2 : [(2, 0)] })
+        self.assertEqual(fetches[0], requests[0]['PRODUCTLIST'][0])
+        self.assertFalse(fetches[0] is requests[0]['PRODUCTLIST'][0])
+        self.assertFalse('DATE' in fetches[0])
+
+        self.assertEqual(coalesce([]), ([], {}))
+
+if __name__ == '__main__':
+    tests()
@@ -0,0 +1,361 @@
+'''
+Created on Oct 19, 2026
+
+Compact binary serialization of the dictionaries returned by IMSParser.parse and parse_and_validate.
+
+The values are written by cPickle (protocol 2) so the walk of the dictionaries runs in C instead of a
+python dispatch per value:
+ - the memo of the pickler and of the unpickler is seeded with the keys and values known by the grammar
+   (validator constants, product dict constants, token names) and with the objects needed to rebuild the
+   special values: a constant is written as a 2 bytes memo reference instead of its characters,
+ - the pickler runs in fast mode: it looks up the seeded memo but never adds to it and writes no PUT
+   opcode, so each thread reuses one pickler and one output buffer without copying the memo. The other
+   strings are written at each occurrence and the objects referenced twice are decoded as two copies,
+ - the datetime class and the UTC tzinfo are seeded too; the TypedString, the packed id lists, the copies
+   of the UTC tzinfo and the datetimes of other time zones (converted in UTC) are written as persistent ids
+   (callable, arguments) rebuilt by apply, so no GLOBAL opcode is written or accepted (the unpickler has
+   no find_global) and the decoding cannot import or call anything that is not in the seeded table,
+ - the packed id lists are the zigzag varint of their first id followed by the varint gaps between the ids.
+
+Unlike the first layout of this codec (int64 microseconds dates and station lists packed in string tables,
+written by a python walk 5 to 14 times slower than cPickle) the dates keep the 10 bytes state of their
+reduce and the station lists are pickled lists: rebuilding them in python costs more than cPickle takes
+to write the whole request, for a few bytes saved.
+
+Time goal: the data is about half the size of cPickle.dumps(value, 2), the encoding 25 to 30% faster for the
+validated requests (about 2 times faster for the parsed requests: no GLOBAL for the TypedString) and the
+decoding 5 to 20% faster. benchmark() measures them on a given value, running this module prints them for
+a sample request or for the message files given in argument.
+
+The encoded data starts with a magic, a version, a checksum of the seeded table (a decoder running with a
+different grammar refuses the data instead of returning wrong keys) and the crc32 of the pickled data.
+'''
+import cPickle
+import cStringIO
+import datetime
+import functools
+import struct
+import threading
+import time
+import zlib
+
+import nms_common.parser.common.validator_const as validator_const
+import nms_common.parser.common.time as parser_time
+from nms_production_engine_api import product_dict_const
+from nms_common.parser.ims20_language.ims_tokenizer import TokenCreator, TypedString
+from nms_common.parser.ims20_language import ims_semantic_validator
+from nms_common.parser.ims20_language.ims_id_list import PackedIdList
+
+MAGIC   = 'IMC'
+VERSION = 2
+
+PROTOCOL = 2
+
+# keys and values produced by the parser that are not defined in a constants module
+EXTRA_CONSTANTS = [ 'MSGINFO', 'TARGETINFO', 'LANGUAGE', 'IMSLANGUAGE', 'ID', 'SOURCE', 'REFID', 'PRODID',
+                    'APPLICATION', 'ACK', 'DATA', 'EMAILADDR', 'START', 'END', 'LOC', 'GEO', 'STALIST',
+                    'STATIONS', 'ERROR_MESSAGES', 'request', 'subscription', 'data', 'ims2.0', 'IMS2.0',
+                    'REFSTR', 'REFSRC', 'SEQNUM', 'TOTNUM', 'EMAIL', 'FTP', 'SUBSCRNAME',
+                  ]
+
+UTC      = parser_time.EPOCH.tzinfo
+UTC_TYPE = type(UTC)
+
+class CodecError(Exception):
+    """ CodecError Class """
+
+    def __init__(self, a_msg):
+
+        super(CodecError, self).__init__(a_msg)
+
+def _build_constants():
+    """ return the sorted list of the constants """
+    constants = set(EXTRA_CONSTANTS)
+
+    for module in (validator_const, product_dict_const):
+        for (name, value) in vars(module).items():
+            if not name.startswith('_') and isinstance(value, str):
+                constants.add(value)
+
+    constants.update(TokenCreator.get_all_tokens())
+    constants.update(ims_semantic_validator.REQUIRED_REQUEST_ENV_VAR.keys())
+    constants.update(ims_semantic_validator.REQUIRED_SUBSCRIPTION_ENV_VAR.keys())
+
+    return sorted(constants)
+
+def _varint(a_value):
+    """ return the unsigned LEB128 representation of a positive integer """
+    out = []
+    while a_value >= 128:
+        out.append(chr((a_value & 0x7f) | 0x80))
+        a_value >>= 7
+    out.append(chr(a_value))
+
+    return ''.join(out)
+
+def _zigzag(a_value):
+    """ return the varint of a signed integer (zigzag encoding to have small varints for small negative values) """
+    return _varint((a_value << 1) if a_value >= 0 else ((-a_value << 1) - 1))
+
+def _pack_ids(a_ids):
+    """ return the first id and the gaps between the sorted unique ids of a list as varints """
+    ids = a_ids.tolist()
+
+    if not ids:
+        return ''
+
+    return _zigzag(ids[0]) + ''.join([_varint(ids[index] - ids[index - 1]) for index in xrange(1, len(ids))])
+
+def _id_list(a_data):
+    """ rebuild a PackedIdList from the string of _pack_ids """
+    (ids, value, shift, last) = ([], 0, 0, 0)
+
+    for char in a_data:
+        byte   = ord(char)
+        value |= (byte & 0x7f) << shift
+
+        if byte & 0x80:
+            shift += 7
+            continue
+
+        if ids:
+            last += value
+        else:
+            last  = (value >> 1) if not (value & 1) else -((value + 1) >> 1)
+
+        ids.append(last)
+        (value, shift) = (0, 0)
+
+    if shift:
+        raise CodecError("Truncated id list")
+
+    return PackedIdList.from_sorted(ids)
+
+CONSTANTS          = _build_constants()
+
+# memo of the pickler and of the unpickler: the constants then the objects of the persistent ids
+SEEDED             = CONSTANTS + [ UTC, UTC_TYPE, datetime.datetime, TypedString, _id_list ]
+
+CONSTANTS_CHECKSUM = zlib.crc32('\n'.join(CONSTANTS + ['%s.%s' % (obj.__module__, getattr(obj, '__name__', '')) \
+                                                       for obj in SEEDED[len(CONSTANTS):]])) & 0xffffffff
+
+# magic, version, constants checksum (followed by the crc32 of the pickled data)
+HEADER             = struct.pack('>3sBI', MAGIC, VERSION, CONSTANTS_CHECKSUM)
+
+DATA_OFFSET        = len(HEADER) + 4
+
+CRC_STRUCT         = struct.Struct('>I')
+
+# read only: the pickler runs in fast mode
+PICKLER_MEMO       = dict([(id(obj), (index, obj)) for (index, obj) in enumerate(SEEDED)])
+UNPICKLER_MEMO     = dict(enumerate(SEEDED))
+
+ZERO               = datetime.timedelta(0)
+
+# persistent id (callable, arguments) -> callable(*arguments), all in C
+_persistent_load   = functools.partial(apply, apply)
+
+class _ThreadMemo(threading.local):
+    """ unpickler memo of a thread.
+
+        The seeded memo is reused without copy: the pickler never puts a value at an index of the seeded
+        table and the data is checked by its crc32 before being unpickled, so the seeded entries are
+        never replaced. The entries of the last decoded value stay in the memo until overwritten.
+    """
+
+    def __init__(self):
+        super(_ThreadMemo, self).__init__()
+        self.memo = UNPICKLER_MEMO.copy()
+
+_THREAD_MEMO = _ThreadMemo()
+
+def _to_utc(a_datetime):
+    """ return an aware datetime with the seeded UTC tzinfo (naive datetimes are returned as is) """
+    tzinfo = a_datetime.tzinfo
+
+    if tzinfo is None or tzinfo is UTC:
+        return a_datetime
+    elif tzinfo.utcoffset(a_datetime) == ZERO:
+        return a_datetime.replace(tzinfo = UTC)
+
+    return a_datetime.astimezone(UTC)
+
+def _persistent_id(a_obj):
+    """ return the persistent id (callable, arguments) of a value that is not a basic type, None to let
+        the pickler write it (called by the pickler for the values that are not in its memo)
+    """
+    kind = type(a_obj)
+
+    if kind is datetime.datetime:
+        if a_obj.tzinfo is None or type(a_obj.tzinfo) is UTC_TYPE:
+            # reduced by the pickler: the class is in the memo
+            return None
+        # aware datetimes are decoded in UTC
+        return _to_utc(a_obj).__reduce__()
+    elif kind is UTC_TYPE:
+        # copy of the UTC tzinfo (the copied datetimes of the validated requests)
+        return (UTC_TYPE, ())
+    elif kind is TypedString:
+        typed_value = a_obj.typed_value
+        if type(typed_value) is datetime.datetime:
+            typed_value = _to_utc(typed_value)
+        return (TypedString, (str(a_obj), typed_value))
+    elif kind is PackedIdList:
+        return (_id_list, (_pack_ids(a_obj),))
+
+    raise CodecError("Cannot encode values of type %s (%r)" % (kind.__name__, a_obj))
+
+class _ThreadPickler(threading.local):
+    """ fast mode pickler of a thread and its output buffer """
+
+    def __init__(self):
+        super(_ThreadPickler, self).__init__()
+        self.reset()
+
+    def reset(self):
+        """ create the pickler """
+        self.out     = cStringIO.StringIO()
+        self.pickler = cPickle.Pickler(self.out, PROTOCOL)
+
+        self.pickler.fast               = 1
+        self.pickler.memo               = PICKLER_MEMO
+        self.pickler.inst_persistent_id = _persistent_id
+
+_THREAD_PICKLER = _ThreadPickler()
+
+def encode(a_value):
+    """ Encode a parsed request dictionary.
+
+        Args:
+           a_value: dictionary (or any value made of dict, list, tuple, str, unicode, int, float, bool,
+                    None, datetime, TypedString and PackedIdList)
+
+        Returns:
+           the encoded string
+
+        Raises:
+           exception CodecError if a value cannot be encoded
+    """
+    out = _THREAD_PICKLER.out
+
+    out.seek(0)
+    out.truncate()
+
+    try:
+        _THREAD_PICKLER.pickler.dump(a_value)
+    except CodecError:
+        _THREAD_PICKLER.reset()
+        raise
+    except (cPickle.PicklingError, TypeError, ValueError), err:
+        _THREAD_PICKLER.reset()
+        raise CodecError("Cannot encode %s: %s" % (type(a_value).__name__, err))
+
+    data = out.getvalue()
+
+    return HEADER + CRC_STRUCT.pack(zlib.crc32(data) & 0xffffffff) + data
+
+def decode(a_data):
+    """ Decode a string produced by encode.
+
+        Args:
+           a_data: the encoded string
+
+        Returns:
+           the decoded value. The tz-aware datetimes are returned in UTC
+
+        Raises:
+           exception CodecError if the data is malformed or has been encoded with a different grammar
+    """
+    if len(a_data) < DATA_OFFSET:
+        raise CodecError("Truncated data: no header")
+
+    (magic, version, checksum) = struct.unpack('>3sBI', a_data[:len(HEADER)])
+
+    if magic != MAGIC:
+        raise CodecError("Not an encoded IMS request (magic = %r)" % (magic))
+
+    if version != VERSION:
+        raise CodecError("Unsupported codec version %d (expected %d)" % (version, VERSION))
+
+    if checksum != CONSTANTS_CHECKSUM:
+        raise CodecError("The data has been encoded with a different grammar (constants checksum mismatch)")
+
+    if CRC_STRUCT.unpack(a_data[len(HEADER):DATA_OFFSET])[0] != zlib.crc32(buffer(a_data, DATA_OFFSET)) & 0xffffffff:
+        raise CodecError("Corrupted data (crc32 mismatch)")
+
+    stream = cStringIO.StringIO(a_data)
+    stream.seek(DATA_OFFSET)
+
+    unpickler                 = cPickle.Unpickler(stream)
+    unpickler.memo            = _THREAD_MEMO.memo
+    unpickler.persistent_load = _persistent_load
+    unpickler.find_global     = None
+
+    try:
+        value = unpickler.load()
+    except Exception, err: #pylint: disable-msg=W0703
+        # any error of the unpickler (EOFError, UnpicklingError, KeyError, TypeError ...) is a malformed data
+        _THREAD_MEMO.memo = UNPICKLER_MEMO.copy()
+        raise CodecError("Malformed data: %s: %s" % (type(err).__name__, err))
+
+    if stream.tell() != len(a_data):
+        raise CodecError("%d trailing bytes after the encoded value" % (len(a_data) - stream.tell()))
+
+    return value
+
+def _best_time(a_function, a_number, a_repeat):
+    """ return the best time of a_repeat runs of a_number calls in seconds per call """
+    best = None
+
+    for _ in xrange(a_repeat):
+        start = time.time()
+        for _ in xrange(a_number):
+            a_function()
+        elapsed = (time.time() - start) / a_number
+
+        if best is None or elapsed < best:
+            best = elapsed
+
+    return best
+
+def benchmark(a_value, a_number = 1000, a_repeat = 5):
+    """ Compare the encoding and decoding time and the size with cPickle protocol 2.
+
+        Args:
+           a_value : the value to encode (a parsed request)
+           a_number: number of encodings and decodings of each run
+           a_repeat: number of runs (the best time is kept)
+
+        Returns:
+           a dictionary with ENCODE, DECODE, PICKLE_DUMPS and PICKLE_LOADS: the best time of one call
+           in seconds and SIZE and PICKLE_SIZE: the encoded sizes
+    """
+    encoded = encode(a_value)
+    pickled = cPickle.dumps(a_value, PROTOCOL)
+
+    return { 'ENCODE'       : _best_time(lambda: encode(a_value), a_number, a_repeat),
+             'DECODE'       : _best_time(lambda: decode(encoded), a_number, a_repeat),
+             'PICKLE_DUMPS' : _best_time(lambda: cPickle.dumps(a_value, PROTOCOL), a_number, a_repeat),
+             'PICKLE_LOADS' : _best_time(lambda: cPickle.loads(pickled), a_number, a_repeat),
+             'SIZE'         : len(encoded),
+             'PICKLE_SIZE'  : len(pickled),
+           }
+
+if __name__ == '__main__':
+    import sys
+    from nms_common.parser.ims20_language.ims_message_parser import IMSParser
+
+    # the messages given in argument or a sample request
+    MESSAGES = [open(path).read() for path in sys.argv[1:]] or \
+               ["BEGIN IMS2.0\nMSG_TYPE request\nMSG_ID 1234 any_ndc\nE-MAIL foo.bar@gmail.com\n" \
+                "TIME 2009/01/01 to 2009/01/02 12:00\nSTA_LIST ARCES, FINES, NOA, SPITS\nCHAN_LIST SHZ, BHZ\n" \
+                "WAVEFORM IMS2.0\nSTOP\n"]
+
+    for message in MESSAGES:
+        for (kind, value) in (('parsed', IMSParser().parse_str(message)), \
+                              ('validated', IMSParser().parse_and_validate_str(message)[1])):
+            result = benchmark(value)
+            print '%-9s: encode %.2f us (cPickle %.2f us), decode %.2f us (cPickle %.2f us), ' \
+                  '%d bytes (cPickle %d bytes)' % (kind, result['ENCODE'] * 1e6, result['PICKLE_DUMPS'] * 1e6, \
+                                                   result['DECODE'] * 1e6, result['PICKLE_LOADS'] * 1e6, \
+                                                   result['SIZE'], result['PICKLE_SIZE'])
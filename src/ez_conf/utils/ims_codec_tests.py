@@ -0,0 +1,140 @@
+'''
+Created on Oct 19, 2026
+
+'''
+
+# unit tests part
+import unittest
+import cPickle
+import datetime
+import zlib
+
+import nms_common.parser.ims20_language.ims_codec as ims_codec
+from nms_common.parser.ims20_language.ims_message_parser import IMSParser
+from nms_common.parser.ims20_language.ims_tokenizer import TypedString
+from nms_common.parser.ims20_language.ims_id_list import PackedIdList
+import nms_common.parser.ims20_language.ims_canonical as ims_canonical
+import nms_common.parser.common.time as parser_time
+
+
+def tests():
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestIMSCodec)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+
+class TestIMSCodec(unittest.TestCase):
+
+    REQUEST = "BEGIN IMS2.0\nMSG_TYPE request\nMSG_ID 1234 any_ndc\nE-MAIL foo.bar@gmail.com\n" \
+              "TIME 2009/01/01 to 2009/01/02 12:00\nLAT -30 to 40\nLON 10 to 20\nMAG 3.5 to 5\nMAG_TYPE mb\n" \
+              "BULL_TYPE reb\nEVENT_LIST 12, 13, 14\nBULLETIN IMS2.0\nSTOP\n"
+
+    def setUp(self):
+        self._parser = IMSParser()
+
+    def test_parsed_request_round_trip(self):
+        """ parsed and validated requests are decoded exactly """
+
+        parsed         = self._parser.parse_str(self.REQUEST)
+        (_, validated) = self._parser.parse_and_validate_str(self.REQUEST)
+
+        for value in (parsed, validated):
+            encoded = ims_codec.encode(value)
+
+            self.assertEqual(ims_codec.decode(encoded), value)
+            self.assertTrue(len(encoded) < len(cPickle.dumps(value, 2)))
+
+    def test_values_round_trip(self):
+        """ all supported types keep their type and value """
+
+        values = [ None, True, False, 0, -1, 63, -64, 2**70, -2**70, 1.5, -0.0, '', 'ARCES', u'caf\xe9',
+                   TypedString('3.5', 3.5), TypedString('2009/01/01', parser_time.imsdate_to_datetime('2009/01/01')),
+                   datetime.datetime(1969, 12, 31, 23, 59, 59, 999999),
+                   datetime.datetime(2009, 6, 15, 8, 5, 9, 123456, tzinfo = parser_time.EPOCH.tzinfo),
+                   ('a', 1), ['ARCES', 'ARCES', 'FINES'], ['ARCES', 1], [], {}, { 1 : { 'DATE' : [] } },
+                 ]
+
+        decoded = ims_codec.decode(ims_codec.encode(values))
+
+        self.assertEqual(decoded, values)
+
+        for (before, after) in zip(values, decoded):
+            self.assertEqual(type(before), type(after))
+
+        self.assertEqual(decoded[15].typed_value, values[15].typed_value)
+
+        # the seeded memo is only read
+        self.assertEqual(len(ims_codec.PICKLER_MEMO), len(ims_codec.SEEDED))
+
+    def test_packed_id_lists(self):
+        """ the numeric id lists are packed on demand, encoded as gaps and keep their fingerprint """
+
+        request = self.REQUEST.replace('EVENT_LIST 12, 13, 14', 'EVENT_LIST 14, 12, 13, 12, %s' % \
+                                       (', '.join([str(val) for val in xrange(1000, 20000, 3)])))
+
+        packer = IMSParser(a_pack_id_lists = True)
+
+        (_, packed)  = packer.parse_and_validate_str(request)
+        (_, strings) = self._parser.parse_and_validate_str(request)
+
+        event_list = packed['PRODUCTLIST'][0]['EVENTLIST']
+
+        self.assertTrue(isinstance(event_list, PackedIdList))
+        self.assertEqual(event_list.tolist(), sorted(set([int(val) for val in strings['PRODUCTLIST'][0]['EVENTLIST']])))
+        self.assertTrue('13' in event_list and 1003 in event_list and 1004 not in event_list and 'x' not in event_list)
+        self.assertEqual(event_list.filter(['1', '12', '19998', '19996']), ['12', '19996'])
+
+        self.assertEqual(ims_canonical.fingerprint(packed), ims_canonical.fingerprint(strings))
+
+        encoded = ims_codec.encode(packed)
+
+        self.assertEqual(ims_codec.decode(encoded), packed)
+        self.assertTrue(len(encoded) < len(ims_codec.encode(strings)) / 2)
+        self.assertEqual(cPickle.loads(cPickle.dumps(event_list, 2)), event_list)
+
+        # lists with wildcards stay strings
+        (_, wildcards) = packer.parse_and_validate_str(request.replace('EVENT_LIST 14', 'EVENT_LIST 1*'))
+
+        self.assertTrue(isinstance(wildcards['PRODUCTLIST'][0]['EVENTLIST'], list))
+
+    def test_errors(self):
+        """ bad values and bad data are refused """
+
+        self.assertRaises(ims_codec.CodecError, ims_codec.encode, set([1]))
+
+        cyclic = []
+        cyclic.append(cyclic)
+        self.assertRaises(ims_codec.CodecError, ims_codec.encode, cyclic)
+
+        encoded = ims_codec.encode({ 'STALIST' : ['ARCES', 'FINES'] })
+
+        self.assertRaises(ims_codec.CodecError, ims_codec.decode, encoded[:-1])
+        self.assertRaises(ims_codec.CodecError, ims_codec.decode, encoded + 'x')
+        self.assertRaises(ims_codec.CodecError, ims_codec.decode, 'XXX' + encoded[3:])
+        self.assertRaises(ims_codec.CodecError, ims_codec.decode, encoded[:4] + '\x00\x00\x00\x00' + encoded[8:])
+
+        # no global can be loaded, even with a valid crc
+        pickled = cPickle.dumps(set([1]), 2)
+        self.assertRaises(ims_codec.CodecError, ims_codec.decode, ims_codec.HEADER + \
+                          ims_codec.CRC_STRUCT.pack(zlib.crc32(pickled) & 0xffffffff) + pickled)
+
+        # the encoder and the decoder still work after the errors
+        self.assertEqual(ims_codec.decode(ims_codec.encode({ 'STALIST' : ['ARCES', 'FINES'] })), \
+                         { 'STALIST' : ['ARCES', 'FINES'] })
+
+    def test_benchmark(self):
+        """ the benchmark runs and the requests are smaller than with cPickle (the times are printed by
+            running ims_codec, they are not checked here)
+        """
+
+        (_, validated) = self._parser.parse_and_validate_str(self.REQUEST)
+
+        for value in (self._parser.parse_str(self.REQUEST), validated):
+            result = ims_codec.benchmark(value, 10, 1)
+
+            self.assertEqual(sorted(result.keys()), ['DECODE', 'ENCODE', 'PICKLE_DUMPS', 'PICKLE_LOADS', \
+                                                     'PICKLE_SIZE', 'SIZE'])
+            self.assertTrue(result['SIZE'] < result['PICKLE_SIZE'] * 0.75)
+
+
+if __name__ == '__main__':
+    tests()
@@ -0,0 +1,151 @@
+'''
+Created on Oct 19, 2026
+
+Estimate the cost of the validated requests before they are dispatched.
+
+The cost of a product is its fixed cost plus the number of station-channel-hours it covers weighted by its
+product family and format. The station and channel counts come from the LOC STATIONS and CHANLIST lists after
+expansion of the wildcards, or from the size of the LAT/LON box for a geographic request.
+The score is only meant to order the requests, it is not a time estimate.
+'''
+import nms_common.parser.common.validator_const as const
+from nms_production_engine_api import product_dict_const
+
+START, END = 'START', 'END'
+
+class CostEstimator(object):
+    """
+       Attach a COST to the validated products and requests.
+    """
+
+    # fixed cost of a product and cost of one station-channel-hour per product family
+    FAMILY_COSTS   = {
+                       'DATA'     : (1.0, 1.0),
+                       'BULLETIN' : (1.0, 0.05),
+                       'ALERT'    : (0.5, 0.01),
+                       'TEST'     : (0.1, 0.0),
+                     }
+    DEFAULT_FAMILY_COST = (1.0, 1.0)
+
+    # weight of the data formats (compression or size of the written data)
+    FORMAT_WEIGHTS = {
+                       'CM6'   : 1.0,
+                       'CM8'   : 1.2,
+                       'INT'   : 2.0,
+                       'SHORT' : 1.0,
+                       'LONG'  : 1.5,
+                     }
+
+    # duration used for the products without DATE (subscriptions)
+    DEFAULT_HOURS        = 24.0
+
+    # number of elements counted for a wildcard pattern when there is no expansion function
+    WILDCARD_COUNT       = 10
+
+    # number of channels of a station when there is no CHANLIST
+    DEFAULT_CHANNELS     = 3
+
+    # number of stations of the network covering the whole earth (LAT/LON requests)
+    NETWORK_STATIONS     = 300
+
+    def __init__(self, a_expand = None):
+        """ constructor
+
+            Args:
+               a_expand: optional function (pattern, kind) -> list of names used to expand the wildcards.
+                         kind is STALIST_K or CHANLIST_K
+        """
+        self._expand = a_expand
+
+    def _count(self, a_names, a_kind):
+        """ return the number of elements of a station or channel list after wildcard expansion """
+        count = 0
+
+        for name in a_names:
+            if name.find('*') < 0 and name.find('?') < 0:
+                count += 1
+            elif self._expand is not None:
+                count += len(self._expand(name, a_kind))
+            else:
+                count += self.WILDCARD_COUNT
+
+        return count
+
+    def _nb_stations(self, a_product):
+        """ return the estimated number of stations of a product """
+        loc = a_product.get('LOC', None)
+
+        if not isinstance(loc, dict):
+            stations = a_product.get(const.STALIST_K, None)
+            return self._count(stations, const.STALIST_K) if stations else 1
+
+        if loc.get(const.TYPE_K, None) == const.STALIST_K:
+            return max(1, self._count(loc.get(const.STATIONS_K, None) or [], const.STALIST_K))
+
+        # GEO: proportional to the size of the box
+        lat, lon = loc.get(const.LAT_K, None), loc.get(const.LON_K, None)
+
+        if not lat or not lon:
+            return self.NETWORK_STATIONS
+
+        fraction = (abs(lat[END] - lat[START]) / 180.0) * (abs(lon[END] - lon[START]) / 360.0)
+
+        return max(1, int(round(self.NETWORK_STATIONS * fraction)))
+
+    def _nb_hours(self, a_product):
+        """ return the duration in hours of the DATE window of a product """
+        date = a_product.get(const.DATE_K, None)
+
+        if not isinstance(date, dict) or START not in date or END not in date:
+            return self.DEFAULT_HOURS
+
+        delta = date[END] - date[START]
+
+        return max(0.0, delta.days * 24.0 + delta.seconds / 3600.0)
+
+    def product_cost(self, a_product):
+        """ Return the estimated cost of a validated product.
+
+            Args:
+               a_product: a product dictionary returned by the validator
+
+            Returns:
+               the cost score (float)
+        """
+        (fixed_cost, unit_cost) = self.FAMILY_COSTS.get(a_product.get(const.PRODUCTFAMILY, None), \
+                                                        self.DEFAULT_FAMILY_COST)
+
+        if not unit_cost:
+            return fixed_cost
+
+        channels   = a_product.get(const.CHANLIST_K, None)
+        nb_chans   = self._count(channels, const.CHANLIST_K) if channels else self.DEFAULT_CHANNELS
+
+        # bulletins are not per channel
+        if a_product.get(const.PRODUCTFAMILY, None) != 'DATA':
+            nb_chans = 1
+
+        fmt        = a_product.get(const.SUBFORMAT_K, None) or a_product.get(const.FORMAT_K, None)
+        weight     = self.FORMAT_WEIGHTS.get(fmt.upper() if fmt else None, 1.0)
+
+        return fixed_cost + unit_cost * weight * self._nb_hours(a_product) * self._nb_stations(a_product) * nb_chans
+
+    def estimate(self, a_request):
+        """ Attach a COST to each product of a validated request and to the request.
+
+            Args:
+               a_request: request dictionary returned by parse_and_validate (modified in place)
+
+            Returns:
+               the cost of the request (sum of the product costs)
+        """
+        total = 0.0
+
+        for key in (product_dict_const.PRODUCTLIST, product_dict_const.COMMANDLIST):
+            for product in a_request.get(key, None) or []:
+                product[const.COST_K] = self.product_cost(product)
+                total                += product[const.COST_K]
+
+        a_request[const.COST_K] = total
+
+        return total
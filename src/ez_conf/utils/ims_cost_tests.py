@@ -0,0 +1,128 @@
+'''
+Created on Oct 19, 2026
+
+'''
+
+# unit tests part
+import unittest
+import datetime
+
+import nms_common.parser.common.validator_const as const
+from nms_common.parser.ims20_language.ims_cost import CostEstimator
+from nms_common.parser.ims20_language.ims_message_parser import IMSParser
+
+
+def tests():
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestCostEstimator)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+
+class TestCostEstimator(unittest.TestCase):
+
+    REQUEST = "BEGIN IMS2.0\nMSG_TYPE request\nMSG_ID 1 any_ndc\nE-MAIL foo.bar@gmail.com\n" \
+              "TIME 2009/01/01 to 2009/01/02\n%sSTOP\n"
+
+    def setUp(self):
+        self._estimator = CostEstimator()
+
+    def _validate(self, a_lines):
+        """ return the validated request of the product lines """
+        return IMSParser().parse_and_validate_str(self.REQUEST % (a_lines))[1]
+
+    @classmethod
+    def _product(cls, a_family, a_format = 'CM6', a_hours = 24, a_stations = ('ARCES',), a_channels = ('SHZ',)):
+        """ return a validated like product of one station and one channel """
+        start = datetime.datetime(2009, 1, 1)
+
+        return { const.PRODUCTFAMILY : a_family, const.SUBFORMAT_K : a_format, const.FORMAT_K : 'IMS2.0',
+                 'LOC'               : { const.TYPE_K : const.STALIST_K, const.STATIONS_K : list(a_stations) },
+                 const.CHANLIST_K    : list(a_channels),
+                 const.DATE_K        : { 'START' : start, 'END' : start + datetime.timedelta(hours = a_hours) } }
+
+    def test_family_costs(self):
+        """ the fixed cost plus the station-channel-hours weighted by the product family """
+
+        for (family, expected) in (('DATA', 1.0 + 24.0), ('BULLETIN', 1.0 + 0.05 * 24), ('ALERT', 0.5 + 0.01 * 24), \
+                                   ('TEST', 0.1), ('UNKNOWN', 1.0 + 24.0), (None, 1.0 + 24.0)):
+            self.assertAlmostEqual(self._estimator.product_cost(self._product(family)), expected)
+
+        # only the data products are per channel
+        self.assertAlmostEqual(self._estimator.product_cost(self._product('DATA', a_channels = ('SHZ', 'BHZ'))), 49.0)
+        self.assertAlmostEqual(self._estimator.product_cost(self._product('BULLETIN', a_channels = ('SHZ', 'BHZ'))), \
+                               1.0 + 0.05 * 24)
+
+        # duration in hours, the default duration without DATE
+        self.assertAlmostEqual(self._estimator.product_cost(self._product('DATA', a_hours = 1.5)), 2.5)
+
+        product = self._product('DATA')
+        del product[const.DATE_K]
+
+        self.assertAlmostEqual(self._estimator.product_cost(product), 1.0 + CostEstimator.DEFAULT_HOURS)
+
+    def test_format_weights(self):
+        """ the subformat (or the format) weights the cost, the unknown formats weigh 1 """
+
+        for (fmt, weight) in CostEstimator.FORMAT_WEIGHTS.items():
+            self.assertAlmostEqual(self._estimator.product_cost(self._product('DATA', fmt)), 1.0 + weight * 24, fmt)
+
+        self.assertAlmostEqual(self._estimator.product_cost(self._product('DATA', 'int')), 1.0 + 2.0 * 24)
+        self.assertAlmostEqual(self._estimator.product_cost(self._product('DATA', 'XYZ')), 1.0 + 24.0)
+
+        product = self._product('DATA', None)
+        product[const.FORMAT_K] = 'LONG'
+
+        self.assertAlmostEqual(self._estimator.product_cost(product), 1.0 + 1.5 * 24)
+
+    def test_station_channel_expansion(self):
+        """ the wildcards are counted with the expansion function or WILDCARD_COUNT """
+
+        product = self._product('DATA', a_stations = ('AR*', 'FINES'), a_channels = ('SH?', 'BHZ'))
+
+        self.assertAlmostEqual(self._estimator.product_cost(product), \
+                               1.0 + 24 * (CostEstimator.WILDCARD_COUNT + 1) * (CostEstimator.WILDCARD_COUNT + 1))
+
+        expanded = { (const.STALIST_K, 'AR*') : ['ARA0', 'ARA1', 'ARCES'], (const.CHANLIST_K, 'SH?') : ['SHZ', 'SHN'] }
+        calls    = []
+
+        def expand(a_pattern, a_kind):
+            calls.append((a_kind, a_pattern))
+            return expanded[(a_kind, a_pattern)]
+
+        self.assertAlmostEqual(CostEstimator(expand).product_cost(product), 1.0 + 24 * 4 * 3)
+        self.assertEqual(sorted(calls), sorted(expanded.keys()))
+
+        # no CHANLIST: DEFAULT_CHANNELS per station, an empty station list counts one station
+        product = self._product('DATA', a_stations = (), a_channels = ())
+
+        self.assertAlmostEqual(self._estimator.product_cost(product), 1.0 + 24 * CostEstimator.DEFAULT_CHANNELS)
+
+    def test_validated_requests(self):
+        """ estimate attaches the cost of each product and their sum to the request """
+
+        request = self._validate("STA_LIST ARCES, FINES\nCHAN_LIST SHZ, BHZ\nWAVEFORM IMS2.0\n" \
+                                 "STA_LIST AR*\nCHAN_LIST SHZ\nWAVEFORM IMS2.0:INT\n")
+
+        total    = self._estimator.estimate(request)
+        expected = [1.0 + 24 * 2 * 2, 1.0 + 2.0 * 24 * CostEstimator.WILDCARD_COUNT]
+
+        for (product, cost) in zip(request['PRODUCTLIST'], expected):
+            self.assertAlmostEqual(product[const.COST_K], cost)
+
+        self.assertAlmostEqual(total, sum(expected))
+        self.assertAlmostEqual(request[const.COST_K], total)
+
+        # GEO box: an eighth of the network, SHORT bulletin format
+        request = self._validate("LAT -45 to 45\nLON 0 to 90\nBULL_TYPE reb\nBULLETIN IMS2.0\n")
+
+        self.assertAlmostEqual(self._estimator.estimate(request), \
+                               1.0 + 0.05 * 24 * round(CostEstimator.NETWORK_STATIONS / 8.0))
+
+        # the whole earth without LAT/LON bounds
+        product = self._product('BULLETIN', 'SHORT')
+        product['LOC'] = { const.TYPE_K : 'GEO' }
+
+        self.assertAlmostEqual(self._estimator.product_cost(product), \
+                               1.0 + 0.05 * 24 * CostEstimator.NETWORK_STATIONS)
+
+if __name__ == '__main__':
+    tests()
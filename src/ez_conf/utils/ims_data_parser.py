@@ -0,0 +1,211 @@
+'''
+Created on Oct 19, 2026
+
+Streaming parser of the IMS2.0 data messages (MSG_TYPE data).
+
+The body of a data message is a sequence of sections, each one starting with a line
+   DATA_TYPE type[:subtype] [format[:subformat]]
+and the message ends with a STOP line. The section bodies (waveforms, bulletins, spectra) can be hundreds of MB
+so they are never tokenized: one compiled regexpr finds the DATA_TYPE and STOP lines and the sections are
+yielded one by one with their body as a buffer on the message data (no copy).
+A file is read through mmap (DataMessageReader) and a stream is scanned by blocks of
+a_block_size bytes (scan_stream) so the memory does not depend on the message size.
+'''
+import collections
+import mmap
+import os
+import re
+
+DATA_TYPE_RE = re.compile(r'^(?:DATA_TYPE[ \t]+(?P<type>[^\s:]+)(?::(?P<subtype>\S+))?'
+                          r'(?:[ \t]+(?P<format>[^\s:]+)(?::(?P<subformat>\S+))?)?[^\n]*'
+                          r'|(?P<stop>STOP)[ \t\r]*)(?:\n|\Z)', re.MULTILINE | re.IGNORECASE)
+
+# size of the blocks read by scan_stream
+BLOCK_SIZE   = 1 << 20
+
+# keys of the fields dictionary of a section
+SUBTYPE, SUBFORMAT, OFFSET, LENGTH = 'SUBTYPE', 'SUBFORMAT', 'OFFSET', 'LENGTH'
+
+DataSection  = collections.namedtuple('DataSection', ['type', 'format', 'fields', 'body'])
+
+class DataMessageError(Exception):
+    """ Data message that cannot be read """
+
+    def __init__(self, a_msg):
+        super(DataMessageError, self).__init__(a_msg)
+
+def _fields(a_matched, a_body_start, a_body_end):
+    """ return the fields dictionary of the section started by a DATA_TYPE match """
+    return { SUBTYPE   : a_matched.group('subtype'),
+             SUBFORMAT : a_matched.group('subformat'),
+             OFFSET    : a_body_start,
+             LENGTH    : a_body_end - a_body_start,
+           }
+
+def iter_markers(a_data, a_start = 0, a_end = None):
+    """ Return an iterator on the DATA_TYPE and STOP lines matches of a string, mmap or buffer.
+
+        Args:
+           a_data : the message data
+           a_start: offset where to start the search
+           a_end  : offset where to stop the search (end of the data by default)
+    """
+    return DATA_TYPE_RE.finditer(a_data, a_start, len(a_data) if a_end is None else a_end)
+
+def iter_sections(a_data, a_start = 0, a_end = None):
+    """ Yield the sections of the body of a data message.
+
+        Args:
+           a_data : the message data (string or mmap)
+           a_start: offset of the body in a_data
+           a_end  : end of the data to read (end of a_data by default)
+
+        Returns:
+           a generator of DataSection whose body is a buffer on a_data. The generator stops on the STOP line
+           (a last section without STOP runs to a_end)
+    """
+    end     = len(a_data) if a_end is None else a_end
+    pending = None
+
+    for matched in iter_markers(a_data, a_start, end):
+
+        if pending is not None:
+            yield _section(a_data, pending, matched.start())
+            pending = None
+
+        if matched.group('stop'):
+            return
+
+        pending = matched
+
+    if pending is not None:
+        yield _section(a_data, pending, end)
+
+def _section(a_data, a_matched, a_body_end):
+    """ return the DataSection of a DATA_TYPE match """
+    body_start = a_matched.end()
+
+    return DataSection(a_matched.group('type').upper(), a_matched.group('format'), \
+                       _fields(a_matched, body_start, a_body_end), \
+                       buffer(a_data, body_start, a_body_end - body_start))
+
+def scan_stream(a_stream, a_offset = None, a_block_size = BLOCK_SIZE):
+    """ Find the sections of a data message stream without keeping it in memory.
+
+        Args:
+           a_stream    : file-like object
+           a_offset    : offset of the body in the stream (current position by default)
+           a_block_size: size of the blocks read
+
+        Returns:
+           a tuple (list of section dictionaries with TYPE, FORMAT, SUBTYPE, SUBFORMAT, OFFSET and LENGTH,
+                    offset of the end of the STOP line or None if there is no STOP line).
+           The offsets are positions in the stream
+    """
+    if a_offset is not None:
+        a_stream.seek(a_offset)
+
+    base, carry = a_stream.tell(), ''
+    sections    = []
+    pending     = None
+    stop_end    = None
+
+    while stop_end is None:
+        block = a_stream.read(a_block_size)
+        data  = carry + block
+
+        if block:
+            # only scan the complete lines
+            cut = data.rfind('\n') + 1
+            (data, carry) = (data[:cut], data[cut:])
+        else:
+            carry = ''
+
+        for matched in iter_markers(data):
+
+            if pending is not None:
+                pending[LENGTH] = base + matched.start() - pending[OFFSET]
+                sections.append(pending)
+                pending = None
+
+            if matched.group('stop'):
+                stop_end = base + matched.end()
+                break
+
+            pending = { 'TYPE'    : matched.group('type').upper(),
+                        'FORMAT'  : matched.group('format'),
+                        SUBTYPE   : matched.group('subtype'),
+                        SUBFORMAT : matched.group('subformat'),
+                        OFFSET    : base + matched.end(),
+                      }
+
+        base += len(data)
+
+        if not block:
+            break
+
+    if pending is not None:
+        pending[LENGTH] = base - pending[OFFSET]
+        sections.append(pending)
+
+    return (sections, stop_end)
+
+class DataMessageReader(object):
+    """
+       Read a data message file through mmap.
+    """
+
+    def __init__(self, a_path):
+        """ constructor
+
+            Args:
+               a_path: path of the data message file
+
+            Raises:
+               exception DataMessageError if the file is empty or has no DATA_TYPE section
+               exception ParsingError if the header is not well formatted
+        """
+        self._file = open(a_path, 'rb')
+        self._data = None
+
+        try:
+            if os.fstat(self._file.fileno()).st_size == 0:
+                raise DataMessageError("The data message %s is empty" % (a_path))
+
+            self._data = mmap.mmap(self._file.fileno(), 0, access = mmap.ACCESS_READ)
+
+            first = DATA_TYPE_RE.search(self._data)
+
+            if first is None or first.group('stop'):
+                raise DataMessageError("The data message %s has no DATA_TYPE section" % (a_path))
+
+            self._body_offset = first.start()
+
+            # imported here as the parser uses this module for its data messages
+            from nms_common.parser.ims20_language.ims_message_parser import IMSParser
+
+            # the header is small: parsed as a string
+            (self.header, _, _) = IMSParser().parse_header(self._data[:self._body_offset])
+        except:
+            self.close()
+            raise
+
+    def sections(self):
+        """ return a generator of the DataSection of the message (the bodies are buffers on the mmap) """
+        return iter_sections(self._data, self._body_offset)
+
+    def close(self):
+        """ release the mmap and the file. The section bodies cannot be used after """
+        if self._data is not None:
+            self._data.close()
+            self._data = None
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, a_type, a_value, a_traceback):
+        self.close()
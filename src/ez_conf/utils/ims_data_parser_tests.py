@@ -0,0 +1,133 @@
+'''
+Created on Oct 19, 2026
+
+'''
+
+# unit tests part
+import unittest
+import os
+import StringIO
+import tempfile
+
+import nms_common.parser.ims20_language.ims_data_parser as ims_data_parser
+from nms_common.parser.ims20_language.ims_message_parser import IMSParser, ParsingError
+
+
+def tests():
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestDataParser)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+
+class TestDataParser(unittest.TestCase):
+
+    HEADER   = "BEGIN IMS2.0\nMSG_TYPE data\nMSG_ID 42 ctbto\nREF_ID 1 any_ndc\n"
+
+    SECTIONS = [ ('WAVEFORM', 'IMS2.0', None, 'CM6', 'DATA_TYPE WAVEFORM IMS2.0:CM6\n',
+                  'WID2 2009/01/01 00:00:00.000 ARCES SHZ      CM6      3   40.000000\nDAT2\n-++\nCHK2 6\n'),
+                 ('BULLETIN', 'ims1.0', None, 'short', 'data_type bulletin ims1.0:short\n',
+                  'Reviewed Event Bulletin\nEVENT 1\n'),
+                 ('RNPS', None, 'AUTO', None, 'DATA_TYPE RNPS:AUTO\n', ''),
+                 ('LOG', 'IMS2.0', None, None, 'DATA_TYPE LOG IMS2.0\n', 'STOPPED is not a stop line\nthe end\n'),
+               ]
+
+    def _message(self, a_newline = '\n', a_stop = 'STOP\n'):
+        """ return a data message with the SECTIONS and the expected bodies """
+        message = self.HEADER + ''.join([line + body for (_, _, _, _, line, body) in self.SECTIONS]) + a_stop
+
+        return (message.replace('\n', a_newline), [body.replace('\n', a_newline) for (_, _, _, _, _, body) in \
+                                                   self.SECTIONS])
+
+    def _check_sections(self, a_message, a_sections, a_bodies):
+        """ check the section dictionaries of a message """
+        self.assertEqual([(section['TYPE'], section['FORMAT'], section['SUBTYPE'], section['SUBFORMAT']) \
+                          for section in a_sections], [values[:4] for values in self.SECTIONS])
+
+        self.assertEqual([a_message[section['OFFSET']:section['OFFSET'] + section['LENGTH']] \
+                          for section in a_sections], a_bodies)
+
+    def test_parse_lf_and_crlf(self):
+        """ IMSParser.parse finds the sections of LF and CRLF messages and stops after the STOP line """
+
+        for newline in ('\n', '\r\n'):
+            (message, bodies) = self._message(newline)
+
+            stream = StringIO.StringIO(message + 'BEGIN IMS2.0' + newline)
+            (_, parsed) = IMSParser().parse(stream)
+
+            self.assertEqual(parsed['MSGINFO']['TYPE'], 'data')
+            self._check_sections(message, parsed['DATASECTIONS'], bodies)
+            self.assertEqual(stream.tell(), len(message))
+
+            # same sections with iter_sections
+            sections = list(ims_data_parser.iter_sections(message, message.find('DATA_TYPE')))
+
+            self.assertEqual([str(section.body) for section in sections], bodies)
+            self.assertEqual([dict(section.fields, TYPE = section.type, FORMAT = section.format) \
+                              for section in sections], parsed['DATASECTIONS'])
+
+    def test_missing_stop(self):
+        """ a message without STOP is refused by the parser, its last section runs to the end of the data """
+
+        (message, bodies) = self._message(a_stop = '')
+
+        self.assertRaises(ParsingError, IMSParser().parse_str, message)
+
+        (sections, stop_end) = ims_data_parser.scan_stream(StringIO.StringIO(message), message.find('DATA_TYPE'))
+
+        self.assertEqual(stop_end, None)
+        self._check_sections(message, sections, bodies)
+
+        self.assertEqual(str(list(ims_data_parser.iter_sections(message))[-1].body), bodies[-1])
+
+    def test_no_data_type(self):
+        """ a data message without DATA_TYPE section is refused """
+
+        message = self.HEADER + 'STOP\n'
+
+        self.assertRaises(ParsingError, IMSParser().parse_str, message)
+        self.assertRaises(ParsingError, IMSParser().parse_str, self.HEADER)
+        self.assertEqual(list(ims_data_parser.iter_sections(message)), [])
+
+        (handle, path) = tempfile.mkstemp()
+        try:
+            os.write(handle, message)
+            os.close(handle)
+
+            self.assertRaises(ims_data_parser.DataMessageError, ims_data_parser.DataMessageReader, path)
+
+            open(path, 'w').close()
+            self.assertRaises(ims_data_parser.DataMessageError, ims_data_parser.DataMessageReader, path)
+
+            # a correct message read through mmap
+            (message, bodies) = self._message()
+            the_file = open(path, 'w')
+            the_file.write(message)
+            the_file.close()
+
+            reader = ims_data_parser.DataMessageReader(path)
+            try:
+                self.assertEqual(reader.header['MSGINFO']['ID'], '42')
+                self.assertEqual([str(section.body) for section in reader.sections()], bodies)
+            finally:
+                reader.close()
+        finally:
+            os.remove(path)
+
+    def test_block_sizes(self):
+        """ scanning the stream by tiny blocks gives the same sections """
+
+        for newline in ('\n', '\r\n'):
+            (message, bodies) = self._message(newline)
+            start             = message.find('DATA_TYPE')
+
+            reference = ims_data_parser.scan_stream(StringIO.StringIO(message), start)
+
+            self._check_sections(message, reference[0], bodies)
+            self.assertEqual(reference[1], len(message))
+
+            for block_size in (1, 2, 3, 7, 16, 64):
+                self.assertEqual(ims_data_parser.scan_stream(StringIO.StringIO(message), start, block_size), \
+                                 reference, block_size)
+
+if __name__ == '__main__':
+    tests()
@@ -0,0 +1,423 @@
+'''
+Created on Oct 19, 2026
+
+Delivery scheduler of the subscription products according to their FREQUENCY policy.
+
+DAILY and CUSTOM products are kept in a hierarchical timer wheel (levels of 256, 64, 64 and 64 slots of one tick):
+adding, removing and popping a due product cost O(1) amortized whatever the number of standing subscriptions.
+The CUSTOM values are compiled once into next fire functions:
+   - <n>S, <n>M, <n>H, <n>D, <n>W : every n seconds, minutes, hours, days or weeks (aligned on the epoch)
+IMMEDIATE and CONTINUOUS products are not timed, they are delivered when new data arrives (see event_driven).
+The clock is a parameter so the scheduler can be driven by a simulated time.
+'''
+import math
+import re
+import time
+
+import nms_common.parser.common.validator_const as const
+from nms_production_engine_api import product_dict_const
+from nms_common.parser.ims20_language.ims_subscription_index import request_owner
+
+# event driven policies
+EVENT_POLICIES = ('IMMEDIATE', 'CONTINUOUS')
+
+DAILY          = 'DAILY'
+CUSTOM         = 'CUSTOM'
+
+# bits of the timer wheel levels
+WHEEL_BITS     = (8, 6, 6, 6)
+
+PERIOD_RE      = re.compile(r'^(\d+)([SMHDW])$', re.IGNORECASE)
+
+UNIT_SECONDS   = { 'S' : 1, 'M' : 60, 'H' : 3600, 'D' : 86400, 'W' : 7 * 86400 }
+
+# (policy, value) -> next fire function
+_COMPILED      = {}
+
+class SchedulerError(Exception):
+    """ Frequency policy that cannot be scheduled """
+
+    def __init__(self, a_msg):
+        super(SchedulerError, self).__init__(a_msg)
+
+def _periodic(a_period):
+    """ return a function giving the next multiple of a_period after a time """
+    def next_fire(a_now):
+        """ next fire time strictly after a_now """
+        return (math.floor(a_now / a_period) + 1) * a_period
+
+    return next_fire
+
+def compile_frequency(a_frequency):
+    """ Compile a FREQUENCY dictionary into a next fire function.
+
+        Args:
+           a_frequency: validated FREQUENCY dictionary ({POLICY: .., VALUE: ..})
+
+        Returns:
+           a function returning the next fire time (epoch seconds) after a time, None for an event driven policy
+
+        Raises:
+           exception SchedulerError if the policy or the CUSTOM value is not understood
+    """
+    policy = (a_frequency.get(product_dict_const.SUB_POLICY, None) or '').upper()
+    value  = a_frequency.get(product_dict_const.SUB_VALUE, None)
+    key    = (policy, value.upper() if value else None)
+
+    if key in _COMPILED:
+        return _COMPILED[key]
+
+    if policy in EVENT_POLICIES:
+        function = None
+    elif policy == DAILY:
+        function = _periodic(86400)
+    elif policy == CUSTOM and value:
+        matched = PERIOD_RE.match(value)
+
+        if not matched:
+            raise SchedulerError("Cannot understand the CUSTOM frequency %s" % (value))
+
+        period = int(matched.group(1)) * UNIT_SECONDS[matched.group(2).upper()]
+        if period <= 0:
+            raise SchedulerError("The CUSTOM frequency %s has a null period" % (value))
+        function = _periodic(period)
+    else:
+        raise SchedulerError("Cannot schedule the frequency policy %s" % (a_frequency))
+
+    _COMPILED[key] = function
+
+    return function
+
+class TimerWheel(object):
+    """
+       Hierarchical timer wheel of keys expiring at a tick number.
+       A key is in one slot only; removing a key invalidates its slot entry which is dropped when reached.
+    """
+
+    def __init__(self, a_current = 0, a_bits = WHEEL_BITS):
+        """ constructor
+
+            Args:
+               a_current: current tick number
+               a_bits   : number of bits of each level (a level has 2 ** bits slots)
+        """
+        self._current = a_current
+        self._bits    = a_bits
+        self._shifts  = [sum(a_bits[:level]) for level in xrange(len(a_bits))]
+        self._masks   = [(1 << bits) - 1 for bits in a_bits]
+        self._spans   = [1 << (shift + bits) for (shift, bits) in zip(self._shifts, a_bits)]
+        self._slots   = [[[] for _ in xrange(1 << bits)] for bits in a_bits]
+
+        # key -> (expire tick, generation)
+        self._timers  = {}
+        self._gen     = 0
+
+        # keys expiring before the current tick
+        self._late    = []
+
+    def __len__(self):
+        return len(self._timers)
+
+    def __contains__(self, a_key):
+        return a_key in self._timers
+
+    @property
+    def current(self):
+        """ current tick number """
+        return self._current
+
+    def expire_of(self, a_key):
+        """ return the expire tick of a key (None if not scheduled) """
+        timer = self._timers.get(a_key, None)
+
+        return timer[0] if timer else None
+
+    def _place(self, a_key, a_gen, a_expire):
+        """ put a timer in its slot """
+        delta = a_expire - self._current
+
+        if delta <= 0:
+            self._late.append((a_key, a_gen))
+            return
+
+        # beyond the wheel: placed at the end of the last level and placed again when reached
+        delta = min(delta, self._spans[-1] - 1)
+        expire = self._current + delta
+
+        for level in xrange(len(self._bits)):
+            if delta < self._spans[level]:
+                self._slots[level][(expire >> self._shifts[level]) & self._masks[level]].append((a_key, a_gen))
+                return
+
+    def add(self, a_key, a_expire):
+        """ Schedule (or reschedule) a key.
+
+            Args:
+               a_key   : hashable key
+               a_expire: tick number of the expiration
+        """
+        self._gen += 1
+        self._timers[a_key] = (a_expire, self._gen)
+        self._place(a_key, self._gen, a_expire)
+
+    def remove(self, a_key):
+        """ Unschedule a key. Return False if it was not scheduled """
+        return self._timers.pop(a_key, None) is not None
+
+    def _collect(self, a_entries, a_expired):
+        """ add the valid entries of a level 0 slot to a_expired """
+        timers = self._timers
+
+        for (key, gen) in a_entries:
+            timer = timers.get(key, None)
+
+            if timer is None or timer[1] != gen:
+                continue
+
+            if timer[0] > self._current:
+                # clamped timer not due yet
+                self._place(key, gen, timer[0])
+            else:
+                del timers[key]
+                a_expired.append((key, timer[0]))
+
+    def advance(self, a_tick):
+        """ Move the wheel to a tick and return the keys expired.
+
+            Args:
+               a_tick: new current tick number
+
+            Returns:
+               the list of (key, expire tick) expired up to a_tick
+        """
+        expired = []
+
+        if self._late:
+            (late, self._late) = (self._late, [])
+            self._collect(late, expired)
+
+        if not self._timers:
+            self._current = max(self._current, a_tick)
+            return expired
+
+        mask0 = self._masks[0]
+
+        while self._current < a_tick:
+            self._current += 1
+            current = self._current
+
+            if not current & mask0:
+                # cascade the upper levels
+                for level in xrange(1, len(self._bits)):
+                    index = (current >> self._shifts[level]) & self._masks[level]
+                    slot  = self._slots[level][index]
+
+                    if slot:
+                        self._slots[level][index] = []
+                        for (key, gen) in slot:
+                            timer = self._timers.get(key, None)
+                            if timer is not None and timer[1] == gen:
+                                self._place(key, gen, timer[0])
+
+                    if index:
+                        break
+
+            slot = self._slots[0][current & mask0]
+
+            if slot:
+                self._slots[0][current & mask0] = []
+                self._collect(slot, expired)
+
+            if self._late:
+                (late, self._late) = (self._late, [])
+                self._collect(late, expired)
+
+        return expired
+
+class DeliveryScheduler(object):
+    """
+       Schedule the deliveries of the subscription products.
+    """
+
+    def __init__(self, a_tick = 60, a_clock = None):
+        """ constructor
+
+            Args:
+               a_tick : resolution of the scheduler in seconds
+               a_clock: function returning the current time in epoch seconds (time.time by default)
+        """
+        self._tick  = float(a_tick)
+        self._clock = a_clock or time.time
+        self._wheel = TimerWheel(self._to_tick(self._clock()))
+
+        # key -> next fire function (None for event driven keys)
+        self._functions = {}
+
+        # keys of the IMMEDIATE and CONTINUOUS products
+        self._event_driven = set()
+
+        # subscription id -> keys
+        self._subs = {}
+
+        # (owner, upper case name) -> set of subscription ids and subscription id -> (owner, name)
+        self._names     = {}
+        self._sub_names = {}
+
+    def __len__(self):
+        return len(self._functions)
+
+    def _to_tick(self, a_time):
+        """ return the last tick reached at a time """
+        return int(a_time // self._tick)
+
+    def add(self, a_key, a_frequency):
+        """ Register a product.
+
+            Args:
+               a_key      : hashable key of the product
+               a_frequency: validated FREQUENCY dictionary
+
+            Returns:
+               the first fire time (epoch seconds) or None for an event driven product
+
+            Raises:
+               exception SchedulerError if the frequency cannot be scheduled
+        """
+        function = compile_frequency(a_frequency)
+
+        self.remove(a_key)
+        self._functions[a_key] = function
+
+        if function is None:
+            self._event_driven.add(a_key)
+            return None
+
+        fire = function(self._clock())
+        self._wheel.add(a_key, int(math.ceil(fire / self._tick)))
+
+        return fire
+
+    def add_request(self, a_sub_id, a_request, a_name = None):
+        """ Register all the products of a validated subscription request.
+            The key of a product is (a_sub_id, index of the product in the PRODUCTLIST).
+
+            Args:
+               a_sub_id : id of the subscription
+               a_request: dictionary returned by parse_and_validate
+               a_name   : optional name of the subscription, registered for the subscriber of a_request like
+                          in SubscriptionIndex.add_request
+
+            Returns:
+               the list of registered keys
+        """
+        keys = []
+
+        for (index, product) in enumerate(a_request.get(product_dict_const.PRODUCTLIST, None) or []):
+            frequency = product.get(product_dict_const.SUB_FREQUENCY, None)
+
+            if frequency:
+                key = (a_sub_id, index)
+                self.add(key, frequency)
+                keys.append(key)
+
+        self._subs.setdefault(a_sub_id, []).extend(keys)
+
+        if a_name:
+            name_key = (request_owner(a_request), a_name.upper())
+
+            self._names.setdefault(name_key, set()).add(a_sub_id)
+            self._sub_names[a_sub_id] = name_key
+
+        return keys
+
+    def remove(self, a_key):
+        """ Unregister a product. Return False if the key is unknown """
+        if self._functions.pop(a_key, False) is False:
+            return False
+
+        self._event_driven.discard(a_key)
+        self._wheel.remove(a_key)
+
+        return True
+
+    def remove_subscription(self, a_sub_id):
+        """ Unregister all the products of a subscription. Return False if the subscription is unknown """
+        name_key = self._sub_names.pop(a_sub_id, None)
+
+        if name_key is not None:
+            self._names[name_key].discard(a_sub_id)
+            if not self._names[name_key]:
+                del self._names[name_key]
+
+        keys = self._subs.pop(a_sub_id, None)
+
+        if keys is None:
+            return False
+
+        for key in keys:
+            self.remove(key)
+
+        return True
+
+    def apply_commands(self, a_request):
+        """ Apply the UNSUBSCRIBE commands of a validated subscription request.
+            The subscriptions are given by id (SUBSCR_LIST) or by name (SUBSCR_NAME, see add_request): a name
+            only designates the subscriptions of the subscriber of a_request.
+
+            Args:
+               a_request: dictionary returned by parse_and_validate
+
+            Returns:
+               the list of removed subscription ids
+        """
+        removed = []
+
+        for command in a_request.get(product_dict_const.COMMANDLIST, None) or []:
+            if command.get(const.SUB_COMMAND_K, None) != const.UNSUBSCRIBE_V:
+                continue
+
+            sub_ids = list(command.get(const.SUBSCRLIST_K, None) or [])
+
+            name = command.get(const.SUBSCRNAME_K, None)
+            if name:
+                sub_ids.extend(sorted(self._names.get((request_owner(a_request), name.upper()), ())))
+
+            for sub_id in sub_ids:
+                if self.remove_subscription(sub_id):
+                    removed.append(sub_id)
+
+        return removed
+
+    def next_fire(self, a_key):
+        """ return the next fire time (epoch seconds) of a key, None if it is event driven or unknown """
+        expire = self._wheel.expire_of(a_key)
+
+        return expire * self._tick if expire is not None else None
+
+    def event_driven(self):
+        """ return the keys delivered on new data (IMMEDIATE and CONTINUOUS products) """
+        return frozenset(self._event_driven)
+
+    def pop_due(self, a_now = None):
+        """ Return the products due and schedule their next delivery.
+
+            Args:
+               a_now: current time in epoch seconds (the clock by default)
+
+            Returns:
+               the list of (key, fire time in epoch seconds) due at a_now
+        """
+        now = self._clock() if a_now is None else a_now
+
+        due = self._wheel.advance(self._to_tick(now))
+
+        result = []
+
+        for (key, expire) in due:
+            result.append((key, expire * self._tick))
+
+            # next delivery after now so the missed ones are not replayed
+            fire = self._functions[key](now)
+            self._wheel.add(key, int(math.ceil(fire / self._tick)))
+
+        return result
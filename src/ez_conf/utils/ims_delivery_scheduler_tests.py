@@ -0,0 +1,155 @@
+'''
+Created on Oct 19, 2026
+
+'''
+
+# unit tests part
+import unittest
+import random
+import calendar
+import datetime
+
+import nms_common.parser.ims20_language.ims_delivery_scheduler as scheduler
+from nms_common.parser.ims20_language.ims_message_parser import IMSParser
+
+
+def tests():
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestDeliveryScheduler)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+
+class SimulatedClock(object):
+    """ clock moved by the tests """
+
+    def __init__(self, a_now):
+        self.now = a_now
+
+    def __call__(self):
+        return self.now
+
+
+class TestDeliveryScheduler(unittest.TestCase):
+
+    START = calendar.timegm(datetime.datetime(2026, 10, 19, 10, 30).utctimetuple())
+
+    SUBSCRIPTION = """BEGIN IMS2.0
+MSG_TYPE subscription
+MSG_ID 1 any_ndc
+E-MAIL foo@example.com
+FREQ DAILY
+BULL_TYPE reb
+MAG 3.5 to 5
+MAG_TYPE mb
+BULLETIN IMS2.0
+FREQ CUSTOM 6H
+BULLETIN IMS2.0
+FREQ IMMEDIATE
+BULLETIN IMS2.0
+STOP"""
+
+    def setUp(self):
+        self.clock     = SimulatedClock(self.START)
+        self.scheduler = scheduler.DeliveryScheduler(a_tick = 60, a_clock = self.clock)
+
+    def test_compile_frequency(self):
+        """ the policies and the CUSTOM values are compiled in next fire functions """
+
+        daily = scheduler.compile_frequency({'POLICY' : 'DAILY'})
+        self.assertEqual(daily(self.START) - self.START, 13.5 * 3600)
+
+        every_30m = scheduler.compile_frequency({'POLICY' : 'CUSTOM', 'VALUE' : '30m'})
+        self.assertEqual(every_30m(self.START), self.START + 1800)
+
+        self.assertEqual(scheduler.compile_frequency({'POLICY' : 'IMMEDIATE'}), None)
+        self.assertTrue(scheduler.compile_frequency({'POLICY' : 'CUSTOM', 'VALUE' : '6h'}) is \
+                        scheduler.compile_frequency({'POLICY' : 'CUSTOM', 'VALUE' : '6H'}))
+
+        for value in ('0H', '6X', '06:00', 'tomorrow'):
+            self.assertRaises(scheduler.SchedulerError, scheduler.compile_frequency, \
+                              {'POLICY' : 'CUSTOM', 'VALUE' : value})
+
+    def test_subscription_request(self):
+        """ the products of a validated subscription are delivered at their frequency """
+
+        (_, request) = IMSParser().parse_and_validate_str(self.SUBSCRIPTION)
+
+        keys = self.scheduler.add_request(7, request)
+
+        self.assertEqual(len(keys), 3)
+        self.assertEqual(self.scheduler.event_driven(), frozenset([(7, 2)]))
+
+        fired = []
+        for _ in xrange(48 * 60):
+            self.clock.now += 60
+            fired.extend([(key, fire) for (key, fire) in self.scheduler.pop_due()])
+
+        self.assertEqual(len([key for (key, _) in fired if key == (7, 0)]), 2)
+        self.assertEqual(len([key for (key, _) in fired if key == (7, 1)]), 8)
+        self.assertEqual([fire % 86400 for (key, fire) in fired if key == (7, 0)], [0, 0])
+
+        removed = self.scheduler.apply_commands({'COMMANDLIST' : [{'COMMAND' : 'UNSUBSCRIBE', 'SUBSCRLIST' : [7, 8]}]})
+
+        self.assertEqual(removed, [7])
+        self.assertEqual(len(self.scheduler), 0)
+
+        self.clock.now += 86400
+        self.assertEqual(self.scheduler.pop_due(), [])
+
+    def test_unsubscribe_by_name(self):
+        """ an UNSUBSCRIBE by SUBSCR_NAME stops the deliveries of the named subscriptions of the subscriber """
+
+        (_, request) = IMSParser().parse_and_validate_str(self.SUBSCRIPTION)
+
+        self.scheduler.add_request(7, request, 'Events')
+        self.scheduler.add_request(8, request, 'other')
+        self.scheduler.add_request(9, request)
+
+        unsubscribe = "BEGIN IMS2.0\nMSG_TYPE subscription\nMSG_ID 2 any_ndc\nE-MAIL %s\nSUBSCR_NAME events\n" \
+                      "UNSUBSCRIBE\nSTOP\n"
+
+        (_, command) = IMSParser().parse_and_validate_str(unsubscribe % ('bar@example.com'))
+        self.assertEqual(self.scheduler.apply_commands(command), [])
+
+        (_, command) = IMSParser().parse_and_validate_str(unsubscribe % ('FOO@example.com'))
+        self.assertEqual(self.scheduler.apply_commands(command), [7])
+        self.assertEqual(self.scheduler.apply_commands(command), [])
+
+        self.assertEqual(len(self.scheduler), 6)
+        self.assertEqual(self.scheduler.event_driven(), frozenset([(8, 2), (9, 2)]))
+
+        self.clock.now += 86400
+        self.assertEqual(sorted(set([key[0] for (key, _) in self.scheduler.pop_due()])), [8, 9])
+
+    def test_wheel_against_sorted_list(self):
+        """ the timer wheel pops the same keys as a brute force scan, with cancellations and delays beyond the wheel """
+
+        random.seed(3)
+
+        # small wheel (8, 32 and 128 ticks levels) to cascade and wrap often
+        wheel, expected = scheduler.TimerWheel(1000, (3, 2, 2)), {}
+
+        for key in xrange(3000):
+            expire = 1000 + random.choice([random.randint(0, 10), random.randint(0, 200), random.randint(0, 5000)])
+            wheel.add(key, expire)
+            expected[key] = expire
+
+        for key in xrange(0, 3000, 7):
+            wheel.remove(key)
+            del expected[key]
+
+        current = 1000
+        for step in [1, 5, 7, 8, 31, 32, 100, 1000, 4000]:
+            current += step
+
+            popped = wheel.advance(current)
+
+            due = sorted([(key, expire) for (key, expire) in expected.items() if expire <= current])
+            for (key, _) in due:
+                del expected[key]
+
+            self.assertEqual(sorted(popped), due)
+
+        self.assertEqual(len(wheel), len(expected))
+
+if __name__ == '__main__':
+    tests()
@@ -0,0 +1,120 @@
+'''
+Created on Oct 19, 2026
+
+Packed representation of the numeric id lists (EVENT_LIST, ORIGIN_LIST, ARRIVAL_LIST).
+
+A list of tens of thousands of ids kept as strings costs a str object per element and a linear scan per
+membership test. PackedIdList keeps the ids sorted and unique in an array of C longs (8 bytes per id on
+64 bits platforms) and tests the membership with a binary search.
+The parser only packs the lists whose elements are all integers (IMSParser a_pack_id_lists option):
+a list with wildcards or names is kept as a list of strings.
+'''
+import array
+import bisect
+
+# list environments that can be packed
+ID_LIST_KEYS   = frozenset(['EVENTLIST', 'ORIGINLIST', 'ARRIVALLIST'])
+
+# C long (the 'q' type code does not exist in python 2)
+ARRAY_TYPECODE = 'l'
+
+class PackedIdList(object):
+    """
+       Immutable sorted set of integer ids.
+    """
+
+    __slots__ = ('_ids',)
+
+    def __init__(self, a_ids = ()):
+        """ constructor
+
+            Args:
+               a_ids: iterable of integers (in any order, with duplicates)
+        """
+        self._ids = array.array(ARRAY_TYPECODE, sorted(set(a_ids)))
+
+    @classmethod
+    def from_strings(cls, a_values):
+        """ Pack a parsed list of strings.
+
+            Args:
+               a_values: list of the parsed elements
+
+            Returns:
+               a PackedIdList or None if an element is not an integer (name, wildcard, too big number)
+        """
+        try:
+            return cls([int(value) for value in a_values])
+        except (ValueError, OverflowError):
+            return None
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __iter__(self):
+        return iter(self._ids)
+
+    def __contains__(self, a_id):
+        """ binary search of an id (an integer or a numeric string) """
+        try:
+            the_id = int(a_id)
+        except (ValueError, TypeError):
+            return False
+
+        ids = self._ids
+        pos = bisect.bisect_left(ids, the_id)
+
+        return pos < len(ids) and ids[pos] == the_id
+
+    def filter(self, a_ids):
+        """ Return the elements of a_ids that are in the list (in the a_ids order).
+
+            Args:
+               a_ids: iterable of integers or numeric strings (bulletin rows ids)
+        """
+        return [the_id for the_id in a_ids if the_id in self]
+
+    def tolist(self):
+        """ return the sorted ids as a list of integers """
+        return self._ids.tolist()
+
+    def to_strings(self):
+        """ return the sorted ids as the list of strings the parser would have returned """
+        return ['%d' % (the_id) for the_id in self._ids]
+
+    def __eq__(self, a_other):
+        if isinstance(a_other, PackedIdList):
+            return self._ids == a_other._ids #pylint: disable-msg=W0212
+        return NotImplemented
+
+    def __ne__(self, a_other):
+        result = self.__eq__(a_other)
+        return result if result is NotImplemented else not result
+
+    def __hash__(self):
+        return hash(self._ids.tostring())
+
+    def __repr__(self):
+        return 'PackedIdList(%r)' % (self._ids.tolist())
+
+    # immutable: the copies share the array
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, a_memo):
+        return self
+
+    def __getstate__(self):
+        return self._ids.tostring()
+
+    def __setstate__(self, a_state):
+        self._ids = array.array(ARRAY_TYPECODE)
+        self._ids.fromstring(a_state)
+
+    @classmethod
+    def from_sorted(cls, a_ids):
+        """ build a list from ids already sorted and unique (no check) """
+        result = cls.__new__(cls)
+        result._ids = array.array(ARRAY_TYPECODE, a_ids) #pylint: disable-msg=W0212
+
+        return result
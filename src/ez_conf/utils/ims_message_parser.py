@@ -12,6 +12,9 @@ import re
 import nms_common.parser.common.validator_const as const
 from nms_common.parser.exceptions import ParserError
 from nms_common.parser.ims20_language.ims_tokenizer import IMSTokenizer, ENDMARKERToken, TokenCreator
+from nms_common.parser.ims20_language.ims_id_list import PackedIdList, ID_LIST_KEYS
+import nms_common.parser.ims20_language.ims_data_parser as ims_data_parser
+import nms_common.parser.ims20_language.ims_spool as ims_spool
 from nms_common.parser.ims20_language.ims_semantic_validator import RequestSemanticValidator,\
     SubscriptionSemanticValidator
 from nms_production_engine_api import product_dict_const
@@ -109,37 +112,68 @@ class IMSParser(object):
     #regexp to guess if it is an IMS2.0 language
     IMS20_GUESS      = '(?P<begin>BEGIN)|(?P<end>STOP)|(?P<msgtype>MSG_TYPE)|(?P<msgid>MSG_ID)'
     IMS20_GUESS_RE   = re.compile(IMS20_GUESS, re.IGNORECASE)    
+    
+    # number of bytes read by sniff to guess the message type
+    c_SNIFF_MAX_BYTES = 4096
+    
+    # list line made of simple elements: each element is returned as one ID, WCID or NUMBER token by the tokenizer 
+    # (no DATA id of more than 50 characters, no character starting a DATETIME, MSGFORMAT or EMAILADDR token)
+    c_LIST_ELEM           = r'[A-Za-z0-9_\*]{1,50}'
+    c_LIST_LINE_RE        = re.compile(r'[ \t\f\v]*(%s(?:[ \t\f\v]*,[ \t\f\v]*%s)*)[ \t\f\v]*(?=\r?\n$)' % \
+                                       (c_LIST_ELEM, c_LIST_ELEM))
+    
+    # list elements the tokenizer would not return as an ID: whole keywords and products (followed by a separator)
+    # and the tokens matched without looking at the next character (BOOLEAN, subscription commands)
+    c_LIST_KEYWORD_RE     = re.compile(r'(?:%s)\Z' % ('|'.join(['(?:%s)' % (TokenCreator.get_tokens_re()[name].pattern) \
+                                       for family in (TokenCreator.KEYWORD, TokenCreator.SHI_PRODUCT, \
+                                                      TokenCreator.RAD_PRODUCT, TokenCreator.TEST_PRODUCT) \
+                                       for name in TokenCreator.get_tokens_with_type(family) \
+                                       if name != TOKEN_NAMES.BOOLEAN])), re.IGNORECASE)
+    
+    c_LIST_PREFIX_RE      = re.compile('|'.join(['(?:%s)' % (TokenCreator.get_tokens_re()[name].pattern) \
+                                       for name in [TOKEN_NAMES.BOOLEAN] + \
+                                       TokenCreator.get_tokens_with_type(TokenCreator.SUBSCRIPTION_COMMAND)]), \
+                                       re.IGNORECASE)
                 
     
-    def __init__(self):
-        """ constructor """
+    def __init__(self, a_result_cache = None, a_product_memo_size = 0, a_pack_id_lists = False):
+        """ constructor
+        
+            Args:
+               a_result_cache     : optional IMSResultCache (see ims_result_cache) used by parse_and_validate 
+               a_product_memo_size: number of validated products memoized by the validators (0 to deactivate)
+               a_pack_id_lists    : if True the numeric EVENT_LIST, ORIGIN_LIST and ARRIVAL_LIST are returned 
+                                    as PackedIdList (see ims_id_list) instead of lists of strings
+        """
         
         self._tokenizer = IMSTokenizer()
         
+        self._result_cache = a_result_cache
+        
+        self._pack_id_lists = a_pack_id_lists
+        
         # io stream
         self._io_prog   = None
         
         self.__log__ = LoggerFactory.get_logger(self)
 
-        self._request_semantic_validator = RequestSemanticValidator()
+        self._request_semantic_validator = RequestSemanticValidator(a_product_memo_size)
         
-        self._subscription_semantic_validor = SubscriptionSemanticValidator()
+        self._subscription_semantic_validor = SubscriptionSemanticValidator(a_product_memo_size)
 
         
     def get_message_type(self, a_message):
         """Extract the message type : subscription or request"""
-        message_type = None
-        if self.is_parsable(a_message):
-            for line in a_message.split('\n'):
-                msg_type_token  = ims_tokenizer.MSGTYPE_RE.search(line)
-                if msg_type_token is not None:
-                    message_type_match = ims_tokenizer.ID_RE.search(line.strip()[len(msg_type_token.group()):])
-                    message_type = message_type_match.group()
-                    break;
-            if message_type is None:
-                raise ParserError("No message type in the IMS2.0 message %s" % a_message)
-        else:
+        info = self.sniff(a_message)
+        
+        if not info['PARSABLE']:
             raise ParserError("Message is not an IMS2.0 message %s" % a_message)
+        
+        message_type = info.get('TYPE', None)
+        
+        if message_type is None:
+            raise ParserError("No message type in the IMS2.0 message %s" % a_message)
+        
         return message_type
         
     def is_parsable(self, a_message):
@@ -154,20 +188,84 @@ class IMSParser(object):
             Raises:
                exception 
         """ 
-        io_msg           = StringIO.StringIO(a_message)
+        return self.sniff(a_message)['PARSABLE']
+    
+    @classmethod
+    def sniff(cls, a_message, a_max_bytes = None):
+        """ Read the beginning of a message to guess if it is an IMS2.0 message and get its header info in one pass.
+            Only the first a_max_bytes are read and the reading stops as soon as the begin, msg_type 
+            and msg_id lines have been seen.
+            
+            Args:
+              a_message   : a message string or a file-like object. The stream is read from its current position 
+                            and repositioned there afterwards.
+              a_max_bytes : number of bytes to look at (default c_SNIFF_MAX_BYTES)
+               
+            Returns:
+               a dict with LANGUAGE, PARSABLE (True if it looks like an IMS2.0 message) and 
+               FORMAT, TYPE, ID, SOURCE when they have been found
+        """ 
+        max_bytes = a_max_bytes if a_max_bytes else cls.c_SNIFF_MAX_BYTES
+        
+        if hasattr(a_message, 'read'):
+            pos       = a_message.tell()
+            data      = a_message.read(max_bytes)
+            a_message.seek(pos)
+            truncated = (len(data) == max_bytes)
+        else:
+            data      = a_message[:max_bytes]
+            truncated = (len(a_message) > max_bytes)
+        
+        lines = data.split('\n')
+        
+        # the last line has been cut
+        if truncated:
+            lines.pop()
+        
+        res  = { 'LANGUAGE' : 'IMSLANGUAGE' }
+        seen = set()
         
         #confidence number
         conf_nb = 0
         
         #for the moment give the same confidence to all matched element
         # in the future we could different each keyword
-        for line in io_msg:
-            matched          = self.__class__.IMS20_GUESS_RE.search(line)
-            if matched:
-                conf_nb += 100
+        for line in lines:
+            matched = cls.IMS20_GUESS_RE.search(line)
+            
+            if not matched:
+                continue
+            
+            conf_nb += 100
+            
+            if matched.group('begin') and 'begin' not in seen:
+                seen.add('begin')
+                fmt_matched = IMSTokenizer.MSGFORMAT_PATTERN_RE.search(line)
+                if fmt_matched:
+                    res['FORMAT'] = fmt_matched.group('msgfmt')
+                    
+            elif matched.group('msgtype') and 'msgtype' not in seen:
+                seen.add('msgtype')
+                type_matched = ims_tokenizer.ID_RE.search(line, matched.end())
+                if type_matched:
+                    res['TYPE'] = type_matched.group()
+                    
+            elif matched.group('msgid') and 'msgid' not in seen:
+                seen.add('msgid')
+                id_matched = IMSTokenizer.MSGID_PATTERN_RE.search(line)
+                if id_matched:
+                    res['ID'] = id_matched.group('msgid')
+                    if id_matched.group('msgsource'):
+                        res['SOURCE'] = id_matched.group('msgsource')
+            
+            # the header is known: no need to go further
+            if len(seen) == 3:
+                break
         
         #need at least two keywords
-        return True if conf_nb >= 200 else False
+        res['PARSABLE'] = True if conf_nb >= 200 else False
+        
+        return res
     
     def get_header_on_error(self, a_message):
         """ return essential info in case of error
@@ -283,8 +381,67 @@ class IMSParser(object):
         
         return (self._tokenizer.get_tokenized_string(begin, end), self._parse())
       
+    def parse_header(self, a_message):
+        """ Parse only the header of a message (MSGINFO, ACK and TARGETINFO) to be able to route it.
+            The tokenizer stops on the first token of the body so the cost does not depend on the message size.
+        
+            Args:
+               a_message: a message string or an io stream (file, or StringIO)
+               
+            Returns:
+               A tuple (header dictionary, body offset, body line number). The body offset is the position 
+               in the stream of the first line of the body and can be given to parse_body to resume the parsing.
+        
+            Raises:
+               exception ParsingError if the header is not well formatted
+        """ 
+        io_prog = StringIO.StringIO(a_message) if isinstance(a_message, basestring) else a_message
+        
+        self._tokenizer.set_io_prog(io_prog)
+        
+        header = self._parse_header_message()
+        
+        # the current token is the first token of the body
+        token = self._tokenizer.current_token()
+        
+        if token.type == IMSParser.TOKEN_NAMES.ENDMARKER:
+            # no body: the whole stream has been read
+            body_offset = io_prog.tell()
+        else:
+            body_offset = token.file_pos - len(token.parsed_line)
+            
+        return (header, body_offset, token.line_num)
+    
+    def parse_body(self, a_message, a_header, a_body_offset, a_body_line_num = 1):
+        """ Resume the parsing of a message whose header has been read with parse_header.
+        
+            Args:
+               a_message      : the message string or io stream given to parse_header
+               a_header       : the header dictionary returned by parse_header
+               a_body_offset  : the body offset returned by parse_header
+               a_body_line_num: the body line number returned by parse_header (used in the error messages)
+               
+            Returns:
+               The request dictionary (header and body)
+        
+            Raises:
+               exception 
+        """ 
+        io_prog = StringIO.StringIO(a_message) if isinstance(a_message, basestring) else a_message
+        
+        self._tokenizer.set_io_prog(io_prog)
+        self._tokenizer.set_file_pos(a_body_offset)
+        self._tokenizer.set_line_num(a_body_line_num - 1)
+        
+        # read the first token of the body
+        self._tokenizer.next()
+        
+        return self._parse_body(dict(a_header))
+      
     def parse_and_validate(self, io_stream):  
         """ tokenize, parsed and validate an io_stream object.
+            When the parser has a result cache, the result of an already validated message is 
+            returned without parsing it and the stream is positioned after the message. 
         
             Args:
                message: a message string
@@ -295,6 +452,42 @@ class IMSParser(object):
             Raises:
                exception 
         """
+        if self._result_cache is None:
+            return self._parse_and_validate(io_stream)
+        
+        # the key is made of the message only: the stream is not read after its STOP line
+        begin = io_stream.tell()
+        key   = self._result_cache.make_key(ims_spool.read_until_stop(io_stream), \
+                                            'PACKED' if self._pack_id_lists else '')
+        
+        cached = self._result_cache.get(key)
+        
+        if cached is not None:
+            (tokenized_str, result, length) = cached
+            io_stream.seek(begin + length)
+            return (tokenized_str, result)
+        
+        io_stream.seek(begin)
+        
+        (tokenized_str, result) = self._parse_and_validate(io_stream)
+        
+        # keep the consumed length to reposition the stream on a hit
+        self._result_cache.put(key, (tokenized_str, result, io_stream.tell() - begin))
+        
+        return (tokenized_str, result)
+    
+    def _parse_and_validate(self, io_stream):  
+        """ tokenize, parsed and validate an io_stream object (no cache).
+        
+            Args:
+               io_stream: an io stream (file, or StringIO)
+               
+            Returns:
+               return a tuple (understood request, request dictionary)
+        
+            Raises:
+               exception 
+        """
         self._tokenizer.set_io_prog(io_stream)
         parse_dict = self._parse()
         
@@ -343,6 +536,21 @@ class IMSParser(object):
         """
         result_dict = self._parse_header_message()
         
+        return self._parse_body(result_dict)
+    
+    def _parse_body(self, result_dict):
+        """ private parsing method for the message body. The tokenizer current token has to be 
+            the first token of the body.
+        
+            Args:
+               result_dict: the header dictionary returned by _parse_header_message
+               
+            Returns:
+               The request dictionary (result_dict updated with the body content)
+        
+            Raises:
+               exception 
+        """
         # 3 choices from there: data, request or subscription message
         req_type = result_dict['MSGINFO']['TYPE']
         
@@ -753,34 +961,75 @@ class IMSParser(object):
         
         tok_type  = a_token.type
          
-        lst = []
+        lst = self._fast_parse_list(a_token)
         
-        while True:
+        # the token path is used for the lines that are not simple lists (and gives the error messages)
+        if lst is None:
             
-            token = self._tokenizer.next() 
-        
-            #should find an ID
-            if token.type in (IMSParser.TOKEN_NAMES.ID, IMSParser.TOKEN_NAMES.WCID, IMSParser.TOKEN_NAMES.NUMBER):
+            lst = []
             
-                lst.append(token.value)
+            while True:
                 
-                # should find a COMMA or NEWLINE
-                # IF COMMA loop again else leave loop
-                token = self._tokenizer.consume_next_tokens([IMSParser.TOKEN_NAMES.COMMA, \
-                                                             IMSParser.TOKEN_NAMES.NEWLINE])
+                token = self._tokenizer.next() 
+            
+                #should find an ID
+                if token.type in (IMSParser.TOKEN_NAMES.ID, IMSParser.TOKEN_NAMES.WCID, IMSParser.TOKEN_NAMES.NUMBER):
                 
-                if token.type == IMSParser.TOKEN_NAMES.NEWLINE:
-                    #leave the loop
-                    break
-            else:
-                raise ParsingError(ParsingError.create_std_error_msg('a list id', token), \
-                                   'The list line is not well formatted', token)
+                    lst.append(token.value)
+                    
+                    # should find a COMMA or NEWLINE
+                    # IF COMMA loop again else leave loop
+                    token = self._tokenizer.consume_next_tokens([IMSParser.TOKEN_NAMES.COMMA, \
+                                                                 IMSParser.TOKEN_NAMES.NEWLINE])
+                    
+                    if token.type == IMSParser.TOKEN_NAMES.NEWLINE:
+                        #leave the loop
+                        break
+                else:
+                    raise ParsingError(ParsingError.create_std_error_msg('a list id', token), \
+                                       'The list line is not well formatted', token)
   
+        # numeric id lists are packed on demand (the lists with wildcards stay strings)
+        if self._pack_id_lists and tok_type in ID_LIST_KEYS:
+            packed = PackedIdList.from_strings(lst)
+            if packed is not None:
+                lst = packed
+        
         # if goes here then there is something in stations
         res_dict[tok_type] = lst
         
         return res_dict  
                
+    def _fast_parse_list(self, a_token):
+        """ Split the rest of a list line in one pass when it only contains simple elements.
+            
+            Args: a_token: The list keyword token (current token of the tokenizer)
+               
+            Returns:
+               the list of elements (the tokenizer is on the NEWLINE token ending the line) or None if the 
+               line has to be parsed token by token
+        """ 
+        if self._tokenizer.current_token() is not a_token:
+            return None
+        
+        line    = a_token.parsed_line
+        matched = IMSParser.c_LIST_LINE_RE.match(line, self._tokenizer.line_pos())
+        
+        if not matched:
+            return None
+        
+        elements = [elem.strip(' \f\t\v') for elem in matched.group(1).split(',')]
+        
+        for elem in elements:
+            if IMSParser.c_LIST_KEYWORD_RE.match(elem) or IMSParser.c_LIST_PREFIX_RE.match(elem):
+                return None
+        
+        # resume the tokenization on the end of line
+        self._tokenizer.set_line_pos(matched.end())
+        self._tokenizer.next()
+        
+        return elements
+    
     def _parse_complex_product(self, a_token):
         """ Parse complex products either SHI or Radionuclide
             Args: a_token: token
@@ -865,7 +1114,7 @@ class IMSParser(object):
         
         if token.type == IMSParser.TOKEN_NAMES.NUMBER:  
             
-            res_dict['START'] = token.value
+            res_dict['START'] = token.typed_str()
             
             # try to consume the next token that should be TO
             self._tokenizer.consume_next_token(IMSParser.TOKEN_NAMES.TO)
@@ -881,7 +1130,7 @@ class IMSParser(object):
         
         # it can be either NUMBER (ENDMAG) or NEWLINE (this means that it will magnitude max)
         if token.type == IMSParser.TOKEN_NAMES.NUMBER:
-            res_dict['END'] = token.value
+            res_dict['END'] = token.typed_str()
             
             #consume new line
             self._tokenizer.consume_next_token(IMSParser.TOKEN_NAMES.NEWLINE)
@@ -919,14 +1168,14 @@ class IMSParser(object):
             #expect a number
             token = self._tokenizer.consume_next_token(IMSParser.TOKEN_NAMES.NUMBER)
             
-            res_dict['START'] = '-%s' % (token.value)
+            res_dict['START'] = self._negative_typed_str(token)
             
             # try to consume the next token that should be TO
             self._tokenizer.consume_next_token(IMSParser.TOKEN_NAMES.TO)
         # positive number
         elif token.type == IMSParser.TOKEN_NAMES.NUMBER:
             
-            res_dict['START'] = token.value
+            res_dict['START'] = token.typed_str()
             
             # try to consume the next token that should be TO
             self._tokenizer.consume_next_token(IMSParser.TOKEN_NAMES.TO)
@@ -946,7 +1195,7 @@ class IMSParser(object):
             #expect a number
             token = self._tokenizer.consume_next_token(IMSParser.TOKEN_NAMES.NUMBER)
             
-            res_dict['END'] = '-%s'% (token.value)
+            res_dict['END'] = self._negative_typed_str(token)
             
             # try to consume the next token that should be TO
             #go to next token
@@ -954,7 +1203,7 @@ class IMSParser(object):
             
         elif token.type == IMSParser.TOKEN_NAMES.NUMBER:
             
-            res_dict['END'] = token.value
+            res_dict['END'] = token.typed_str()
             
             #consume new line
             self._tokenizer.consume_next_token(IMSParser.TOKEN_NAMES.NEWLINE)
@@ -970,6 +1219,13 @@ class IMSParser(object):
         self._tokenizer.next()
        
         return res_dict
+    
+    @classmethod
+    def _negative_typed_str(cls, a_token):
+        """ return the negative value of a NUMBER token as a TypedString """
+        typed_value = a_token.typed_value
+        
+        return ims_tokenizer.TypedString('-%s' % (a_token.value), -typed_value if typed_value is not None else None)
             
     def _parse_time(self):
         """ Parse time component.
@@ -992,7 +1248,7 @@ class IMSParser(object):
                                'The time line is incorrect. The datetime value is probably malformatted or missing.'\
                                , token)
             
-        time_dict['START'] = token.value
+        time_dict['START'] = token.typed_str()
         
         token = self._tokenizer.next()
         # it should be a TO
@@ -1006,7 +1262,7 @@ class IMSParser(object):
                                'The time line is incorrect. The datetime value is probably malformatted or missing.'\
                                , token)
             
-        time_dict['END'] = token.value
+        time_dict['END'] = token.typed_str()
         
         #consume at least a NEWLINE
         self._tokenizer.consume_next_token(IMSParser.TOKEN_NAMES.NEWLINE)
@@ -1199,15 +1455,40 @@ class IMSParser(object):
         return result_dict
     
     def _parse_data_message(self):
-        """ Parse Radionuclide and SHI request messages
+        """ Parse Radionuclide and SHI data messages.
+            The sections are found by ims_data_parser without tokenizing their content, their bodies are 
+            described by their position in the stream (see ims_data_parser.iter_sections to read them).
         
             Args: None
                
             Returns:
-               return a dictionary of pased values 
+               return a dictionary with DATASECTIONS: list of dictionaries with TYPE, FORMAT, SUBTYPE, SUBFORMAT,
+               OFFSET and LENGTH of each section body
         
             Raises:
-               exception 
+               exception ParsingError if there is no section or no STOP line
         """ 
-        raise ParsingError("_parse_data_message is currently not implemented", "No suggestion", ENDMARKERToken(100))
+        token = self._tokenizer.current_token()
+        
+        if token.type == IMSParser.TOKEN_NAMES.ENDMARKER:
+            raise ParsingError('End of message reached without encountering a data_type line', \
+                               'The data message has no DATA_TYPE section', token)
+        
+        io_prog = self._tokenizer.io_prog()
+        
+        (sections, stop_end) = ims_data_parser.scan_stream(io_prog, token.file_pos - len(token.parsed_line))
+        
+        if not sections:
+            raise ParsingError(ParsingError.create_std_error_msg('a data_type line', token), \
+                               'The data message has no DATA_TYPE section', token)
+        
+        if stop_end is None:
+            raise ParsingError('End of message reached without encountering a stop keyword', \
+                               'Stop keyword missing or truncated message', ENDMARKERToken(token.line_num))
+        
+        # the understood message ends with the STOP line
+        self._tokenizer.set_file_pos(stop_end)
+        io_prog.seek(stop_end)
+        
+        return { 'DATASECTIONS' : sections }
        
\ No newline at end of file
@@ -0,0 +1,199 @@
+'''
+Created on Oct 19, 2026
+
+'''
+
+# unit tests part
+import unittest
+import StringIO
+
+from nms_common.parser.exceptions import ParserError
+from nms_common.parser.ims20_language.ims_message_parser import IMSParser, ParsingError
+
+
+def tests():
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestIMSParser)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+
+class FastListParser(IMSParser):
+    """ parser counting the list lines split by the fast path """
+
+    def __init__(self):
+        super(FastListParser, self).__init__()
+        self.fast_lines = 0
+
+    def _fast_parse_list(self, a_token):
+        lst = super(FastListParser, self)._fast_parse_list(a_token)
+        if lst is not None:
+            self.fast_lines += 1
+        return lst
+
+
+class TokenListParser(IMSParser):
+    """ parser without the fast path: all the list lines are parsed token by token """
+
+    def _fast_parse_list(self, a_token):
+        return None
+
+
+class TestIMSParser(unittest.TestCase):
+
+    HEADER  = "BEGIN IMS2.0\nMSG_TYPE request\nMSG_ID 1 any_ndc\nE-MAIL foo@bar.com\n"
+
+    REQUEST = HEADER + "TIME 2009/01/01 to 2009/01/02\nSTA_LIST ARCES\nWAVEFORM IMS2.0\nSTOP\n"
+
+    def setUp(self):
+        self._parser = IMSParser()
+
+    def _error(self, a_function, *a_args):
+        """ return the message of the ParsingError raised by a function """
+        try:
+            a_function(*a_args)
+        except ParsingError, err:
+            return err.message
+
+        self.fail("no ParsingError raised")
+
+    def test_parse_header_and_body(self):
+        """ parse_body resumes after parse_header on str and StringIO, with LF and CRLF lines """
+
+        for newline in ('\n', '\r\n'):
+            message  = self.REQUEST.replace('\n', newline)
+            expected = IMSParser().parse_str(message)
+
+            for (prefix, stream) in (('', None), ('', StringIO.StringIO(message)), \
+                                     ('STOP' + newline, StringIO.StringIO('STOP' + newline + message))):
+                source = message if stream is None else stream
+
+                if stream is not None:
+                    stream.seek(len(prefix))
+
+                (header, body_offset, body_line_num) = self._parser.parse_header(source)
+
+                self.assertEqual(header['MSGINFO'], expected['MSGINFO'])
+                self.assertEqual(header['TARGETINFO'], expected['TARGETINFO'])
+                self.assertFalse('PRODUCTLIST' in header)
+
+                # the body starts on the 5th line of the message
+                self.assertEqual(body_offset, len(prefix) + len(self.HEADER.replace('\n', newline)))
+                self.assertEqual(body_line_num, 5)
+
+                self.assertEqual(self._parser.parse_body(source, header, body_offset, body_line_num), expected)
+
+                if stream is not None:
+                    self.assertEqual(stream.tell(), len(stream.getvalue()))
+
+            # message without body: the offset is the end of the header
+            header_only = self.HEADER.replace('\n', newline)
+
+            self.assertEqual(self._parser.parse_header(header_only)[1:], (len(header_only), 4))
+            self.assertEqual(self._parser.parse_header(header_only + 'STOP' + newline)[1:], (len(header_only), 5))
+
+    def test_parse_body_errors(self):
+        """ the errors of the header and of the resumed body have the line numbers of the whole message """
+
+        for newline in ('\n', '\r\n'):
+            message = self.REQUEST.replace('STA_LIST ARCES\n', 'STA_LIST ARCES\nLAT 10 to abc\n').replace('\n', newline)
+
+            (header, body_offset, body_line_num) = self._parser.parse_header(message)
+
+            error = self._error(self._parser.parse_body, message, header, body_offset, body_line_num)
+
+            self.assertTrue(error.startswith('Error[line=7,pos=10]'), error)
+            self.assertEqual(error, self._error(IMSParser().parse_str, message))
+
+            # without the body line number, the lines are counted from the body
+            error = self._error(self._parser.parse_body, message, header, body_offset)
+
+            self.assertTrue(error.startswith('Error[line=3,pos=10]'), error)
+
+            bad_header = self.HEADER.replace('E-MAIL foo@bar.com', 'E-MAIL').replace('\n', newline)
+
+            error = self._error(self._parser.parse_header, bad_header)
+
+            self.assertTrue(error.startswith('Error[line=4,pos=6]'), error)
+
+    def test_sniff(self):
+        """ sniff guesses the IMS2.0 messages and their header from the first c_SNIFF_MAX_BYTES bytes """
+
+        info = IMSParser.sniff(self.REQUEST)
+
+        self.assertEqual(info, { 'LANGUAGE' : 'IMSLANGUAGE', 'PARSABLE' : True, 'FORMAT' : 'IMS2.0', \
+                                 'TYPE' : 'request', 'ID' : '1', 'SOURCE' : 'any_ndc' })
+
+        subscription = "begin ims2.0\r\nmsg_type subscription\r\nmsg_id 42\r\nE-MAIL foo@bar.com\r\n"
+
+        self.assertEqual(IMSParser.sniff(subscription), { 'LANGUAGE' : 'IMSLANGUAGE', 'PARSABLE' : True, \
+                                                          'FORMAT' : 'ims2.0', 'TYPE' : 'subscription', 'ID' : '42' })
+
+        data = "BEGIN IMS2.0\nMSG_TYPE data\nMSG_ID 42 ctbto\nDATA_TYPE LOG IMS2.0\nSTOP\n"
+
+        self.assertEqual(self._parser.get_message_type(data), 'data')
+
+        for garbage in ('', 'hello world\nthis is not a message\n', 'BEGIN IMS2.0\n'):
+            self.assertFalse(self._parser.is_parsable(garbage), garbage)
+
+        self.assertRaises(ParserError, self._parser.get_message_type, 'hello world\n')
+
+        # a stream is read from its position and repositioned there
+        stream = StringIO.StringIO('STOP\n' + self.REQUEST)
+        stream.seek(5)
+
+        self.assertEqual(IMSParser.sniff(stream), info)
+        self.assertEqual(stream.tell(), 5)
+
+        # the lines after c_SNIFF_MAX_BYTES are not read, a cut line is ignored
+        long_header = "BEGIN IMS2.0\n" + ' \n' * IMSParser.c_SNIFF_MAX_BYTES + "MSG_TYPE request\nMSG_ID 1\n"
+
+        for source in (long_header, StringIO.StringIO(long_header)):
+            self.assertEqual(IMSParser.sniff(source), { 'LANGUAGE' : 'IMSLANGUAGE', 'PARSABLE' : False, \
+                                                        'FORMAT' : 'IMS2.0' })
+
+        self.assertTrue(IMSParser.sniff(long_header, len(long_header))['PARSABLE'])
+
+        self.assertFalse('ID' in IMSParser.sniff(self.REQUEST, self.REQUEST.find('any_ndc')))
+
+    @classmethod
+    def _parse_list_line(cls, a_parser, a_message):
+        """ return the parsed message or the error class and message """
+        try:
+            return a_parser.parse_str(a_message)
+        except ParserError, err:
+            return (err.__class__.__name__, err.message)
+
+    def test_fast_list_path(self):
+        """ the list lines split in one pass give the same result and the same errors as the token path """
+
+        simple = ['ARCES', 'ARCES,FINES', ' ARCES , FINES\t,NOA  ', 'AR*,*ES, *', '12, 13,014', 'bhz,SH*',
+                  'x' * 50, 'a_1, B_2', 'ON, YES, NO']
+
+        # lines left to the token path: keywords, products, booleans, long ids, empty elements, bad characters
+        other  = ['ARCES, TIME', 'ARCES,waveform', 'true', 'TRUEX', 'ARCES, UNSUBSCRIBE', 'x' * 51, 'ARCES,,FINES',
+                  'ARCES,', ',ARCES', 'ARCES FINES', 'ARCES;FINES', '', '2009/01/01', 'AR-CES', '1.5, 2', 'ARCES, *ES ,']
+
+        for newline in ('\n', '\r\n'):
+            for (lines, fast) in ((simple, True), (other, False)):
+                for line in lines:
+                    message = self.REQUEST.replace('STA_LIST ARCES\n', 'STA_LIST %s\n' % (line)).replace('\n', newline)
+
+                    parser = FastListParser()
+                    result = self._parse_list_line(parser, message)
+
+                    self.assertEqual(result, self._parse_list_line(TokenListParser(), message), repr(line))
+                    self.assertEqual(parser.fast_lines, 1 if fast else 0, repr(line))
+
+                    if fast:
+                        self.assertEqual(result['PRODUCTLIST'][0]['STALIST'], \
+                                         [elem.strip() for elem in line.split(',')])
+
+        # the error of a bad line is the one of the token path
+        message = self.REQUEST.replace('STA_LIST ARCES\n', 'STA_LIST ARCES,,FINES\n')
+
+        (error_class, error) = self._parse_list_line(FastListParser(), message)
+
+        self.assertEqual(error_class, 'ParsingError')
+        self.assertTrue(error.startswith('Error[line=6,pos=15]'), error)
+
+if __name__ == '__main__':
+    tests()
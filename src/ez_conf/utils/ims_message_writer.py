@@ -0,0 +1,216 @@
+'''
+Created on Oct 19, 2026
+
+Streaming writer of the outbound IMS2.0 messages cut in parts of a maximum size (e-mail size caps).
+
+The body lines are written directly in the part files so the memory does not depend on the message size.
+When the next line would make the current part larger than a_max_bytes, the part is closed with a STOP line
+and a new part starts with the same header and a REF_ID ref_str [ref_src] PART n OF m line (the current
+DATA_TYPE line is repeated so each part can be read alone).
+The tot_num of the REF_ID lines is written in a fixed width field, either from an estimation given by the
+caller or as a placeholder, and back-patched in every part when the writer is closed.
+'''
+import os
+
+# width of the tot_num field of the REF_ID line
+TOTNUM_WIDTH = 4
+
+STOP_LINE    = 'STOP\n'
+
+class MessageWriterError(Exception):
+    """ Message that cannot be written in parts """
+
+    def __init__(self, a_msg):
+        super(MessageWriterError, self).__init__(a_msg)
+
+def estimate_parts(a_body_size, a_max_bytes, a_header_size):
+    """ Estimate the number of parts of a message (the lines being kept whole, the result can be lower than
+        the real number of parts).
+
+        Args:
+           a_body_size  : size of the body in bytes
+           a_max_bytes  : max size of a part
+           a_header_size: size of the header of a part
+
+        Returns:
+           the estimated number of parts
+    """
+    room = a_max_bytes - a_header_size - len(STOP_LINE)
+
+    if room <= 0:
+        raise MessageWriterError("A part of %d bytes cannot hold a header of %d bytes" % (a_max_bytes, a_header_size))
+
+    return max(1, (a_body_size + room - 1) // room)
+
+class MultiPartWriter(object):
+    """
+       Write an IMS2.0 message in parts of a maximum size.
+    """
+
+    def __init__(self, a_part_path, a_max_bytes, a_msg_id, a_ref_str, a_msg_type = 'data', a_source = None, \
+                 a_ref_src = None, a_header_lines = (), a_estimated_parts = None, a_totnum_width = TOTNUM_WIDTH):
+        """ constructor
+
+            Args:
+               a_part_path      : function returning the path of the file of a part from its seq_num
+               a_max_bytes      : max size of a part in bytes
+               a_msg_id         : MSG_ID of the parts
+               a_ref_str        : ref_str of the REF_ID lines
+               a_msg_type       : MSG_TYPE of the parts
+               a_source         : source of the MSG_ID line
+               a_ref_src        : ref_src of the REF_ID lines
+               a_header_lines   : other header lines (E-MAIL ...) written after the REF_ID line
+               a_estimated_parts: estimated number of parts (see estimate_parts). No back-patch is needed when right
+               a_totnum_width   : width of the tot_num field
+        """
+        self._part_path   = a_part_path
+        self._max_bytes   = a_max_bytes
+        self._width       = a_totnum_width
+
+        msg_id = '%s %s' % (a_msg_id, a_source) if a_source else '%s' % (a_msg_id)
+        ref_id = '%s %s' % (a_ref_str, a_ref_src) if a_ref_src else '%s' % (a_ref_str)
+
+        self._head        = 'BEGIN IMS2.0\nMSG_TYPE %s\nMSG_ID %s\nREF_ID %s PART ' % (a_msg_type, msg_id, ref_id)
+        self._tail        = ''.join([line.rstrip('\n') + '\n' for line in a_header_lines])
+        self._estimated   = a_estimated_parts
+
+        # (path, offset of the tot_num field) of the written parts
+        self._parts       = []
+
+        self._file        = None
+        self._size        = 0
+        self._section     = None
+        self._closed      = False
+
+    @property
+    def parts(self):
+        """ paths of the written parts """
+        return [path for (path, _) in self._parts]
+
+    def _totnum_field(self, a_total):
+        """ return the fixed width tot_num field """
+        field = '%d' % (a_total)
+
+        if len(field) > self._width:
+            raise MessageWriterError("%d parts do not fit in a tot_num field of %d characters" % (a_total, self._width))
+
+        return field.ljust(self._width)
+
+    def _header(self, a_seq_num):
+        """ return the header of a part and the offset of its tot_num field """
+        start = '%s%d OF ' % (self._head, a_seq_num)
+        total = self._estimated if self._estimated else 0
+
+        return ('%s%s\n%s' % (start, self._totnum_field(max(total, a_seq_num)), self._tail), len(start))
+
+    def _new_part(self):
+        """ close the current part and open the next one """
+        self._close_part()
+
+        seq_num = len(self._parts) + 1
+        path    = self._part_path(seq_num)
+
+        (header, totnum_offset) = self._header(seq_num)
+
+        self._file = open(path, 'wb')
+        self._file.write(header)
+        self._size = len(header)
+
+        self._parts.append((path, totnum_offset))
+
+        if self._section is not None:
+            self._file.write(self._section)
+            self._size += len(self._section)
+
+    def _close_part(self):
+        """ write the STOP line of the current part """
+        if self._file is not None:
+            self._file.write(STOP_LINE)
+            self._file.close()
+            self._file = None
+
+    def write_line(self, a_line):
+        """ Write a line of the body, starting a new part if the current one would be too big.
+
+            Args:
+               a_line: the line (the end of line is added if missing)
+
+            Raises:
+               exception MessageWriterError if the line cannot fit in a part
+        """
+        if self._closed:
+            raise MessageWriterError("The writer has been closed")
+
+        line = a_line if a_line.endswith('\n') else a_line + '\n'
+
+        if self._file is None or self._size + len(line) + len(STOP_LINE) > self._max_bytes:
+            self._new_part()
+
+            if self._size + len(line) + len(STOP_LINE) > self._max_bytes:
+                raise MessageWriterError("A line of %d bytes does not fit in a part of %d bytes" % \
+                                         (len(line), self._max_bytes))
+
+        self._file.write(line)
+        self._size += len(line)
+
+    def write_lines(self, a_lines):
+        """ write the lines of an iterable """
+        for line in a_lines:
+            self.write_line(line)
+
+    def begin_section(self, a_data_type_line):
+        """ Write a DATA_TYPE line. It is repeated at the beginning of the next parts until another section starts.
+
+            Args:
+               a_data_type_line: the DATA_TYPE line
+        """
+        # the line is written before being remembered so it is not written twice in a new part
+        self._section = None
+        self.write_line(a_data_type_line)
+        self._section = a_data_type_line if a_data_type_line.endswith('\n') else a_data_type_line + '\n'
+
+    def close(self):
+        """ Close the last part and write the real tot_num in the parts where the estimation was wrong.
+
+            Returns:
+               the list of the paths of the parts
+        """
+        if self._closed:
+            return self.parts
+
+        if self._file is None:
+            # empty message: one part with only the header
+            self._new_part()
+
+        self._close_part()
+        self._closed = True
+
+        total = len(self._parts)
+        field = self._totnum_field(total)
+
+        for (seq_num, (path, offset)) in enumerate(self._parts):
+            written_total = max(self._estimated or 0, seq_num + 1)
+
+            if written_total == total:
+                continue
+
+            the_file = open(path, 'r+b')
+            try:
+                the_file.seek(offset)
+                the_file.write(field)
+            finally:
+                the_file.close()
+
+        return self.parts
+
+    def abort(self):
+        """ close the writer and remove the written parts """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+        self._closed = True
+
+        for (path, _) in self._parts:
+            if os.path.exists(path):
+                os.remove(path)
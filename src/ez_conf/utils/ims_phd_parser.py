@@ -0,0 +1,270 @@
+'''
+Created on Oct 19, 2026
+
+Parser of the radionuclide pulse height data (PHD) returned for the RAD products (SPHDF, SPHDP, QCPHD, BLANKPHD,
+DETBKPHD, GASBKPHD, CALIBPHD).
+
+A PHD section is a sequence of blocks starting with a #name line (#Header, #Acquisition, #Calibration,
+#g_Energy, #g_Spectrum ...). The blocks are found with one compiled regexpr and only the blocks needed are read:
+   - #Header, #Acquisition and #Calibration give small typed records (namedtuples),
+   - #g_Spectrum and #b_Spectrum give the channel counts in a numpy array. The whole block is parsed at once
+     by numpy.fromstring and the channel of each count is computed with array operations from the first
+     number of its line, so no token is created per count.
+The other blocks are returned as (offset, length) of their body in the section.
+'''
+import array
+import collections
+import re
+
+import nms_common.parser.common.time as parser_time
+import nms_common.parser.ims20_language.ims_data_parser as ims_data_parser
+
+try:
+    import numpy
+except ImportError: # without numpy the counts are parsed in an array.array
+    numpy = None
+
+# DATA_TYPE of the sections holding pulse height data
+PHD_DATA_TYPES = frozenset(['SAMPLEPHD', 'SPHDF', 'SPHDP', 'QCPHD', 'BLANKPHD', 'DETBKPHD', 'GASBKPHD', 'CALIBPHD'])
+
+# blocks holding spectra
+SPECTRUM_BLOCKS = ('G_SPECTRUM', 'B_SPECTRUM')
+
+BLOCK_RE = re.compile(r'^#(?P<name>[A-Za-z]\w*)(?P<args>[^\n]*)\n?', re.MULTILINE)
+
+BLANKS   = ' \t\r\n\v\f'
+
+PHDHeader      = collections.namedtuple('PHDHeader', ['station', 'detector', 'system_type', 'geometry', \
+                                                      'qualifier', 'sample_ref_id', 'measurement_id', \
+                                                      'detector_bk_id', 'gas_bk_id', 'transmit_time'])
+
+PHDAcquisition = collections.namedtuple('PHDAcquisition', ['start', 'real_time', 'live_time'])
+
+PHDCalibration = collections.namedtuple('PHDCalibration', ['date'])
+
+PHDSpectrum    = collections.namedtuple('PHDSpectrum', ['nb_channels', 'energy_span', 'start_channel', 'counts'])
+
+class PHDParseError(Exception):
+    """ Pulse height data that cannot be parsed """
+
+    def __init__(self, a_msg):
+        super(PHDParseError, self).__init__(a_msg)
+
+def iter_blocks(a_body):
+    """ Yield the blocks of a PHD section.
+
+        Args:
+           a_body: the section body (str, buffer or mmap, see ims_data_parser.iter_sections)
+
+        Returns:
+           a generator of tuples (upper case name, arguments of the # line, offset of the block body, length)
+    """
+    pending = None
+
+    for matched in BLOCK_RE.finditer(a_body):
+
+        if pending is not None:
+            yield (pending.group('name').upper(), pending.group('args').strip(), pending.end(), \
+                   matched.start() - pending.end())
+
+        pending = matched
+
+    if pending is not None:
+        yield (pending.group('name').upper(), pending.group('args').strip(), pending.end(), \
+               len(a_body) - pending.end())
+
+def _lines(a_text, a_block, a_nb_lines):
+    """ return the a_nb_lines first non empty lines of a block split in words """
+    lines = [line.split() for line in a_text.splitlines() if line.strip()]
+
+    if len(lines) < a_nb_lines:
+        raise PHDParseError("The #%s block has %d lines instead of %d" % (a_block, len(lines), a_nb_lines))
+
+    return lines
+
+def _date(a_words, a_block):
+    """ return the datetime of the date and time words """
+    try:
+        return parser_time.imsdate_to_datetime(' '.join(a_words))
+    except parser_time.InvalidDateError:
+        raise PHDParseError("Invalid date %s in the #%s block" % (' '.join(a_words), a_block))
+
+def _float(a_word, a_block):
+    """ return the float of a word """
+    try:
+        return float(a_word)
+    except ValueError:
+        raise PHDParseError("Invalid number %s in the #%s block" % (a_word, a_block))
+
+def _words(a_line, a_nb_words):
+    """ return the a_nb_words first words of a line (None for the missing ones) """
+    return a_line[:a_nb_words] + [None] * (a_nb_words - len(a_line))
+
+def parse_header(a_text):
+    """ Parse a #Header block.
+
+        Args:
+           a_text: the block body (station detector system_type geometry qualifier / sample reference id /
+                   measurement id, detector and gas background ids / transmit date and time)
+
+        Returns:
+           a PHDHeader
+    """
+    lines = _lines(a_text, 'Header', 2)
+
+    (station, detector, system_type, geometry, qualifier) = _words(lines[0], 5)
+    (measurement_id, detector_bk_id, gas_bk_id) = _words(lines[2] if len(lines) > 2 else [], 3)
+
+    transmit_time = _date(lines[3][:2], 'Header') if len(lines) > 3 else None
+
+    return PHDHeader(station, detector, system_type, geometry, qualifier, ' '.join(lines[1]), \
+                     measurement_id, detector_bk_id, gas_bk_id, transmit_time)
+
+def parse_acquisition(a_text):
+    """ Parse an #Acquisition block (start date and time, real time and live time in seconds) """
+    line = _lines(a_text, 'Acquisition', 1)[0]
+
+    if len(line) < 4:
+        raise PHDParseError("The #Acquisition block needs a date, a time, a real time and a live time")
+
+    return PHDAcquisition(_date(line[:2], 'Acquisition'), _float(line[2], 'Acquisition'), \
+                          _float(line[3], 'Acquisition'))
+
+def parse_calibration(a_text):
+    """ Parse a #Calibration block (date and time of the last calibration) """
+    return PHDCalibration(_date(_lines(a_text, 'Calibration', 1)[0][:2], 'Calibration'))
+
+def _numpy_counts(a_text, a_block, a_nb_channels, a_start_channel):
+    """ return the counts of the data lines of a spectrum in a numpy array """
+    counts = numpy.zeros(a_nb_channels, dtype = numpy.int64)
+
+    if not a_text.strip():
+        return counts
+
+    values = numpy.fromstring(a_text, dtype = numpy.int64, sep = ' ')
+    chars  = numpy.frombuffer(a_text, dtype = numpy.uint8)
+    blank  = numpy.in1d(chars, numpy.frombuffer(BLANKS, dtype = numpy.uint8))
+
+    # position of the first character of each word and line of each word
+    starts = numpy.flatnonzero(~blank & numpy.concatenate(([True], blank[:-1])))
+
+    if len(starts) != len(values):
+        raise PHDParseError("The #%s block has a word that is not an integer after %d numbers" % \
+                            (a_block, len(values)))
+
+    lines  = numpy.searchsorted(numpy.flatnonzero(chars == ord('\n')), starts)
+
+    # the first word of a line is the channel of the following counts
+    firsts = numpy.concatenate(([True], lines[1:] != lines[:-1]))
+    owners = numpy.flatnonzero(firsts)[numpy.cumsum(firsts) - 1]
+
+    channels = (values[owners] + numpy.arange(len(values)) - owners - 1)[~firsts] - a_start_channel
+
+    if len(channels) and (channels.min() < 0 or channels.max() >= a_nb_channels):
+        raise PHDParseError("The #%s block has counts out of the %d channels" % (a_block, a_nb_channels))
+
+    counts[channels] = values[~firsts]
+
+    return counts
+
+def _array_counts(a_text, a_block, a_nb_channels, a_start_channel):
+    """ return the counts of the data lines of a spectrum in an array.array (used without numpy) """
+    counts = array.array('l', [0]) * a_nb_channels
+
+    for line in a_text.splitlines():
+        try:
+            numbers = [int(word) for word in line.split()]
+        except ValueError:
+            raise PHDParseError("The #%s block has a word that is not an integer in %r" % (a_block, line))
+
+        if not numbers:
+            continue
+
+        first = numbers[0] - a_start_channel
+
+        if first < 0 or first + len(numbers) - 1 > a_nb_channels:
+            raise PHDParseError("The #%s block has counts out of the %d channels" % (a_block, a_nb_channels))
+
+        counts[first:first + len(numbers) - 1] = array.array('l', numbers[1:])
+
+    return counts
+
+def parse_spectrum(a_text, a_block = 'g_Spectrum'):
+    """ Parse a #g_Spectrum or #b_Spectrum block.
+
+        Args:
+           a_text : the block body: a line "nb_channels energy_span [start_channel]" then lines starting with
+                    the channel of their first count
+           a_block: name of the block (for the error messages)
+
+        Returns:
+           a PHDSpectrum whose counts are a numpy int64 array (an array.array if numpy is not installed)
+    """
+    text = str(a_text)
+    cut  = text.find('\n')
+
+    (first_line, data) = (text, '') if cut < 0 else (text[:cut], text[cut + 1:])
+
+    words = first_line.split()
+
+    try:
+        nb_channels   = int(words[0])
+        energy_span   = float(words[1]) if len(words) > 1 else None
+        start_channel = int(words[2]) if len(words) > 2 else 0
+    except (ValueError, IndexError):
+        raise PHDParseError("Invalid first line %r of the #%s block" % (first_line, a_block))
+
+    if numpy is not None:
+        counts = _numpy_counts(data, a_block, nb_channels, start_channel)
+    else:
+        counts = _array_counts(data, a_block, nb_channels, start_channel)
+
+    return PHDSpectrum(nb_channels, energy_span, start_channel, counts)
+
+# parsers of the typed blocks
+BLOCK_PARSERS = { 'HEADER'      : parse_header,
+                  'ACQUISITION' : parse_acquisition,
+                  'CALIBRATION' : parse_calibration,
+                }
+
+def parse_phd(a_body, a_blocks = None):
+    """ Parse the blocks of a PHD section.
+
+        Args:
+           a_body  : the section body (str, buffer or mmap)
+           a_blocks: upper case names of the blocks to parse (all the typed and spectrum blocks if None)
+
+        Returns:
+           a dictionary with a HEADER, ACQUISITION, CALIBRATION, G_SPECTRUM and B_SPECTRUM entry for each
+           parsed block and BLOCKS: dictionary of the (offset, length) of all the block bodies
+    """
+    result = { 'BLOCKS' : {} }
+
+    for (name, _, offset, length) in iter_blocks(a_body):
+
+        result['BLOCKS'][name] = (offset, length)
+
+        if a_blocks is not None and name not in a_blocks:
+            continue
+
+        if name in BLOCK_PARSERS:
+            result[name] = BLOCK_PARSERS[name](str(buffer(a_body, offset, length)))
+        elif name in SPECTRUM_BLOCKS:
+            result[name] = parse_spectrum(buffer(a_body, offset, length), name)
+
+    return result
+
+def iter_phd_sections(a_data, a_start = 0, a_blocks = None):
+    """ Yield the parsed PHD sections of a data message.
+
+        Args:
+           a_data  : the message data (string or mmap, see ims_data_parser.DataMessageReader)
+           a_start : offset of the body in a_data
+           a_blocks: see parse_phd
+
+        Returns:
+           a generator of (DATA_TYPE, parse_phd result) for the sections of PHD_DATA_TYPES
+    """
+    for section in ims_data_parser.iter_sections(a_data, a_start):
+        if section.type in PHD_DATA_TYPES:
+            yield (section.type, parse_phd(section.body, a_blocks))
@@ -0,0 +1,99 @@
+'''
+Created on Oct 19, 2026
+
+'''
+
+# unit tests part
+import unittest
+import datetime
+
+import numpy
+
+import nms_common.parser.ims20_language.ims_phd_parser as ims_phd_parser
+from nms_common.parser.ims20_language.ims_message_parser import IMSParser
+
+
+def tests():
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestPHDParser)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+
+def spectrum_lines(a_counts, a_per_line, a_start_channel = 0):
+    """ return the data lines of a spectrum block """
+    return ''.join(['%d %s\n' % (a_start_channel + index, ' '.join(['%d' % (count) for count in \
+                                                                     a_counts[index:index + a_per_line]])) \
+                    for index in xrange(0, len(a_counts), a_per_line)])
+
+
+class TestPHDParser(unittest.TestCase):
+
+    HEADER = "#Header 3\nCAX05 CAX05_001 G 22.5cm3_cylindrical FULL\nCAX05-2003/06/26-00:00:00\n" \
+             "CAX05-2003/06/26-11:12:00 CAX05-2003/06/20-00:00:00 0\n2003/06/27 08:13:10.0\n" \
+             "#Comment\nfree text\n#Acquisition\n2003/06/26 11:12:00.0 86400.5 86300.25\n" \
+             "#Calibration\n2003/01/01 00:00:00\n"
+
+    def setUp(self):
+        self._random = numpy.random.RandomState(7)
+
+    def test_phd_message(self):
+        """ the typed blocks and the spectra of a data message are parsed """
+
+        g_counts = self._random.randint(0, 5000, 8192)
+        b_counts = self._random.randint(0, 50, 256)
+
+        message = "BEGIN IMS2.0\nMSG_TYPE data\nMSG_ID 1 ctbto\nDATA_TYPE SAMPLEPHD\n%s#g_Spectrum\n8192 2700\n%s" \
+                  "#b_Spectrum\n256 750 1\n%sSTOP\n" % (self.HEADER, spectrum_lines(g_counts, 5), \
+                                                     spectrum_lines(b_counts, 7, 1))
+
+        parsed   = IMSParser().parse_str(message)
+        self.assertEqual(parsed['DATASECTIONS'][0]['TYPE'], 'SAMPLEPHD')
+
+        sections = list(ims_phd_parser.iter_phd_sections(message, message.find('DATA_TYPE')))
+
+        self.assertEqual(len(sections), 1)
+
+        (data_type, phd) = sections[0]
+
+        self.assertEqual(data_type, 'SAMPLEPHD')
+        self.assertEqual(sorted(phd['BLOCKS']), ['ACQUISITION', 'B_SPECTRUM', 'CALIBRATION', 'COMMENT', \
+                                                 'G_SPECTRUM', 'HEADER'])
+
+        header = phd['HEADER']
+        self.assertEqual((header.station, header.system_type, header.gas_bk_id), ('CAX05', 'G', '0'))
+        self.assertEqual(header.transmit_time.replace(tzinfo = None), datetime.datetime(2003, 6, 27, 8, 13, 10))
+
+        self.assertEqual((phd['ACQUISITION'].real_time, phd['ACQUISITION'].live_time), (86400.5, 86300.25))
+        self.assertEqual(phd['CALIBRATION'].date.year, 2003)
+
+        self.assertEqual(phd['G_SPECTRUM'][:3], (8192, 2700.0, 0))
+        self.assertTrue(numpy.array_equal(phd['G_SPECTRUM'].counts, g_counts))
+        self.assertEqual(phd['B_SPECTRUM'][:3], (256, 750.0, 1))
+        self.assertTrue(numpy.array_equal(phd['B_SPECTRUM'].counts, b_counts))
+
+        # only the requested blocks are parsed
+        phd = ims_phd_parser.parse_phd(message, ['HEADER'])
+        self.assertEqual(sorted([key for key in phd if key != 'BLOCKS']), ['HEADER'])
+
+    def test_spectrum_errors_and_fallback(self):
+        """ the invalid spectra are rejected and the parsing without numpy gives the same counts """
+
+        counts = self._random.randint(0, 100, 30)
+        block  = '30 1000\n' + spectrum_lines(counts, 4)
+
+        self.assertRaises(ims_phd_parser.PHDParseError, ims_phd_parser.parse_spectrum, '20 1000\n' + block[8:])
+        self.assertRaises(ims_phd_parser.PHDParseError, ims_phd_parser.parse_spectrum, block + '28 1 x\n')
+        self.assertRaises(ims_phd_parser.PHDParseError, ims_phd_parser.parse_spectrum, 'many channels\n')
+        self.assertRaises(ims_phd_parser.PHDParseError, ims_phd_parser.parse_acquisition, '2003/06/26 86400\n')
+
+        saved = ims_phd_parser.numpy
+        try:
+            ims_phd_parser.numpy = None
+            spectrum = ims_phd_parser.parse_spectrum(block)
+        finally:
+            ims_phd_parser.numpy = saved
+
+        self.assertEqual(list(spectrum.counts), list(counts))
+        self.assertTrue(numpy.array_equal(ims_phd_parser.parse_spectrum(block).counts, counts))
+
+if __name__ == '__main__':
+    tests()
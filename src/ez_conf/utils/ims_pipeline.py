@@ -0,0 +1,277 @@
+'''
+Created on Oct 19, 2026
+
+Parse and validate all the messages contained in spool files or directories with a pool of worker processes.
+
+The parser and the validators are created and warmed up in the parent before the pool is forked so that
+the workers share the grammar objects copy-on-write. The parent collects just before the fork so the inherited
+objects are all in the oldest generation, and the workers never run a full collection (gc.freeze where it exists,
+otherwise an unreachable threshold on the oldest generation): the young collections do not write in the
+headers of the inherited objects so their pages stay shared.
+A reader thread prefetches the messages while the workers parse and the results are returned in input order
+with a bounded number of messages in flight. The reader thread stops when the results generator is closed.
+The spool index files are only used when an index directory is given: the input directories are never written.
+'''
+import gc
+import os
+import sys
+import threading
+import Queue
+import multiprocessing
+from collections import deque, namedtuple
+from optparse import OptionParser
+
+from nms_common.parser.ims20_language.ims_message_parser import IMSParser
+import nms_common.parser.ims20_language.ims_spool as ims_spool
+
+# result of the processing of one message. result is the validated request dictionary when ok is True
+# and the error message otherwise
+PipelineResult = namedtuple('PipelineResult', 'path offset length msg_id ok result')
+
+# messages used to exercise the grammar and validators before forking
+WARM_UP_MESSAGES = [ "BEGIN IMS2.0\nMSG_TYPE request\nMSG_ID warmup any_ndc\nE-MAIL warm.up@example.com\n"
+                     "TIME 2009/01/01 to 2009/01/02\nSTA_LIST ARCES\nWAVEFORM IMS2.0\nSTOP\n",
+                     "BEGIN IMS2.0\nMSG_TYPE request\nMSG_ID warmup any_ndc\nE-MAIL warm.up@example.com\n"
+                     "TIME 2009/01/01 to 2009/01/02\nLAT -10 to 10\nLON -10 to 10\nMAG 3.5 to 5.0\nMAG_TYPE mb\nBULL_TYPE reb\nBULLETIN IMS2.0\nSTOP\n",
+                     "BEGIN IMS2.0\nMSG_TYPE subscription\nMSG_ID warmup any_ndc\nE-MAIL warm.up@example.com\n"
+                     "FREQ DAILY\nBULL_TYPE reb\nBULLETIN IMS2.0\nSTOP\n",
+                   ]
+
+# end of input marker put in the prefetch queue
+_END_OF_INPUT = None
+
+# parser of the current process. Created by warm_up before the fork
+_WORKER_PARSER = None
+
+# threshold of the oldest generation in the workers: never reached so the inherited objects are never traversed
+OLD_GENERATION_THRESHOLD = 1 << 30
+
+# seconds between two checks of the stop event by a blocked reader thread
+PUT_TIMEOUT = 0.1
+
+def warm_up():
+    """ Create the parser of the current process and run it on the warm up messages """
+    global _WORKER_PARSER #pylint: disable-msg=W0603
+
+    if _WORKER_PARSER is not None:
+        return
+
+    _WORKER_PARSER = IMSParser()
+
+    for message in WARM_UP_MESSAGES:
+        try:
+            _WORKER_PARSER.parse_and_validate_str(message)
+        except Exception: #pylint: disable-msg=W0703
+            # the warm up is only an optimization
+            pass
+
+def init_worker():
+    """ Pool initializer: warm up (when not inherited) and keep the collector away from the inherited objects """
+    warm_up()
+
+    freeze = getattr(gc, 'freeze', None)
+
+    if freeze:
+        # python >= 3.7
+        freeze()
+    else:
+        (young, middle, _) = gc.get_threshold()
+        gc.set_threshold(young, middle, OLD_GENERATION_THRESHOLD)
+
+def process_message(a_job):
+    """ Parse and validate one message with the process parser.
+
+        Args:
+           a_job: a tuple (path, span, message string)
+
+        Returns:
+           a PipelineResult
+    """
+    (path, span, message) = a_job
+
+    warm_up()
+
+    try:
+        (_, result) = _WORKER_PARSER.parse_and_validate_str(message)
+        ok          = True
+    except Exception, err: #pylint: disable-msg=W0703
+        # send the message back: some exceptions cannot be pickled
+        result      = getattr(err, 'message', None) or str(err)
+        ok          = False
+
+    return PipelineResult(path, span[ims_spool.OFFSET], span[ims_spool.LENGTH], span[ims_spool.MSG_ID], ok, result)
+
+def expand_paths(a_paths):
+    """ Replace the directories by the spool files they contain (sorted by name). Index and hidden files are ignored.
+
+        Args:
+           a_paths: list of files and directories
+
+        Returns:
+           a list of file paths
+    """
+    files = []
+
+    for path in a_paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                full_path = os.path.join(path, name)
+                if not name.startswith('.') and not name.endswith(ims_spool.INDEX_SUFFIX) and os.path.isfile(full_path):
+                    files.append(full_path)
+        else:
+            files.append(path)
+
+    return files
+
+class IMSPipeline(object):
+    """
+       Parse and validate the messages of spool files with a pool of processes.
+    """
+
+    def __init__(self, a_processes = None, a_max_in_flight = None, a_prefetch = 256, a_index_dir = None):
+        """ constructor
+
+            Args:
+               a_processes    : number of worker processes (default number of cpus). With 1 the messages are
+                                processed in the current process
+               a_max_in_flight: max number of messages sent to the workers and not yet returned (default 4 per process)
+               a_prefetch     : max number of messages read in advance by the reader thread
+               a_index_dir    : directory where the spool index files are read and written (default no index)
+        """
+        self._processes     = a_processes if a_processes else multiprocessing.cpu_count()
+        self._max_in_flight = a_max_in_flight if a_max_in_flight else 4 * self._processes
+        self._prefetch      = a_prefetch
+        self._index_dir     = a_index_dir
+
+    @classmethod
+    def _put(cls, a_queue, a_item, a_stop):
+        """ put an item in the queue unless the stop event is set. Return False if stopped """
+        while not a_stop.is_set():
+            try:
+                a_queue.put(a_item, True, PUT_TIMEOUT)
+                return True
+            except Queue.Full:
+                pass
+
+        return False
+
+    def _read_jobs(self, a_files, a_queue, a_errors, a_stop):
+        """ reader thread: put the (path, span, message) jobs in the queue until the end or the stop event """
+        try:
+            for path in a_files:
+                for (span, message) in ims_spool.iter_messages(path, bool(self._index_dir), self._index_dir):
+                    if not self._put(a_queue, (path, span, message), a_stop):
+                        return
+        except Exception, err: #pylint: disable-msg=W0703
+            a_errors.append(err)
+
+        self._put(a_queue, _END_OF_INPUT, a_stop)
+
+    def _iter_jobs(self, a_files):
+        """ return a generator of jobs prefetched by a reader thread """
+        jobs_queue = Queue.Queue(self._prefetch)
+        errors     = []
+        stop       = threading.Event()
+
+        reader = threading.Thread(target = self._read_jobs, args = (a_files, jobs_queue, errors, stop))
+        reader.setDaemon(True)
+        reader.start()
+
+        try:
+            while True:
+                job = jobs_queue.get()
+
+                if job is _END_OF_INPUT:
+                    break
+
+                yield job
+        finally:
+            # the generator is closed when the results are abandoned: release a blocked reader
+            stop.set()
+            reader.join()
+
+        if errors:
+            raise errors[0]
+
+    def run(self, a_paths):
+        """ Parse and validate the messages of the given spool files and directories.
+
+            Args:
+               a_paths: list of spool files and directories
+
+            Returns:
+               a generator of PipelineResult in the order of the messages in the files
+        """
+        files = expand_paths(a_paths)
+
+        # warm up in the parent so that the forked workers inherit a ready parser
+        warm_up()
+
+        if self._processes <= 1:
+            for job in self._iter_jobs(files):
+                yield process_message(job)
+            return
+
+        # fork before starting the reader thread, with all the parent objects in the oldest generation
+        gc.collect()
+        pool = multiprocessing.Pool(self._processes, init_worker)
+
+        try:
+            in_flight = deque()
+
+            for job in self._iter_jobs(files):
+
+                # backpressure: wait for the oldest message
+                if len(in_flight) >= self._max_in_flight:
+                    yield in_flight.popleft().get()
+
+                in_flight.append(pool.apply_async(process_message, (job,)))
+
+            while in_flight:
+                yield in_flight.popleft().get()
+
+            pool.close()
+        finally:
+            pool.terminate()
+            pool.join()
+
+def main(a_args = None):
+    """ command line entry point. Print one line per message and return the number of failed messages """
+    parser = OptionParser(usage = "%prog [options] spool_file_or_dir ...")
+
+    parser.add_option("-j", "--processes", type = "int", dest = "processes", default = None,
+                      help = "number of worker processes (default: number of cpus)")
+    parser.add_option("-i", "--max-in-flight", type = "int", dest = "max_in_flight", default = None,
+                      help = "max number of messages being processed (default: 4 per process)")
+    parser.add_option("-p", "--prefetch", type = "int", dest = "prefetch", default = 256,
+                      help = "number of messages read in advance (default: %default)")
+    parser.add_option("-x", "--index-dir", dest = "index_dir", default = None,
+                      help = "directory where the spool index files are kept (default: no index)")
+    parser.add_option("-q", "--quiet", action = "store_true", dest = "quiet", default = False,
+                      help = "only print the failed messages")
+
+    (options, paths) = parser.parse_args(a_args)
+
+    if not paths:
+        parser.error("no spool file or directory given")
+
+    pipeline = IMSPipeline(options.processes, options.max_in_flight, options.prefetch, options.index_dir)
+
+    nb_messages, nb_failed = 0, 0
+
+    for res in pipeline.run(paths):
+        nb_messages += 1
+
+        if res.ok:
+            if not options.quiet:
+                print "%s\t%d\t%s\tOK\t%s" % (res.path, res.offset, res.msg_id, res.result['MSGINFO']['TYPE'])
+        else:
+            nb_failed += 1
+            print "%s\t%d\t%s\tERROR\t%s" % (res.path, res.offset, res.msg_id, str(res.result).replace('\n', ' '))
+
+    print >> sys.stderr, "%d messages processed, %d failed" % (nb_messages, nb_failed)
+
+    return nb_failed
+
+if __name__ == '__main__':
+    sys.exit(1 if main() else 0)
@@ -0,0 +1,115 @@
+'''
+Created on Oct 19, 2026
+
+'''
+
+# unit tests part
+import unittest
+import os
+import shutil
+import tempfile
+
+import nms_common.parser.ims20_language.ims_spool as ims_spool
+from nms_common.parser.ims20_language.ims_pipeline import IMSPipeline, expand_paths
+from nms_common.parser.ims20_language.ims_message_parser import IMSParser
+
+
+def tests():
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestIMSPipeline)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+
+REQUEST = "BEGIN IMS2.0\nMSG_TYPE request\nMSG_ID %s any_ndc\nE-MAIL foo@bar.com\n" \
+          "TIME 2009/01/01 to 2009/01/02\nSTA_LIST ARCES\nWAVEFORM IMS2.0\nSTOP\n"
+
+# the LAT range is not a number
+BAD_REQUEST = REQUEST.replace('STA_LIST ARCES\n', 'STA_LIST ARCES\nLAT 10 to abc\n')
+
+
+class TestIMSPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self._dir       = tempfile.mkdtemp()
+        self._spool_dir = os.path.join(self._dir, 'spool')
+        self._index_dir = os.path.join(self._dir, 'index')
+
+        os.mkdir(self._spool_dir)
+        os.mkdir(self._index_dir)
+
+        self._write('a.txt', REQUEST % ('1') + BAD_REQUEST % ('2') + REQUEST % ('3'))
+        self._write('b.txt', REQUEST % ('4'))
+        self._write('.hidden', REQUEST % ('5'))
+
+    def tearDown(self):
+        shutil.rmtree(self._dir)
+
+    def _write(self, a_name, a_data):
+        """ write a spool file """
+        the_file = open(os.path.join(self._spool_dir, a_name), 'wb')
+        try:
+            the_file.write(a_data)
+        finally:
+            the_file.close()
+
+    def _run(self, a_pipeline):
+        """ return the (file name, offset, msg_id, ok) of the results and the results """
+        results = list(a_pipeline.run([self._spool_dir]))
+
+        return ([(os.path.basename(res.path), res.offset, res.msg_id, res.ok) for res in results], results)
+
+    def test_run_results(self):
+        """ the results are returned in input order with the validated requests or the error messages """
+
+        second = len(REQUEST % ('1'))
+        third  = second + len(BAD_REQUEST % ('2'))
+
+        expected = [('a.txt', 0, '1', True), ('a.txt', second, '2', False), ('a.txt', third, '3', True),
+                    ('b.txt', 0, '4', True)]
+
+        (_, validated) = IMSParser().parse_and_validate_str(REQUEST % ('1'))
+
+        for processes in (1, 2):
+            (summary, results) = self._run(IMSPipeline(processes, a_max_in_flight = 1, a_prefetch = 1))
+
+            self.assertEqual(summary, expected, processes)
+            self.assertEqual(results[0].result, validated)
+            self.assertEqual(results[0].length, second)
+            self.assertTrue(results[1].result.startswith('Error[line=7,pos=10]'), results[1].result)
+
+        # the spool directory is not written without index directory
+        self.assertEqual(sorted(os.listdir(self._spool_dir)), ['.hidden', 'a.txt', 'b.txt'])
+
+        (summary, _) = self._run(IMSPipeline(1, a_index_dir = self._index_dir))
+
+        self.assertEqual(summary, expected)
+        self.assertEqual(sorted(os.listdir(self._spool_dir)), ['.hidden', 'a.txt', 'b.txt'])
+        self.assertEqual(sorted(os.listdir(self._index_dir)), \
+                         sorted([os.path.basename(ims_spool.index_path(os.path.join(self._spool_dir, name), \
+                                                                       self._index_dir)) \
+                                 for name in ('a.txt', 'b.txt')]))
+
+        # the indexes are read back
+        self.assertEqual(self._run(IMSPipeline(1, a_index_dir = self._index_dir))[0], expected)
+
+    def test_expand_paths(self):
+        """ the directories are replaced by their spool files, without the hidden and index files """
+
+        self._write('c.txt' + ims_spool.INDEX_SUFFIX, '')
+        os.mkdir(os.path.join(self._spool_dir, 'sub'))
+
+        path = os.path.join(self._dir, 'single.txt')
+
+        self.assertEqual(expand_paths([self._spool_dir, path]), \
+                         [os.path.join(self._spool_dir, 'a.txt'), os.path.join(self._spool_dir, 'b.txt'), path])
+
+    def test_abandoned_results(self):
+        """ closing the results generator stops the reader thread """
+
+        results = IMSPipeline(1, a_prefetch = 1).run([self._spool_dir])
+
+        self.assertEqual(results.next().msg_id, '1')
+
+        results.close()
+
+if __name__ == '__main__':
+    tests()
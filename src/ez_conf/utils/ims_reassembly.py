@@ -0,0 +1,281 @@
+'''
+Created on Oct 19, 2026
+
+Reassembly of the messages sent in several parts (REF_ID ref_str [ref_src] PART seq_num OF tot_num).
+
+The parts are accepted in any order. Only the header of a part is parsed (IMSParser.parse_header) to get its
+REF_ID, the body of the part (between the header and the final STOP line) is appended to a spooled
+temporary file of its group: it stays in memory while the group is small and is moved to disk past a_spill_size
+or when the whole buffer holds more than a_memory_limit bytes in memory.
+When all the parts of a group are there, the header of the first part (without the PART clause of its REF_ID),
+the bodies in seq_num order and a STOP line are copied in a new spooled file returned as a readline-iterable
+stream that can be given to the parser.
+The incomplete groups are dropped after a_timeout seconds.
+'''
+import re
+import StringIO
+import tempfile
+import time
+
+from nms_common.parser.ims20_language.ims_message_parser import IMSParser
+
+# size of the blocks copied when a group is joined
+COPY_BLOCK_SIZE = 1 << 16
+
+STOP_RE         = re.compile(r'^[ \t]*STOP[ \t]*\r?$', re.MULTILINE | re.IGNORECASE)
+
+# PART seq_num [OF tot_num] clause at the end of the REF_ID line
+PART_CLAUSE_RE  = re.compile(r'^([ \t]*REF_ID[ \t][^\n]*?)[ \t]+PART[ \t]+\S+(?:[ \t]+OF[ \t]+\S+)?([ \t]*\r?)$', \
+                             re.MULTILINE | re.IGNORECASE)
+
+class ReassemblyError(Exception):
+    """ Part that cannot be reassembled """
+
+    def __init__(self, a_msg):
+        super(ReassemblyError, self).__init__(a_msg)
+
+class MessageStream(object):
+    """
+       Read-only stream of a reassembled message. The iteration reads the lines with readline so tell()
+       stays exact while iterating (as needed by the tokenizer).
+    """
+
+    def __init__(self, a_file, a_key = None, a_nb_parts = 1):
+        """ constructor
+
+            Args:
+               a_file    : file-like object positioned at the beginning of the message
+               a_key     : (ref_str, ref_src) of the reassembled group
+               a_nb_parts: number of parts joined
+        """
+        self._file    = a_file
+        self.key      = a_key
+        self.nb_parts = a_nb_parts
+
+    def __iter__(self):
+        return self
+
+    def next(self):
+        """ return the next line """
+        line = self._file.readline()
+
+        if not line:
+            raise StopIteration
+
+        return line
+
+    def read(self, a_size = -1):
+        return self._file.read(a_size)
+
+    def readline(self, a_size = -1):
+        return self._file.readline(a_size)
+
+    def seek(self, a_pos, a_whence = 0):
+        self._file.seek(a_pos, a_whence)
+
+    def tell(self):
+        return self._file.tell()
+
+    def getvalue(self):
+        """ return the whole message as a string (reads it in memory) """
+        pos = self._file.tell()
+        self._file.seek(0)
+        value = self._file.read()
+        self._file.seek(pos)
+
+        return value
+
+    def close(self):
+        self._file.close()
+
+class _Group(object):
+    """ parts received for one reference id """
+
+    def __init__(self, a_spill_size, a_tmp_dir, a_now):
+        self.file     = tempfile.SpooledTemporaryFile(a_spill_size, dir = a_tmp_dir)
+        self.size     = 0
+        self.memory   = 0
+        self.first    = a_now
+        self.total    = None
+        self.header   = None
+
+        # seq_num -> (offset, length) in file
+        self.segments = {}
+
+class ReassemblyBuffer(object):
+    """
+       Buffer of the incomplete multi-part messages.
+    """
+
+    def __init__(self, a_spill_size = 1 << 20, a_memory_limit = 64 << 20, a_timeout = 24 * 3600, \
+                 a_tmp_dir = None, a_clock = None):
+        """ constructor
+
+            Args:
+               a_spill_size  : a group larger than that is moved to disk
+               a_memory_limit: max number of bytes of the groups kept in memory (the largest groups are moved to disk)
+               a_timeout     : an incomplete group is dropped after a_timeout seconds
+               a_tmp_dir     : directory of the spill files (default tempfile directory)
+               a_clock       : function returning the current time in seconds (time.time by default)
+        """
+        self._spill_size   = a_spill_size
+        self._memory_limit = a_memory_limit
+        self._timeout      = a_timeout
+        self._tmp_dir      = a_tmp_dir
+        self._clock        = a_clock or time.time
+
+        self._parser       = IMSParser()
+
+        # (ref_str, ref_src) -> _Group
+        self._groups       = {}
+
+        # bytes of the groups still in memory
+        self._memory       = 0
+
+    def __len__(self):
+        """ return the number of incomplete groups """
+        return len(self._groups)
+
+    @property
+    def memory(self):
+        """ number of bytes of the incomplete groups held in memory """
+        return self._memory
+
+    def _spill(self, a_group):
+        """ move a group to disk """
+        a_group.file.rollover()
+        self._memory -= a_group.memory
+        a_group.memory = 0
+
+    def _discard(self, a_key):
+        """ forget a group and free its file """
+        group = self._groups.pop(a_key)
+        self._memory -= group.memory
+        group.file.close()
+
+        return group
+
+    def _join(self, a_key):
+        """ copy the header, the bodies and a STOP line of a complete group in a new stream """
+        group  = self._groups[a_key]
+        output = tempfile.SpooledTemporaryFile(self._spill_size, dir = self._tmp_dir)
+
+        try:
+            # the joined message is not a part anymore
+            output.write(PART_CLAUSE_RE.sub(r'\1\2', group.header, 1))
+
+            for seq_num in sorted(group.segments):
+                (offset, length) = group.segments[seq_num]
+                group.file.seek(offset)
+
+                while length > 0:
+                    block = group.file.read(min(length, COPY_BLOCK_SIZE))
+                    if not block:
+                        raise ReassemblyError("The part %d of %s has been truncated" % (seq_num, a_key))
+                    output.write(block)
+                    length -= len(block)
+
+            output.write('STOP\n')
+            output.seek(0)
+        finally:
+            self._discard(a_key)
+
+        return MessageStream(output, a_key, len(group.segments))
+
+    def expire(self, a_now = None):
+        """ Drop the incomplete groups older than the timeout.
+
+            Args:
+               a_now: current time (the clock by default)
+
+            Returns:
+               the list of (key, received seq_nums, tot_num) of the dropped groups
+        """
+        now     = self._clock() if a_now is None else a_now
+        expired = []
+
+        for (key, group) in self._groups.items():
+            if now - group.first >= self._timeout:
+                self._discard(key)
+                expired.append((key, sorted(group.segments), group.total))
+
+        return expired
+
+    def add_part(self, a_message):
+        """ Add a received message.
+
+            Args:
+               a_message: the message string
+
+            Returns:
+               a MessageStream of the whole message when it is complete (immediately for a message without
+               PART), None while parts are missing
+
+            Raises:
+               exception ParsingError if the header of the message is not well formatted
+               exception ReassemblyError if the part numbers are not valid
+        """
+        (header, body_offset, _) = self._parser.parse_header(a_message)
+
+        ref_id = header['MSGINFO'].get('REFID', None)
+
+        if not ref_id or 'SEQNUM' not in ref_id:
+            return MessageStream(StringIO.StringIO(a_message))
+
+        try:
+            seq_num = int(ref_id['SEQNUM'])
+            total   = int(ref_id['TOTNUM']) if 'TOTNUM' in ref_id else None
+        except ValueError:
+            raise ReassemblyError("Invalid part numbers in the ref_id %s" % (ref_id))
+
+        key = (ref_id['REFSTR'].upper(), ref_id.get('REFSRC', '').upper() or None)
+
+        self.expire()
+
+        group = self._groups.get(key, None)
+
+        if group is None:
+            group = self._groups[key] = _Group(self._spill_size, self._tmp_dir, self._clock())
+
+        if total is not None:
+            if group.total is not None and group.total != total:
+                raise ReassemblyError("The part %d of %s announces %d parts instead of %d" % \
+                                      (seq_num, key, total, group.total))
+            group.total = total
+
+        if seq_num < 1 or (group.total is not None and seq_num > group.total):
+            raise ReassemblyError("Invalid part %d of %s for %s" % (seq_num, group.total, key))
+
+        # duplicated part: keep the first one
+        if seq_num not in group.segments:
+
+            stops    = [matched.start() for matched in STOP_RE.finditer(a_message, body_offset)]
+            body_end = stops[-1] if stops else len(a_message)
+            body     = a_message[body_offset:body_end]
+
+            if body and not body.endswith('\n'):
+                body += '\n'
+
+            if seq_num == 1:
+                group.header = a_message[:body_offset]
+
+            group.file.seek(group.size)
+            group.file.write(body)
+            group.segments[seq_num] = (group.size, len(body))
+            group.size += len(body)
+
+            if group.size > self._spill_size:
+                # rolled over by the spooled file
+                self._memory -= group.memory
+                group.memory = 0
+            else:
+                group.memory += len(body)
+                self._memory += len(body)
+
+            while self._memory > self._memory_limit:
+                self._spill(max([grp for grp in self._groups.values() if grp.memory], key = lambda grp: grp.memory))
+
+        if group.total is not None and len(group.segments) == group.total:
+            return self._join(key)
+
+        return None
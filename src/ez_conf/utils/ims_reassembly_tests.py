@@ -0,0 +1,160 @@
+'''
+Created on Oct 19, 2026
+
+'''
+
+# unit tests part
+import unittest
+import os
+import shutil
+import tempfile
+
+import nms_common.parser.ims20_language.ims_reassembly as ims_reassembly
+import nms_common.parser.ims20_language.ims_message_writer as ims_message_writer
+from nms_common.parser.ims20_language.ims_message_parser import IMSParser
+
+
+def tests():
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestReassembly)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+
+class SimulatedClock(object):
+    """ clock moved by the tests """
+
+    def __init__(self, a_now):
+        self.now = a_now
+
+    def __call__(self):
+        return self.now
+
+
+class TestReassembly(unittest.TestCase):
+
+    BODIES = [ "TIME 2009/01/01 to 2009/01/02 12:00\n",
+               "STA_LIST ARCES, FINES\nCHAN_LIST SHZ, BH*\n",
+               "WAVEFORM IMS2.0\n",
+             ]
+
+    WHOLE = """BEGIN IMS2.0
+MSG_TYPE request
+MSG_ID 1 any_ndc
+E-MAIL foo.bar@gmail.com
+TIME 2009/01/01 to 2009/01/02 12:00
+STA_LIST ARCES, FINES
+CHAN_LIST SHZ, BH*
+WAVEFORM IMS2.0
+STOP
+"""
+
+    @classmethod
+    def part(cls, a_seq_num, a_total = 3, a_ref = 'big_req'):
+        """ return the part a_seq_num of the message """
+        return "BEGIN IMS2.0\nMSG_TYPE request\nMSG_ID %d any_ndc\nREF_ID %s ctbto PART %d OF %d\n" \
+               "E-MAIL foo.bar@gmail.com\n%sSTOP\n" % (a_seq_num, a_ref, a_seq_num, a_total, cls.BODIES[a_seq_num - 1])
+
+    def setUp(self):
+        self.clock  = SimulatedClock(1000.0)
+        self.buffer = ims_reassembly.ReassemblyBuffer(a_spill_size = 40, a_memory_limit = 60, \
+                                                      a_timeout = 600, a_clock = self.clock)
+
+    def test_parts_in_any_order(self):
+        """ the parts received in any order (with a duplicate) give the same request as the whole message """
+
+        for seq_num in (3, 1, 3):
+            self.assertEqual(self.buffer.add_part(self.part(seq_num)), None)
+
+        stream = self.buffer.add_part(self.part(2))
+
+        self.assertEqual(stream.nb_parts, 3)
+        self.assertEqual(stream.key, ('BIG_REQ', 'CTBTO'))
+        self.assertEqual(len(self.buffer), 0)
+        self.assertEqual(self.buffer.memory, 0)
+
+        (_, joined) = IMSParser().parse_and_validate(stream)
+        (_, whole)  = IMSParser().parse_and_validate_str(self.WHOLE)
+
+        self.assertEqual(joined['PRODUCTLIST'], whole['PRODUCTLIST'])
+
+        # the joined header keeps the REF_ID without its PART clause
+        self.assertEqual(joined['MSGINFO']['REFID'], { 'REFSTR' : 'big_req', 'REFSRC' : 'ctbto' })
+        self.assertTrue(stream.getvalue().startswith(self.part(1).split('E-MAIL')[0].replace(' PART 1 OF 3', '')))
+
+        # so it is taken as a whole message
+        self.assertEqual(self.buffer.add_part(stream.getvalue()).getvalue(), stream.getvalue())
+        self.assertEqual(len(self.buffer), 0)
+
+        # a message without part is returned as it is
+        self.assertEqual(self.buffer.add_part(self.WHOLE).getvalue(), self.WHOLE)
+
+    def test_memory_bound(self):
+        """ the groups are moved to disk so the memory stays under the limit """
+
+        for ref in xrange(10):
+            self.buffer.add_part(self.part(1, 3, 'req%d' % (ref)))
+            self.assertTrue(self.buffer.memory <= 60)
+
+        self.buffer.add_part(self.part(2, 3, 'req4'))
+
+        stream = self.buffer.add_part(self.part(3, 3, 'req4'))
+
+        self.assertEqual(stream.getvalue().count('\n'), 10)
+        self.assertEqual(len(self.buffer), 9)
+
+    def test_timeout_and_errors(self):
+        """ the incomplete groups expire and the inconsistent parts are rejected """
+
+        self.buffer.add_part(self.part(1))
+
+        self.clock.now += 300
+        self.buffer.add_part(self.part(1, 3, 'other'))
+
+        self.assertRaises(ims_reassembly.ReassemblyError, self.buffer.add_part, self.part(2, 4))
+
+        self.clock.now += 300
+        self.assertEqual(self.buffer.expire(), [(('BIG_REQ', 'CTBTO'), [1], 3)])
+        self.assertEqual(len(self.buffer), 1)
+
+        self.assertRaises(ims_reassembly.ReassemblyError, self.buffer.add_part, \
+                          self.part(1, 3, 'other').replace('PART 1', 'PART 5'))
+
+    def test_writer_round_trip(self):
+        """ the parts written by MultiPartWriter are under the size limit and reassemble to the whole body """
+
+        tmp_dir = tempfile.mkdtemp()
+
+        try:
+            writer = ims_message_writer.MultiPartWriter(lambda seq_num: os.path.join(tmp_dir, 'part%d' % (seq_num)), \
+                                                        300, 42, 'resp42', a_source = 'ctbto', a_ref_src = 'ctbto', \
+                                                        a_header_lines = ['E-MAIL foo.bar@gmail.com'], \
+                                                        a_estimated_parts = 2)
+            writer.begin_section('DATA_TYPE LOG IMS2.0')
+            writer.write_lines(['line %03d of the log' % (index) for index in xrange(40)])
+
+            paths = writer.close()
+            parts = [open(path).read() for path in paths]
+
+            self.assertTrue(len(parts) > 2)
+            self.assertTrue(max([len(part) for part in parts]) <= 300)
+            self.assertTrue(parts[-1].startswith('BEGIN IMS2.0\nMSG_TYPE data\nMSG_ID 42 ctbto\n' \
+                                                 'REF_ID resp42 ctbto PART %d OF %d' % (len(parts), len(parts))))
+            self.assertEqual(len(set([part.find('E-MAIL') for part in parts])), 1)
+
+            stream = None
+            for part in reversed(parts):
+                stream = self.buffer.add_part(part)
+
+            lines = [line for line in stream.getvalue().split('\n') if line.startswith('line ')]
+
+            self.assertEqual(lines, ['line %03d of the log' % (index) for index in xrange(40)])
+            self.assertEqual(stream.getvalue().count('DATA_TYPE LOG'), len(parts))
+
+            (header, _, _) = IMSParser().parse_header(stream.getvalue())
+
+            self.assertEqual(header['MSGINFO']['REFID'], { 'REFSTR' : 'resp42', 'REFSRC' : 'ctbto' })
+            self.assertEqual(stream.getvalue().count('PART'), 0)
+        finally:
+            shutil.rmtree(tmp_dir)
+
+if __name__ == '__main__':
+    tests()
@@ -0,0 +1,181 @@
+'''
+Created on Oct 19, 2026
+
+Content addressed cache of the IMSParser.parse_and_validate results.
+
+The key is the sha1 of the grammar fingerprint, the validation rules version, the station catalog content
+(when a catalog is set) and the message bytes, so a change of the grammar or of the rules never returns a stale result.
+The results are pickled and compressed and kept in a LRU memory tier and optionally in a sqlite database
+shared between processes and restarts.
+'''
+import cPickle
+import hashlib
+import threading
+import zlib
+
+from nms_common.parser.common.lru_cache import LRUCache
+from nms_common.parser.ims20_language.ims_tokenizer import TokenCreator
+from nms_common.parser.ims20_language.ims_semantic_validator import RULES_VERSION, get_station_catalog
+
+# pickle protocol used to serialize the results
+PICKLE_PROTOCOL = 2
+
+# sqlite table holding the results
+DB_TABLE        = 'ims_results'
+
+# fingerprint of the grammar computed on first use
+_GRAMMAR_FINGERPRINT = None
+
+def grammar_fingerprint():
+    """ return a digest of the tokens (name, family and regexpr) and of the rules version """
+    global _GRAMMAR_FINGERPRINT #pylint: disable-msg=W0603
+
+    if _GRAMMAR_FINGERPRINT is None:
+
+        digest    = hashlib.sha1('RULES_VERSION=%s\n' % (RULES_VERSION))
+        tokens_re = TokenCreator.get_tokens_re()
+
+        for name in TokenCreator.get_ordered_tokens_list():
+            digest.update('%s %s %s %s\n' % (name, TokenCreator.get_token_family(name), \
+                                              tokens_re[name].pattern, tokens_re[name].flags))
+
+        _GRAMMAR_FINGERPRINT = digest.hexdigest()
+
+    return _GRAMMAR_FINGERPRINT
+
+class IMSResultCache(object):
+    """
+       Two tiers cache (memory LRU and optional sqlite database) of parse_and_validate results.
+    """
+
+    def __init__(self, a_max_size = 1024, a_db_path = None):
+        """ constructor
+
+            Args:
+               a_max_size: max number of results kept in memory
+               a_db_path : path of the sqlite database. No disk tier if None
+        """
+        self._memory = LRUCache(a_max_size)
+
+        self._db      = None
+        self._db_lock = threading.Lock()
+
+        if a_db_path:
+            # imported here as the disk tier is optional
+            import sqlite3
+
+            self._db = sqlite3.connect(a_db_path, check_same_thread = False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS %s (key TEXT PRIMARY KEY, value BLOB)" % (DB_TABLE))
+            self._db.commit()
+
+        self._disk_hits = 0
+        self._misses    = 0
+
+    @classmethod
+    def make_key(cls, a_message, a_variant = ''):
+        """ return the cache key of a message string
+
+            Args:
+               a_message: the message string
+               a_variant: string identifying the parser options changing the result
+        """
+        if isinstance(a_message, unicode):
+            a_message = a_message.encode('utf-8')
+
+        digest = hashlib.sha1(grammar_fingerprint())
+        digest.update('%s\n' % (a_variant))
+
+        # the validation depends on the station catalog content
+        catalog = get_station_catalog()
+        if catalog is not None:
+            digest.update(catalog.fingerprint)
+
+        digest.update(a_message)
+
+        return digest.hexdigest()
+
+    @classmethod
+    def _dumps(cls, a_value):
+        """ serialize a value """
+        return zlib.compress(cPickle.dumps(a_value, PICKLE_PROTOCOL))
+
+    @classmethod
+    def _loads(cls, a_blob):
+        """ deserialize a value """
+        return cPickle.loads(zlib.decompress(a_blob))
+
+    def get(self, a_key):
+        """ Look for a result in the memory then in the disk tier.
+            A new copy of the result is returned each time so the caller can modify it.
+
+            Args:
+               a_key: key returned by make_key
+
+            Returns:
+               the cached value or None
+        """
+        blob = self._memory.get(a_key)
+
+        if blob is None and self._db is not None:
+            with self._db_lock:
+                row = self._db.execute("SELECT value FROM %s WHERE key = ?" % (DB_TABLE), (a_key,)).fetchone()
+
+            if row is not None:
+                blob = str(row[0])
+                self._disk_hits += 1
+                # promote in the memory tier
+                self._memory.put(a_key, blob)
+
+        if blob is None:
+            self._misses += 1
+            return None
+
+        return self._loads(blob)
+
+    def put(self, a_key, a_value):
+        """ Store a value in the memory and disk tiers.
+
+            Args:
+               a_key  : key returned by make_key
+               a_value: picklable value
+        """
+        blob = self._dumps(a_value)
+
+        self._memory.put(a_key, blob)
+
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("INSERT OR REPLACE INTO %s (key, value) VALUES (?, ?)" % (DB_TABLE), \
+                                 (a_key, buffer(blob)))
+                self._db.commit()
+
+    def clear(self):
+        """ empty both tiers and reset the statistics """
+        self._memory.clear()
+
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM %s" % (DB_TABLE))
+                self._db.commit()
+
+        self._disk_hits = 0
+        self._misses    = 0
+
+    def close(self):
+        """ close the disk tier """
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def stats(self):
+        """ return a dictionary with the hit statistics of the cache """
+        memory_hits = self._memory.hits
+        lookups     = memory_hits + self._disk_hits + self._misses
+
+        return { 'SIZE'        : len(self._memory),
+                 'MAXSIZE'     : self._memory.max_size,
+                 'MEMORY_HITS' : memory_hits,
+                 'DISK_HITS'   : self._disk_hits,
+                 'MISSES'      : self._misses,
+                 'HITRATE'     : (float(memory_hits + self._disk_hits) / lookups) if lookups else 0.0,
+               }
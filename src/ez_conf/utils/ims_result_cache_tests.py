@@ -0,0 +1,71 @@
+'''
+Created on Oct 19, 2026
+
+'''
+
+# unit tests part
+import unittest
+import StringIO
+
+from nms_common.parser.ims20_language.ims_message_parser import IMSParser
+from nms_common.parser.ims20_language.ims_result_cache import IMSResultCache
+
+
+def tests():
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestResultCache)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+
+class TestResultCache(unittest.TestCase):
+
+    WAVEFORM = "BEGIN IMS2.0\nMSG_TYPE request\nMSG_ID 1 any_ndc\nE-MAIL foo.bar@gmail.com\n" \
+               "TIME 2009/01/01 to 2009/01/02\nSTA_LIST ARCES\nWAVEFORM IMS2.0\nSTOP\n"
+
+    BULLETIN = "BEGIN IMS2.0\nMSG_TYPE request\nMSG_ID 2 any_ndc\nE-MAIL foo.bar@gmail.com\n" \
+               "TIME 2009/01/01 to 2009/01/02\nMAG 3.5 to 5.0\nMAG_TYPE mb\nBULL_TYPE reb\nBULLETIN IMS2.0\nSTOP\n"
+
+    def test_repeated_message_in_stream(self):
+        """ a message repeated in a stream hits the cache and the stream is positioned as without cache """
+
+        stream = self.WAVEFORM + self.BULLETIN + self.WAVEFORM + self.BULLETIN
+
+        cache        = IMSResultCache()
+        cached_io    = StringIO.StringIO(stream)
+        uncached_io  = StringIO.StringIO(stream)
+
+        (cached, uncached) = (IMSParser(cache), IMSParser())
+
+        results = []
+
+        for _ in xrange(4):
+            results.append(cached.parse_and_validate(cached_io))
+            uncached.parse_and_validate(uncached_io)
+
+            self.assertEqual(cached_io.tell(), uncached_io.tell())
+
+        self.assertEqual(cached_io.tell(), len(stream))
+        self.assertEqual(results[2], results[0])
+        self.assertEqual(results[3], results[1])
+
+        stats = cache.stats()
+        self.assertEqual((stats['MEMORY_HITS'], stats['MISSES']), (2, 2))
+
+    def test_key_stops_at_stop_line(self):
+        """ the key only depends on the message: what follows its STOP line is not read """
+
+        cache  = IMSResultCache()
+        parser = IMSParser(cache)
+
+        stream = StringIO.StringIO(self.WAVEFORM + self.BULLETIN)
+        parser.parse_and_validate(stream)
+
+        # same message followed by something else
+        stream = StringIO.StringIO(self.WAVEFORM + "BEGIN IMS2.0\ngarbage")
+        (_, result) = parser.parse_and_validate(stream)
+
+        self.assertEqual(cache.stats()['MEMORY_HITS'], 1)
+        self.assertEqual(stream.tell(), len(self.WAVEFORM))
+        self.assertEqual(result, IMSParser().parse_and_validate_str(self.WAVEFORM)[1])
+
+if __name__ == '__main__':
+    tests()
@@ -0,0 +1,192 @@
+'''
+Created on Oct 19, 2026
+
+Spatial index of the GEO boxes produced by LatLonRule (LOC dictionaries of type GEO).
+
+The earth is cut in a uniform grid of cells of a_cell_size degrees. A box is registered in every cell it covers
+so a point query only looks at the boxes of one cell. The very large boxes (more than a_max_cells cells) are
+kept in a separate list checked for every query to not fill the whole grid.
+Longitude ranges with START > END are considered to cross the 180 degrees meridian.
+'''
+import math
+
+import nms_common.parser.common.validator_const as const
+
+START, END = 'START', 'END'
+
+def loc_to_boxes(a_loc):
+    """ Return the boxes of a location.
+
+        Args:
+           a_loc: a validated LOC dictionary of type GEO or a tuple (lat_start, lat_end, lon_start, lon_end)
+
+        Returns:
+           a list of (lat_start, lat_end, lon_start, lon_end) tuples. A box crossing the 180 meridian is cut in two
+    """
+    if isinstance(a_loc, dict):
+        if a_loc.get(const.TYPE_K, None) != 'GEO':
+            raise ValueError("%s is not a GEO location" % (a_loc))
+
+        (lat_start, lat_end) = (float(a_loc[const.LAT_K][START]), float(a_loc[const.LAT_K][END]))
+        (lon_start, lon_end) = (float(a_loc[const.LON_K][START]), float(a_loc[const.LON_K][END]))
+    else:
+        (lat_start, lat_end, lon_start, lon_end) = [float(val) for val in a_loc]
+
+    if lon_start > lon_end:
+        return [(lat_start, lat_end, lon_start, 180.0), (lat_start, lat_end, -180.0, lon_end)]
+
+    return [(lat_start, lat_end, lon_start, lon_end)]
+
+def _box_contains(a_box, a_lat, a_lon):
+    """ True if the point is in the box (borders included) """
+    return a_box[0] <= a_lat <= a_box[1] and a_box[2] <= a_lon <= a_box[3]
+
+def _boxes_intersect(a_box1, a_box2):
+    """ True if the boxes intersect (borders included) """
+    return a_box1[0] <= a_box2[1] and a_box2[0] <= a_box1[1] and a_box1[2] <= a_box2[3] and a_box2[2] <= a_box1[3]
+
+class GeoIndex(object):
+    """
+       Uniform grid index of GEO boxes.
+    """
+
+    def __init__(self, a_cell_size = 10.0, a_max_cells = 64):
+        """ constructor
+
+            Args:
+               a_cell_size: size of the grid cells in degrees
+               a_max_cells: boxes covering more cells are not put in the grid but in the large boxes list
+        """
+        self._cell_size = float(a_cell_size)
+        self._nb_lat    = int(math.ceil(180.0 / self._cell_size))
+        self._nb_lon    = int(math.ceil(360.0 / self._cell_size))
+        self._max_cells = a_max_cells
+
+        # cell -> set of keys
+        self._cells     = {}
+
+        # key -> list of boxes
+        self._boxes     = {}
+
+        # keys of the boxes not in the grid
+        self._large     = set()
+
+    def __len__(self):
+        return len(self._boxes)
+
+    def __contains__(self, a_key):
+        return a_key in self._boxes
+
+    def _cell_range(self, a_box):
+        """ return the (lat, lon) indexes ranges of the cells covered by a box """
+        cell = self._cell_size
+
+        lat_min = min(self._nb_lat - 1, max(0, int((a_box[0] + 90.0) // cell)))
+        lat_max = min(self._nb_lat - 1, max(0, int((a_box[1] + 90.0) // cell)))
+        lon_min = min(self._nb_lon - 1, max(0, int((a_box[2] + 180.0) // cell)))
+        lon_max = min(self._nb_lon - 1, max(0, int((a_box[3] + 180.0) // cell)))
+
+        return (xrange(lat_min, lat_max + 1), xrange(lon_min, lon_max + 1))
+
+    def _cells_of(self, a_boxes):
+        """ return the list of cells covered by a list of boxes """
+        cells = []
+
+        for box in a_boxes:
+            (lat_range, lon_range) = self._cell_range(box)
+            cells.extend([(i, j) for i in lat_range for j in lon_range])
+
+        return cells
+
+    def insert(self, a_key, a_loc):
+        """ Add (or replace) the location of a key.
+
+            Args:
+               a_key: hashable key (subscription id, ...)
+               a_loc: a GEO LOC dictionary or a tuple (lat_start, lat_end, lon_start, lon_end)
+        """
+        if a_key in self._boxes:
+            self.delete(a_key)
+
+        boxes = loc_to_boxes(a_loc)
+        cells = self._cells_of(boxes)
+
+        self._boxes[a_key] = boxes
+
+        if len(cells) > self._max_cells:
+            self._large.add(a_key)
+            return
+
+        for cell in cells:
+            keys = self._cells.get(cell, None)
+            if keys is None:
+                keys = self._cells[cell] = set()
+            keys.add(a_key)
+
+    def delete(self, a_key):
+        """ Remove a key from the index. Do nothing if the key is not indexed """
+        boxes = self._boxes.pop(a_key, None)
+
+        if boxes is None:
+            return
+
+        if a_key in self._large:
+            self._large.discard(a_key)
+            return
+
+        for cell in self._cells_of(boxes):
+            keys = self._cells.get(cell, None)
+            if keys is not None:
+                keys.discard(a_key)
+                if not keys:
+                    del self._cells[cell]
+
+    def _match(self, a_candidates, a_predicate):
+        """ return the candidate keys having a box matching the predicate """
+        boxes = self._boxes
+
+        return set([key for key in a_candidates if [box for box in boxes[key] if a_predicate(box)]])
+
+    def query_point(self, a_lat, a_lon):
+        """ Return the keys whose box contains a point (an event location).
+
+            Args:
+               a_lat: latitude in degrees
+               a_lon: longitude in degrees
+
+            Returns:
+               a set of keys
+        """
+        (lat_range, lon_range) = self._cell_range((a_lat, a_lat, a_lon, a_lon))
+
+        candidates = set(self._large)
+        candidates.update(self._cells.get((lat_range[0], lon_range[0]), ()))
+
+        return self._match(candidates, lambda box: _box_contains(box, a_lat, a_lon))
+
+    def estimate_point(self, a_lat, a_lon):
+        """ return the number of keys tested by query_point for a point """
+        (lat_range, lon_range) = self._cell_range((a_lat, a_lat, a_lon, a_lon))
+
+        return len(self._large) + len(self._cells.get((lat_range[0], lon_range[0]), ()))
+
+    def contains_point(self, a_key, a_lat, a_lon):
+        """ True if a box of the key contains the point (False if the key is not indexed) """
+        return bool([box for box in self._boxes.get(a_key, ()) if _box_contains(box, a_lat, a_lon)])
+
+    def query_box(self, a_loc):
+        """ Return the keys whose box intersects a location.
+
+            Args:
+               a_loc: a GEO LOC dictionary or a tuple (lat_start, lat_end, lon_start, lon_end)
+
+            Returns:
+               a set of keys
+        """
+        boxes      = loc_to_boxes(a_loc)
+        candidates = set(self._large)
+
+        for cell in self._cells_of(boxes):
+            candidates.update(self._cells.get(cell, ()))
+
+        return self._match(candidates, lambda box: [other for other in boxes if _boxes_intersect(box, other)])
@@ -0,0 +1,127 @@
+'''
+Created on Oct 19, 2026
+
+'''
+
+# unit tests part
+import unittest
+import random
+
+from nms_common.parser.ims20_language.ims_spatial_index import GeoIndex
+
+
+def tests():
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestGeoIndex)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+
+def lon_segments(a_start, a_end):
+    """ return the longitude segments of a range (START > END crosses the 180 meridian) """
+    if a_start > a_end:
+        return [(a_start, 180.0), (-180.0, a_end)]
+    return [(a_start, a_end)]
+
+def brute_intersects(a_box1, a_box2):
+    """ True if two (lat_start, lat_end, lon_start, lon_end) boxes intersect (borders included) """
+    if a_box1[0] > a_box2[1] or a_box2[0] > a_box1[1]:
+        return False
+
+    for (start1, end1) in lon_segments(a_box1[2], a_box1[3]):
+        for (start2, end2) in lon_segments(a_box2[2], a_box2[3]):
+            if start1 <= end2 and start2 <= end1:
+                return True
+
+    return False
+
+
+class TestGeoIndex(unittest.TestCase):
+
+    def setUp(self):
+        self._random = random.Random(3)
+
+    def _random_box(self):
+        """ return a random box: small, large, touching a pole or crossing the 180 meridian """
+        rand = self._random
+
+        (lat1, lat2) = sorted([rand.choice(range(-90, 91, 5) + [rand.uniform(-90, 90)]) for _ in xrange(2)])
+        (lon1, lon2) = [rand.choice(range(-180, 181, 5) + [rand.uniform(-180, 180)]) for _ in xrange(2)]
+
+        kind = rand.randint(0, 3)
+
+        if kind == 0:
+            # small box
+            lat2 = min(90.0, lat1 + rand.uniform(0, 3))
+            lon2 = min(180.0, lon1 + rand.uniform(0, 3))
+        elif kind == 1:
+            # polar cap
+            (lat1, lat2) = rand.choice([(lat1, 90.0), (-90.0, lat2)])
+
+        # kind 2 and 3: any order of the longitudes (lon1 > lon2 crosses the 180 meridian)
+        return (float(lat1), float(lat2), float(lon1), float(lon2))
+
+    def _check(self, a_index, a_boxes):
+        """ compare the box and point queries with a brute force scan """
+        for _ in xrange(300):
+            query    = self._random_box()
+            expected = set([key for (key, box) in a_boxes.iteritems() if brute_intersects(box, query)])
+
+            self.assertEqual(a_index.query_box(query), expected, query)
+
+            (lat, lon) = (query[0], query[2])
+            expected   = set([key for (key, box) in a_boxes.iteritems() if brute_intersects(box, (lat, lat, lon, lon))])
+
+            self.assertEqual(a_index.query_point(lat, lon), expected, (lat, lon))
+
+    def test_box_queries(self):
+        """ the box and point queries return the same keys as a brute force scan """
+
+        for (cell_size, max_cells) in ((10.0, 64), (7.0, 4), (45.0, 1000)):
+            index = GeoIndex(cell_size, max_cells)
+            boxes = {}
+
+            for key in xrange(200):
+                boxes[key] = self._random_box()
+                index.insert(key, boxes[key])
+
+            self.assertEqual(len(index), 200)
+            self._check(index, boxes)
+
+            # replace and delete
+            for key in xrange(0, 200, 3):
+                boxes[key] = self._random_box()
+                index.insert(key, boxes[key])
+
+            for key in xrange(1, 200, 3):
+                index.delete(key)
+                del boxes[key]
+
+            index.delete('unknown')
+
+            self.assertEqual(len(index), len(boxes))
+            self.assertFalse(1 in index)
+            self._check(index, boxes)
+
+    def test_dateline_and_poles(self):
+        """ the boxes crossing the 180 meridian or touching a pole are found from both sides """
+
+        index = GeoIndex()
+
+        index.insert('dateline', (-10.0, 10.0, 170.0, -170.0))
+        index.insert('north', (80.0, 90.0, -180.0, 180.0))
+        index.insert('south', { 'TYPE' : 'GEO', 'LAT' : { 'START' : -90, 'END' : -85 },
+                                'LON' : { 'START' : 0, 'END' : 10 } })
+
+        self.assertEqual(index.query_point(0.0, 180.0), set(['dateline']))
+        self.assertEqual(index.query_point(0.0, -175.0), set(['dateline']))
+        self.assertEqual(index.query_point(0.0, 0.0), set())
+        self.assertEqual(index.query_point(90.0, 42.0), set(['north']))
+        self.assertEqual(index.query_point(-90.0, 5.0), set(['south']))
+
+        self.assertEqual(index.query_box((-5.0, 5.0, 179.0, -179.0)), set(['dateline']))
+        self.assertEqual(index.query_box((-5.0, 5.0, -171.0, -160.0)), set(['dateline']))
+        self.assertEqual(index.query_box((85.0, 90.0, 175.0, -175.0)), set(['north']))
+        self.assertEqual(index.query_box((-90.0, 90.0, 10.0, 20.0)), set(['north', 'south']))
+        self.assertEqual(index.query_box((-90.0, -89.0, 11.0, 169.0)), set())
+
+if __name__ == '__main__':
+    tests()
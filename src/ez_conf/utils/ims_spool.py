@@ -0,0 +1,294 @@
+'''
+Created on Oct 19, 2026
+
+Split spool files made of concatenated IMS2.0 messages.
+The file is memory mapped and only the BEGIN, MSG_ID and STOP lines are looked at, nothing is tokenized.
+Each message is described by a span (offset, length, msg_id) that can be persisted in an index file
+and used to read (and parse) the messages lazily or in any order. The index files are written next to the
+spool files or in a separate index directory.
+'''
+import hashlib
+import mmap
+import os
+import re
+
+from nms_common.parser.ims20_language.ims_tokenizer import IMSTokenizer
+
+# line anchored message boundaries. STOP has to be alone on its line to not be confused with data lines
+BOUNDARY       = r'^[ \t]*(?:(?P<begin>BEGIN)(?=[ \t\r\n]|$)|(?P<msgid>MSG_ID)[ \t]|(?P<stop>STOP)[ \t\r]*$)[^\n]*'
+BOUNDARY_RE    = re.compile(BOUNDARY, re.IGNORECASE | re.MULTILINE)
+
+# STOP line read by read_until_stop
+STOP_LINE_RE   = re.compile(r'^[ \t]*STOP[ \t\r]*$', re.IGNORECASE)
+
+# first line of an index file: magic, size and modification time of the indexed spool
+INDEX_MAGIC    = '#IMSSPOOLINDEX'
+INDEX_SUFFIX   = '.idx'
+
+# offset, length and msg_id of a message
+OFFSET, LENGTH, MSG_ID = 0, 1, 2
+
+class SpoolIndexError(Exception):
+    """ SpoolIndexError Class """
+
+    def __init__(self, a_msg):
+
+        super(SpoolIndexError, self).__init__(a_msg)
+
+def iter_spans(a_data):
+    """ Find the messages contained in a buffer.
+        A message starts on a BEGIN line and ends after the next STOP line.
+        A message without STOP ends where the next one begins (or at the end of the buffer)
+        and will be reported as malformed by the parser.
+
+        Args:
+           a_data: a string or a mmap object
+
+        Returns:
+           a generator of (offset, length, msg_id) tuples. msg_id is None when the MSG_ID line is missing
+    """
+    data_len = len(a_data)
+    start    = None
+    msg_id   = None
+
+    for matched in BOUNDARY_RE.finditer(a_data):
+
+        if matched.group('begin'):
+
+            if start is not None:
+                yield (start, matched.start() - start, msg_id)
+
+            start, msg_id = matched.start(), None
+
+        elif start is None:
+            # outside of a message (mail headers, garbage)
+            continue
+
+        elif matched.group('msgid'):
+
+            if msg_id is None:
+                id_matched = IMSTokenizer.MSGID_PATTERN_RE.search(matched.group())
+                if id_matched:
+                    msg_id = id_matched.group('msgid')
+        else:
+            # STOP: the message includes the end of line
+            end = matched.end()
+            if end < data_len:
+                end += 1
+
+            yield (start, end - start, msg_id)
+
+            start, msg_id = None, None
+
+    if start is not None:
+        yield (start, data_len - start, msg_id)
+
+def read_until_stop(a_stream):
+    """ Read a message from the current position of a stream up to its STOP line (included).
+        Nothing is read after the STOP line so the stream is positioned on the next message.
+
+        Args:
+           a_stream: file-like object with readline
+
+        Returns:
+           the message string (up to the end of the stream if there is no STOP line)
+    """
+    lines = []
+
+    while True:
+        line = a_stream.readline()
+
+        if not line:
+            break
+
+        lines.append(line)
+
+        if STOP_LINE_RE.match(line):
+            break
+
+    return ''.join(lines)
+
+def split_spool(a_path):
+    """ Memory map a spool file and find the messages it contains.
+
+        Args:
+           a_path: path to the spool file
+
+        Returns:
+           a generator of (offset, length, msg_id) tuples
+    """
+    the_file = open(a_path, 'rb')
+
+    try:
+        # an empty file cannot be mapped
+        if os.fstat(the_file.fileno()).st_size == 0:
+            return
+
+        the_map = mmap.mmap(the_file.fileno(), 0, access = mmap.ACCESS_READ)
+
+        try:
+            for span in iter_spans(the_map):
+                yield span
+        finally:
+            the_map.close()
+    finally:
+        the_file.close()
+
+def index_path(a_path, a_index_dir = None):
+    """ Return the path of the index file of a spool file.
+
+        Args:
+           a_path     : path to the spool file
+           a_index_dir: directory of the index files (default the directory of the spool file). The spool
+                        directory is hashed in the index file name to not mix the spools of different directories
+
+        Returns:
+           the path of the index file
+    """
+    if not a_index_dir:
+        return a_path + INDEX_SUFFIX
+
+    (spool_dir, name) = os.path.split(os.path.abspath(a_path))
+
+    return os.path.join(a_index_dir, '%s.%s%s' % (name, hashlib.md5(spool_dir).hexdigest()[:12], INDEX_SUFFIX))
+
+def write_index(a_path, a_spans, a_index_path = None):
+    """ Persist the spans of a spool file in an index file.
+
+        Args:
+           a_path      : path to the spool file
+           a_spans     : iterable of (offset, length, msg_id) tuples
+           a_index_path: path of the index file (default a_path + INDEX_SUFFIX)
+
+        Returns:
+           the path of the index file
+    """
+    index_path = a_index_path if a_index_path else a_path + INDEX_SUFFIX
+    the_stat   = os.stat(a_path)
+
+    # write in a temporary file and rename it to never leave a partial index
+    tmp_path   = '%s.%d.tmp' % (index_path, os.getpid())
+
+    index_file = open(tmp_path, 'w')
+    try:
+        index_file.write('%s %d %d\n' % (INDEX_MAGIC, the_stat.st_size, int(the_stat.st_mtime)))
+
+        for (offset, length, msg_id) in a_spans:
+            index_file.write('%d %d %s\n' % (offset, length, msg_id if msg_id is not None else ''))
+    finally:
+        index_file.close()
+
+    os.rename(tmp_path, index_path)
+
+    return index_path
+
+def read_index(a_path, a_index_path = None):
+    """ Read the spans of a spool file from its index file.
+
+        Args:
+           a_path      : path to the spool file
+           a_index_path: path of the index file (default a_path + INDEX_SUFFIX)
+
+        Returns:
+           a list of (offset, length, msg_id) tuples
+
+        Raises:
+           exception SpoolIndexError if the index is malformed or does not match the spool file anymore
+    """
+    index_path = a_index_path if a_index_path else a_path + INDEX_SUFFIX
+    the_stat   = os.stat(a_path)
+
+    index_file = open(index_path, 'r')
+    try:
+        header = index_file.readline().split()
+
+        if len(header) != 3 or header[0] != INDEX_MAGIC:
+            raise SpoolIndexError("%s is not a spool index file" % (index_path))
+
+        if int(header[1]) != the_stat.st_size or int(header[2]) != int(the_stat.st_mtime):
+            raise SpoolIndexError("%s is out of date: %s has been modified" % (index_path, a_path))
+
+        spans = []
+
+        for line in index_file:
+            fields = line.rstrip('\n').split(' ')
+
+            if len(fields) != 3:
+                raise SpoolIndexError("malformed line in %s: %s" % (index_path, line))
+
+            spans.append((int(fields[0]), int(fields[1]), fields[2] if fields[2] else None))
+    finally:
+        index_file.close()
+
+    return spans
+
+def get_spans(a_path, a_use_index = True, a_index_dir = None):
+    """ Return the spans of a spool file. The index file is used when it is up to date otherwise
+        the spool is scanned and the index (re)written.
+
+        Args:
+           a_path     : path to the spool file
+           a_use_index: read and write the index file
+           a_index_dir: directory of the index file (default the directory of the spool file)
+
+        Returns:
+           a list of (offset, length, msg_id) tuples
+    """
+    if not a_use_index:
+        return list(split_spool(a_path))
+
+    the_index_path = index_path(a_path, a_index_dir)
+
+    try:
+        return read_index(a_path, the_index_path)
+    except (IOError, OSError, SpoolIndexError):
+        spans = list(split_spool(a_path))
+
+    try:
+        write_index(a_path, spans, the_index_path)
+    except (IOError, OSError):
+        # read only directory: the index is just an optimization
+        pass
+
+    return spans
+
+def read_message(a_file, a_span):
+    """ Read a message from a spool file.
+
+        Args:
+           a_file: a path or a file object opened on the spool
+           a_span: the (offset, length, msg_id) tuple of the message
+
+        Returns:
+           the message string
+    """
+    if isinstance(a_file, basestring):
+        the_file = open(a_file, 'rb')
+        try:
+            return read_message(the_file, a_span)
+        finally:
+            the_file.close()
+
+    a_file.seek(a_span[OFFSET])
+
+    return a_file.read(a_span[LENGTH])
+
+def iter_messages(a_path, a_use_index = True, a_index_dir = None):
+    """ Iterate over the messages of a spool file.
+
+        Args:
+           a_path     : path to the spool file
+           a_use_index: read and write the index file
+           a_index_dir: directory of the index file (default the directory of the spool file)
+
+        Returns:
+           a generator of (span, message string) tuples
+    """
+    spans = get_spans(a_path, a_use_index, a_index_dir)
+
+    the_file = open(a_path, 'rb')
+    try:
+        for span in spans:
+            yield (span, read_message(the_file, span))
+    finally:
+        the_file.close()
@@ -0,0 +1,146 @@
+'''
+Created on Oct 19, 2026
+
+'''
+
+# unit tests part
+import unittest
+import os
+import shutil
+import tempfile
+
+import nms_common.parser.ims20_language.ims_spool as ims_spool
+from nms_common.parser.ims20_language.ims_spool import SpoolIndexError
+
+
+def tests():
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestSpoolIndex)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+
+REQUEST = "BEGIN IMS2.0\nMSG_TYPE request\nMSG_ID %s any_ndc\nE-MAIL foo@bar.com\n" \
+          "TIME 2009/01/01 to 2009/01/02\nSTA_LIST ARCES\nWAVEFORM IMS2.0\nSTOP\n"
+
+# the second message has no MSG_ID
+SPOOL   = REQUEST % ('1') + "garbage between the messages\n" + REQUEST.replace('MSG_ID %s any_ndc\n', '') + \
+          REQUEST % ('3')
+
+
+class TestSpoolIndex(unittest.TestCase):
+
+    def setUp(self):
+        self._dir       = tempfile.mkdtemp()
+        self._spool_dir = os.path.join(self._dir, 'spool')
+        self._index_dir = os.path.join(self._dir, 'index')
+        self._path      = os.path.join(self._spool_dir, 'messages.txt')
+
+        os.mkdir(self._spool_dir)
+        os.mkdir(self._index_dir)
+
+        self._write(SPOOL)
+
+    def tearDown(self):
+        shutil.rmtree(self._dir)
+
+    def _write(self, a_data, a_mode = 'wb'):
+        """ write the spool file """
+        the_file = open(self._path, a_mode)
+        try:
+            the_file.write(a_data)
+        finally:
+            the_file.close()
+
+    def _expected_spans(self):
+        """ spans of the three messages of SPOOL """
+        second = SPOOL.index('BEGIN', 1)
+        third  = SPOOL.rindex('BEGIN')
+
+        return [(0, len(REQUEST % ('1')), '1'), (second, third - second, None), (third, len(SPOOL) - third, '3')]
+
+    def test_split_and_read(self):
+        """ the spool is split on the BEGIN and STOP lines and the messages read back from their span """
+
+        spans = list(ims_spool.split_spool(self._path))
+
+        self.assertEqual(spans, self._expected_spans())
+        self.assertEqual(ims_spool.read_message(self._path, spans[0]), REQUEST % ('1'))
+        self.assertEqual([message for (_, message) in ims_spool.iter_messages(self._path, False)], \
+                         [SPOOL[offset:offset + length] for (offset, length, _) in spans])
+
+        self._write('')
+        self.assertEqual(list(ims_spool.split_spool(self._path)), [])
+
+    def test_index_round_trip(self):
+        """ the written spans are read back, with the messages without MSG_ID """
+
+        spans = self._expected_spans()
+
+        self.assertEqual(ims_spool.write_index(self._path, spans), self._path + ims_spool.INDEX_SUFFIX)
+        self.assertEqual(ims_spool.read_index(self._path), spans)
+
+        other_path = os.path.join(self._index_dir, 'other.idx')
+
+        self.assertEqual(ims_spool.write_index(self._path, spans[1:], other_path), other_path)
+        self.assertEqual(ims_spool.read_index(self._path, other_path), spans[1:])
+
+        # no temporary file is left
+        self.assertEqual(sorted(os.listdir(self._index_dir)), ['other.idx'])
+
+    def test_stale_index(self):
+        """ an index is refused when the spool size or modification time changed or when it is malformed """
+
+        ims_spool.write_index(self._path, self._expected_spans())
+
+        self._write(REQUEST % ('4'), 'ab')
+        self.assertRaises(SpoolIndexError, ims_spool.read_index, self._path)
+
+        ims_spool.write_index(self._path, self._expected_spans())
+
+        the_stat = os.stat(self._path)
+        os.utime(self._path, (the_stat.st_atime, the_stat.st_mtime - 10))
+
+        self.assertRaises(SpoolIndexError, ims_spool.read_index, self._path)
+
+        # the index is rebuilt from the spool
+        self.assertEqual(len(ims_spool.get_spans(self._path)), 4)
+        self.assertEqual(len(ims_spool.read_index(self._path)), 4)
+
+        index_file = open(self._path + ims_spool.INDEX_SUFFIX, 'a')
+        index_file.write('12 13\n')
+        index_file.close()
+
+        self.assertRaises(SpoolIndexError, ims_spool.read_index, self._path)
+
+        index_file = open(self._path + ims_spool.INDEX_SUFFIX, 'w')
+        index_file.write('not an index\n')
+        index_file.close()
+
+        self.assertRaises(SpoolIndexError, ims_spool.read_index, self._path)
+        self.assertRaises(IOError, ims_spool.read_index, self._path, os.path.join(self._index_dir, 'missing.idx'))
+
+    def test_index_dir(self):
+        """ with an index directory nothing is written next to the spool files """
+
+        index_path = ims_spool.index_path(self._path, self._index_dir)
+
+        self.assertEqual(ims_spool.index_path(self._path), self._path + ims_spool.INDEX_SUFFIX)
+        self.assertEqual(os.path.dirname(index_path), self._index_dir)
+        self.assertTrue(index_path.endswith(ims_spool.INDEX_SUFFIX))
+
+        # same file name in another directory
+        self.assertNotEqual(ims_spool.index_path(os.path.join(self._dir, 'messages.txt'), self._index_dir), index_path)
+
+        self.assertEqual(ims_spool.get_spans(self._path, True, self._index_dir), self._expected_spans())
+        self.assertEqual(os.listdir(self._spool_dir), ['messages.txt'])
+        self.assertEqual(ims_spool.read_index(self._path, index_path), self._expected_spans())
+
+        # the up to date index is used instead of scanning the spool
+        ims_spool.write_index(self._path, self._expected_spans()[:1], index_path)
+
+        self.assertEqual(ims_spool.get_spans(self._path, True, self._index_dir), self._expected_spans()[:1])
+
+        self.assertEqual(ims_spool.get_spans(self._path, False, self._index_dir), self._expected_spans())
+        self.assertEqual(os.listdir(self._spool_dir), ['messages.txt'])
+
+if __name__ == '__main__':
+    tests()
@@ -0,0 +1,258 @@
+'''
+Created on Oct 19, 2026
+
+Catalog of the known stations and channels used to validate the STALIST and CHANLIST names and to expand
+their wildcards (WCID tokens).
+
+The names are kept in prefix tries: the literal prefix of a pattern is walked in the trie and only the names
+under that prefix are matched, so a pattern like ARC* costs the size of its result and not of the catalog.
+The expansions are memoized in a LRU cache. A reload builds a new state and swaps it in one assignment,
+a lookup running during a reload sees either the old or the new catalog.
+'''
+import hashlib
+import re
+
+from nms_common.parser.common.lru_cache import LRUCache
+import nms_common.parser.common.validator_const as const
+
+STATIONS = const.STALIST_K
+CHANNELS = const.CHANLIST_K
+
+WILDCARD = '*'
+
+# key of the value stored in a trie node (the name in the catalog tries)
+TRIE_VALUE = ''
+
+def trie_node(a_root, a_prefix, a_create = False):
+    """ Return the node of a prefix in a trie (nested dicts char -> node).
+
+        Args:
+           a_root  : root node
+           a_prefix: the prefix
+           a_create: create the missing nodes
+
+        Returns:
+           the node (None if it does not exist and a_create is False)
+    """
+    node = a_root
+
+    for char in a_prefix:
+        child = node.get(char, None)
+
+        if child is None:
+            if not a_create:
+                return None
+            child = node[char] = {}
+
+        node = child
+
+    return node
+
+def trie_path(a_root, a_key):
+    """ return the list of the existing nodes of the prefixes of a key (the root first) """
+    nodes, node = [a_root], a_root
+
+    for char in a_key:
+        node = node.get(char, None)
+        if node is None:
+            break
+        nodes.append(node)
+
+    return nodes
+
+def trie_prune(a_root, a_prefix):
+    """ remove the nodes of a prefix that have neither value nor child """
+    path = trie_path(a_root, a_prefix)
+
+    for depth in xrange(len(path) - 1, 0, -1):
+        if path[depth]:
+            break
+        del path[depth - 1][a_prefix[depth - 1]]
+
+def _build_trie(a_names):
+    """ return the prefix trie of a set of names """
+    root = {}
+
+    for name in a_names:
+        trie_node(root, name, True)[TRIE_VALUE] = name
+
+    return root
+
+def _iter_names(a_node):
+    """ return all the names stored under a trie node """
+    names, stack = [], [a_node]
+
+    while stack:
+        node = stack.pop()
+        for (char, child) in node.iteritems():
+            if char == TRIE_VALUE:
+                names.append(child)
+            else:
+                stack.append(child)
+
+    return names
+
+class _CatalogState(object):
+    """ immutable content of a catalog """
+
+    def __init__(self, a_stations, a_channels, a_cache_size):
+
+        stations = frozenset([name.strip().upper() for name in a_stations if name.strip()])
+        channels = frozenset([name.strip().upper() for name in a_channels if name.strip()])
+
+        self.names = { STATIONS : stations, CHANNELS : channels }
+        self.tries = { STATIONS : _build_trie(stations), CHANNELS : _build_trie(channels) }
+        self.cache = LRUCache(a_cache_size)
+
+        digest = hashlib.sha1()
+        for kind in (STATIONS, CHANNELS):
+            digest.update('%s:%s\n' % (kind, ','.join(sorted(self.names[kind]))))
+
+        self.fingerprint = digest.hexdigest()
+
+class StationCatalog(object):
+    """
+       Known stations and channels.
+    """
+
+    def __init__(self, a_stations = (), a_channels = (), a_cache_size = 1024):
+        """ constructor
+
+            Args:
+               a_stations  : iterable of station names
+               a_channels  : iterable of channel names
+               a_cache_size: number of expanded patterns kept in memory
+        """
+        self._cache_size = a_cache_size
+        self._state      = None
+
+        self.load(a_stations, a_channels)
+
+    @classmethod
+    def read_file(cls, a_path):
+        """ Read a catalog file. Each line contains a station name optionally followed by its channels.
+            Empty lines and lines starting with # are ignored.
+
+            Args:
+               a_path: path of the catalog file
+
+            Returns:
+               a tuple (list of stations, set of channels)
+        """
+        stations, channels = [], set()
+
+        the_file = open(a_path, 'r')
+        try:
+            for line in the_file:
+                fields = line.replace(',', ' ').split()
+
+                if not fields or fields[0].startswith('#'):
+                    continue
+
+                stations.append(fields[0])
+                channels.update(fields[1:])
+        finally:
+            the_file.close()
+
+        return (stations, channels)
+
+    @classmethod
+    def from_file(cls, a_path, a_cache_size = 1024):
+        """ create a catalog from a catalog file (see read_file) """
+        (stations, channels) = cls.read_file(a_path)
+
+        return cls(stations, channels, a_cache_size)
+
+    def load(self, a_stations, a_channels):
+        """ Replace the content of the catalog. The new content is built aside and swapped atomically.
+
+            Args:
+               a_stations: iterable of station names
+               a_channels: iterable of channel names
+        """
+        self._state = _CatalogState(a_stations, a_channels, self._cache_size)
+
+    def reload_file(self, a_path):
+        """ replace the content of the catalog by the content of a catalog file """
+        (stations, channels) = self.read_file(a_path)
+
+        self.load(stations, channels)
+
+    @property
+    def fingerprint(self):
+        """ return a digest of the catalog content (changes when the content changes) """
+        return self._state.fingerprint
+
+    def cache_stats(self):
+        """ return the statistics of the pattern cache """
+        return self._state.cache.stats()
+
+    def contains(self, a_name, a_kind = STATIONS):
+        """ True if the name (without wildcard) is in the catalog """
+        return a_name.upper() in self._state.names[a_kind]
+
+    def expand(self, a_pattern, a_kind = STATIONS):
+        """ Return the names matching a pattern.
+
+            Args:
+               a_pattern: a name with or without * wildcards
+               a_kind   : STATIONS or CHANNELS
+
+            Returns:
+               a sorted tuple of names (empty if nothing matches)
+        """
+        # work on one snapshot of the catalog
+        state   = self._state
+        pattern = a_pattern.upper()
+
+        wildcard_pos = pattern.find(WILDCARD)
+
+        if wildcard_pos < 0:
+            return (pattern,) if pattern in state.names[a_kind] else ()
+
+        key    = (a_kind, pattern)
+        result = state.cache.get(key)
+
+        if result is not None:
+            return result
+
+        # walk the literal prefix
+        node = trie_node(state.tries[a_kind], pattern[:wildcard_pos])
+
+        if node is None:
+            result = ()
+        elif pattern[wildcard_pos:] == WILDCARD:
+            result = tuple(sorted(_iter_names(node)))
+        else:
+            regexp = re.compile('.*'.join([re.escape(part) for part in pattern.split(WILDCARD)]) + '$')
+            result = tuple(sorted([name for name in _iter_names(node) if regexp.match(name)]))
+
+        state.cache.put(key, result)
+
+        return result
+
+    def expand_list(self, a_names, a_kind = STATIONS):
+        """ Expand the wildcards of a list of names and check that the names exist.
+
+            Args:
+               a_names: list of names and patterns
+               a_kind : STATIONS or CHANNELS
+
+            Returns:
+               a tuple (expanded names in the order of a_names without duplicates,
+                        list of the unknown names and of the patterns matching nothing)
+        """
+        expanded, unknown, seen = [], [], set()
+
+        for name in a_names:
+            matches = self.expand(name, a_kind)
+
+            if not matches:
+                unknown.append(name)
+
+            for match in matches:
+                if match not in seen:
+                    seen.add(match)
+                    expanded.append(match)
+
+        return (expanded, unknown)
@@ -0,0 +1,100 @@
+'''
+Created on Oct 19, 2026
+
+'''
+
+# unit tests part
+import unittest
+
+from nms_common.parser.ims20_language.ims_station_catalog import StationCatalog, STATIONS, CHANNELS
+from nms_common.parser.ims20_language import ims_semantic_validator
+from nms_common.parser.ims20_language.ims_semantic_validator import set_station_catalog, get_station_catalog
+from nms_common.parser.ims20_language.ims_message_parser import IMSParser
+
+
+def tests():
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestStationCatalog)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+
+class TestStationCatalog(unittest.TestCase):
+
+    STATIONS = ['ARCES', 'ARA0', 'ARA1', 'ARB1', 'FINES', 'FIA0', 'NOA']
+    CHANNELS = ['SHZ', 'SHN', 'SHE', 'BHZ', 'BHN', 'BHE']
+
+    REQUEST  = "BEGIN IMS2.0\nMSG_TYPE request\nMSG_ID 1 any_ndc\nE-MAIL foo.bar@gmail.com\n" \
+               "TIME 2009/01/01 to 2009/01/02\nSTA_LIST %s\nCHAN_LIST %s\nWAVEFORM IMS2.0\nSTOP\n"
+
+    def setUp(self):
+        self._saved   = get_station_catalog()
+        self._catalog = StationCatalog(self.STATIONS, self.CHANNELS, a_cache_size = 8)
+
+    def tearDown(self):
+        set_station_catalog(self._saved)
+
+    def _validate(self, a_stations, a_channels):
+        """ return the LOC STATIONS and CHANLIST of a validated WAVEFORM request """
+        (_, result) = IMSParser().parse_and_validate_str(self.REQUEST % (a_stations, a_channels))
+
+        product = result['PRODUCTLIST'][0]
+
+        return (product['LOC']['STATIONS'], product['CHANLIST'])
+
+    def test_expand(self):
+        """ the wildcards are expanded from their literal prefix and the results cached """
+
+        catalog = self._catalog
+
+        self.assertEqual(catalog.expand('AR*'), ('ARA0', 'ARA1', 'ARB1', 'ARCES'))
+        self.assertEqual(catalog.expand('ar*1'), ('ARA1', 'ARB1'))
+        self.assertEqual(catalog.expand('*0'), ('ARA0', 'FIA0'))
+        self.assertEqual(catalog.expand('*'), tuple(sorted(self.STATIONS)))
+        self.assertEqual(catalog.expand('XY*'), ())
+        self.assertEqual(catalog.expand('noa'), ('NOA',))
+        self.assertEqual(catalog.expand('NOB'), ())
+        self.assertEqual(catalog.expand('?HZ', CHANNELS), ())
+        self.assertEqual(catalog.expand('*Z', CHANNELS), ('BHZ', 'SHZ'))
+
+        catalog.expand('AR*')
+        self.assertTrue(catalog.cache_stats()['HITS'] >= 1)
+
+        self.assertEqual(catalog.expand_list(['FI*', 'ARCES', 'FINES', 'XY*', 'NOB'], STATIONS), \
+                         (['FIA0', 'FINES', 'ARCES'], ['XY*', 'NOB']))
+
+        self.assertTrue(catalog.contains('arces') and not catalog.contains('SHZ') and catalog.contains('SHZ', CHANNELS))
+
+        # a reload changes the content and the fingerprint
+        fingerprint = catalog.fingerprint
+
+        catalog.load(['ARCES', 'ARZ9'], self.CHANNELS)
+
+        self.assertEqual(catalog.expand('AR*'), ('ARCES', 'ARZ9'))
+        self.assertNotEqual(catalog.fingerprint, fingerprint)
+        self.assertEqual(StationCatalog(self.STATIONS, self.CHANNELS).fingerprint, fingerprint)
+
+    def test_validation_expansion(self):
+        """ the validated STA_LIST and CHAN_LIST have their wildcards expanded when a catalog is set """
+
+        set_station_catalog(None)
+        self.assertEqual(self._validate('AR*, NOA', 'SH*'), (['AR*', 'NOA'], ['SH*']))
+
+        set_station_catalog(self._catalog)
+        self.assertEqual(self._validate('AR*, NOA, ARCES', 'SH*, BHZ'), \
+                         (['ARA0', 'ARA1', 'ARB1', 'ARCES', 'NOA'], ['SHE', 'SHN', 'SHZ', 'BHZ']))
+
+    def test_unknown_names(self):
+        """ the unknown stations and channels and the patterns matching nothing are refused """
+
+        set_station_catalog(self._catalog)
+
+        for (stations, channels, error) in (('ARCES, XYZ', 'SHZ', 'unknown stations: XYZ'), \
+                                            ('ZZ*', 'SHZ', 'unknown stations: ZZ*'), \
+                                            ('ARCES', 'SHZ, LHZ, X*', 'unknown channels: LHZ, X*')):
+            try:
+                self._validate(stations, channels)
+                self.fail("%s %s accepted" % (stations, channels))
+            except ims_semantic_validator.SemanticValidationError, err:
+                self.assertTrue(err.message.find(error) >= 0, err.message)
+
+if __name__ == '__main__':
+    tests()
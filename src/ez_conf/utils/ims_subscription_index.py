@@ -0,0 +1,543 @@
+'''
+Created on Oct 19, 2026
+
+Reverse index of the validated subscription products: given a new product (an event, a bulletin, a waveform
+segment), find the subscriptions it satisfies.
+
+The subscription products are first indexed by (PRODUCTFAMILY, PRODUCTTYPE). For each type there are
+secondary indexes on the location (station name -> products for the STALIST locations and a GeoIndex for
+the GEO boxes), on the other list constraints (MAGTYPE, CHANLIST) and on the numeric ranges (MAG, DEPTH, ...)
+using buckets of a fixed width. The station and channel patterns with * wildcards are kept in a prefix trie
+(see ims_station_catalog) under their literal prefix. A match takes its candidates from the index of the item
+constraint having the fewest hits (including the products without this constraint) and checks the other
+constraints on these candidates only, so its cost depends on the number of candidates and not on the number
+of subscriptions.
+'''
+import cPickle
+import os
+import re
+
+import nms_common.parser.common.validator_const as const
+from nms_production_engine_api import product_dict_const
+from nms_common.parser.ims20_language.ims_spatial_index import GeoIndex
+from nms_common.parser.ims20_language.ims_station_catalog import TRIE_VALUE, trie_node, trie_path, trie_prune
+
+START, END = 'START', 'END'
+
+# numeric range constraints and the width of their buckets
+RANGE_KEYS = { const.MAG_K         : 0.5,
+               'DEPTH'             : 50.0,
+               'DEPTHMINUSERROR'   : 50.0,
+               'MBMINUSMS'         : 0.5,
+             }
+
+# list constraints (the item value has to be in the subscription list)
+SET_KEYS   = (const.MAGTYPE_K, const.CHANLIST_K)
+
+# ranges covering more buckets are checked for every match
+MAX_BUCKETS = 64
+
+PICKLE_PROTOCOL = 2
+
+def _as_list(a_value):
+    """ return a list from a single value or a list """
+    if a_value is None:
+        return []
+
+    return a_value if isinstance(a_value, (list, tuple, set, frozenset)) else [a_value]
+
+def request_owner(a_request):
+    """ return the subscriber of a request (lower case e-mail address of its target, None if there is none) """
+    target  = a_request.get('TARGETINFO', None) or {}
+    address = (target.get('DATA', None) or {}).get('EMAILADDR', None)
+
+    return address.lower() if address else None
+
+class _SetIndex(object):
+    """ value -> entries index for a list constraint. The values can contain * wildcards: the patterns are
+        kept in a prefix trie under their literal prefix, so a value is only tested against the patterns
+        whose prefix starts the value
+    """
+
+    def __init__(self):
+        self.values        = {}
+        # trie of the literal prefixes, the TRIE_VALUE of a node is a dict entry -> list of regexps
+        self.patterns      = {}
+        # entry -> (set of the literal values, list of (literal prefix, regexp) of the patterns)
+        self.lists         = {}
+        self.unconstrained = set()
+
+    def add(self, a_entry, a_values):
+        """ index an entry (a_values None: no constraint) """
+        if a_values is None:
+            self.unconstrained.add(a_entry)
+            return
+
+        (literals, patterns) = self.lists.setdefault(a_entry, (set(), []))
+
+        for value in a_values:
+            value = value.upper()
+            wildcard_pos = value.find('*')
+
+            if wildcard_pos >= 0:
+                prefix = value[:wildcard_pos]
+                regexp = re.compile('.*'.join([re.escape(part) for part in value.split('*')]) + '$')
+
+                trie_node(self.patterns, prefix, True).setdefault(TRIE_VALUE, {}).setdefault(a_entry, []).append(regexp)
+                patterns.append((prefix, regexp))
+            else:
+                self.values.setdefault(value, set()).add(a_entry)
+                literals.add(value)
+
+    def remove(self, a_entry):
+        """ remove an indexed entry """
+        self.unconstrained.discard(a_entry)
+
+        (literals, patterns) = self.lists.pop(a_entry, ((), ()))
+
+        for (prefix, _) in patterns:
+            node = trie_node(self.patterns, prefix)
+            if node is not None and a_entry in node.get(TRIE_VALUE, ()):
+                del node[TRIE_VALUE][a_entry]
+                if not node[TRIE_VALUE]:
+                    del node[TRIE_VALUE]
+                    trie_prune(self.patterns, prefix)
+
+        for value in literals:
+            entries = self.values[value]
+            entries.discard(a_entry)
+            if not entries:
+                del self.values[value]
+
+    def matching(self, a_values):
+        """ return the set of entries whose list contains one of the values """
+        result = set()
+
+        for value in a_values:
+            value = value.upper()
+
+            result.update(self.values.get(value, ()))
+
+            # the patterns whose literal prefix is a prefix of the value
+            for node in trie_path(self.patterns, value):
+                for (entry, regexps) in node.get(TRIE_VALUE, {}).iteritems():
+                    if entry not in result and [regexp for regexp in regexps if regexp.match(value)]:
+                        result.add(entry)
+
+        return result
+
+    def estimate(self, a_values):
+        """ return an upper bound of the number of candidates of the upper case values """
+        size = len(self.unconstrained)
+
+        for value in a_values:
+            size += len(self.values.get(value, ()))
+            for node in trie_path(self.patterns, value):
+                size += len(node.get(TRIE_VALUE, ()))
+
+        return size
+
+    def candidates(self, a_values):
+        """ return the entries without constraint or whose list contains one of the upper case values """
+        result = self.matching(a_values) if a_values else set()
+        result.update(self.unconstrained)
+
+        return result
+
+    def accepts(self, a_entry, a_values):
+        """ True if the entry has no constraint or if its list contains one of the upper case values """
+        the_list = self.lists.get(a_entry, None)
+
+        if the_list is None:
+            return a_entry in self.unconstrained
+
+        (literals, patterns) = the_list
+
+        for value in a_values:
+            if value in literals or [prefix for (prefix, regexp) in patterns if regexp.match(value)]:
+                return True
+
+        return False
+
+class _RangeIndex(object):
+    """ bucket index of numeric ranges """
+
+    def __init__(self, a_width):
+        self.width         = float(a_width)
+        self.buckets       = {}
+        self.large         = set()
+        self.ranges        = {}
+        self.unconstrained = set()
+
+    def _buckets(self, a_start, a_end):
+        """ return the buckets covered by a range """
+        return xrange(int(a_start // self.width), int(a_end // self.width) + 1)
+
+    def add(self, a_entry, a_range):
+        """ index an entry (a_range None: no constraint) """
+        if a_range is None:
+            self.unconstrained.add(a_entry)
+            return
+
+        (start, end) = (float(a_range[START]), float(a_range[END]))
+
+        self.ranges[a_entry] = (start, end)
+
+        buckets = self._buckets(start, end)
+
+        if len(buckets) > MAX_BUCKETS:
+            self.large.add(a_entry)
+            return
+
+        for bucket in buckets:
+            self.buckets.setdefault(bucket, set()).add(a_entry)
+
+    def remove(self, a_entry):
+        """ remove an indexed entry """
+        self.unconstrained.discard(a_entry)
+
+        the_range = self.ranges.pop(a_entry, None)
+
+        if the_range is None:
+            return
+
+        if a_entry in self.large:
+            self.large.discard(a_entry)
+            return
+
+        for bucket in self._buckets(the_range[0], the_range[1]):
+            entries = self.buckets[bucket]
+            entries.discard(a_entry)
+            if not entries:
+                del self.buckets[bucket]
+
+    def estimate(self, a_value):
+        """ return an upper bound of the number of candidates of a value """
+        if a_value is None:
+            return len(self.unconstrained)
+
+        return len(self.unconstrained) + len(self.large) + len(self.buckets.get(int(a_value // self.width), ()))
+
+    def candidates(self, a_value):
+        """ return the entries without constraint or whose range contains the value """
+        result = set(self.unconstrained)
+
+        if a_value is not None:
+            ranges = self.ranges
+            for entries in (self.buckets.get(int(a_value // self.width), ()), self.large):
+                result.update([entry for entry in entries if ranges[entry][0] <= a_value <= ranges[entry][1]])
+
+        return result
+
+    def accepts(self, a_entry, a_value):
+        """ True if the entry has no constraint or if its range contains the value """
+        the_range = self.ranges.get(a_entry, None)
+
+        if the_range is None:
+            return a_entry in self.unconstrained
+
+        return a_value is not None and the_range[0] <= a_value <= the_range[1]
+
+class _LocationIndex(object):
+    """ index of the locations: STALIST stations, GEO boxes or no location. The value of an item is a tuple
+        (list of upper case stations, (lat, lon) or None)
+    """
+
+    def __init__(self):
+        self.loc_free = set()
+        self.stations = _SetIndex()
+        self.geo      = GeoIndex()
+
+    def add(self, a_entry, a_loc):
+        """ index the LOC of an entry """
+        if not isinstance(a_loc, dict):
+            self.loc_free.add(a_entry)
+        elif a_loc.get(const.TYPE_K, None) == const.STALIST_K:
+            self.stations.add(a_entry, a_loc.get(const.STATIONS_K, None) or [])
+        else:
+            self.geo.insert(a_entry, a_loc)
+
+    def remove(self, a_entry):
+        """ remove an indexed entry """
+        self.loc_free.discard(a_entry)
+        self.stations.remove(a_entry)
+        self.geo.delete(a_entry)
+
+    def estimate(self, a_value):
+        """ return an upper bound of the number of candidates of an item location """
+        (stations, point) = a_value
+        size = len(self.loc_free)
+
+        if stations:
+            size += self.stations.estimate(stations)
+        if point is not None:
+            size += self.geo.estimate_point(point[0], point[1])
+
+        return size
+
+    def candidates(self, a_value):
+        """ return the entries without location or whose location contains the item location """
+        (stations, point) = a_value
+        result = set(self.loc_free)
+
+        if stations:
+            result.update(self.stations.matching(stations))
+        if point is not None:
+            result.update(self.geo.query_point(point[0], point[1]))
+
+        return result
+
+    def accepts(self, a_entry, a_value):
+        """ True if the entry has no location or if its location contains the item location """
+        (stations, point) = a_value
+
+        return a_entry in self.loc_free or \
+               (bool(stations) and self.stations.accepts(a_entry, stations)) or \
+               (point is not None and self.geo.contains_point(a_entry, point[0], point[1]))
+
+class _TypeIndex(object):
+    """ secondary indexes of the products of one type """
+
+    def __init__(self):
+        self.entries      = set()
+        self.location     = _LocationIndex()
+        self.sets         = dict([(key, _SetIndex()) for key in SET_KEYS])
+        self.ranges       = dict([(key, _RangeIndex(width)) for (key, width) in RANGE_KEYS.items()])
+
+class SubscriptionIndex(object):
+    """
+       Reverse index of the subscription products.
+    """
+
+    def __init__(self):
+        """ constructor """
+        # (family, type) -> _TypeIndex
+        self._types   = {}
+
+        # entry -> (subscription id, type key, product)
+        self._entries = {}
+
+        # subscription id -> list of entries
+        self._subs    = {}
+
+        # (owner, upper case name) -> set of subscription ids and subscription id -> (owner, name)
+        self._names     = {}
+        self._sub_names = {}
+
+        self._next_entry = 0
+
+        self._stats = { 'MATCHES' : 0, 'VISITED' : 0 }
+
+    def __len__(self):
+        """ return the number of subscriptions """
+        return len(self._subs)
+
+    def __contains__(self, a_sub_id):
+        return a_sub_id in self._subs
+
+    @classmethod
+    def _type_key(cls, a_product):
+        """ return the primary key of a product """
+        product_type = a_product.get(const.PRODUCTTYPE, None)
+
+        return (a_product.get(const.PRODUCTFAMILY, None), product_type.upper() if product_type else None)
+
+    def add(self, a_sub_id, a_product):
+        """ Index one validated subscription product.
+
+            Args:
+               a_sub_id : id of the subscription (a subscription can have several products)
+               a_product: a product dictionary of the PRODUCTLIST of a validated subscription
+        """
+        entry = self._next_entry
+        self._next_entry += 1
+
+        type_key = self._type_key(a_product)
+        index    = self._types.get(type_key, None)
+
+        if index is None:
+            index = self._types[type_key] = _TypeIndex()
+
+        index.entries.add(entry)
+        index.location.add(entry, a_product.get('LOC', None))
+
+        for key in SET_KEYS:
+            index.sets[key].add(entry, a_product.get(key, None))
+
+        for key in RANGE_KEYS:
+            index.ranges[key].add(entry, a_product.get(key, None))
+
+        self._entries[entry] = (a_sub_id, type_key, a_product)
+        self._subs.setdefault(a_sub_id, []).append(entry)
+
+    def _set_name(self, a_sub_id, a_name_key):
+        """ register the (owner, name) of a subscription """
+        self._names.setdefault(a_name_key, set()).add(a_sub_id)
+        self._sub_names[a_sub_id] = a_name_key
+
+    def add_request(self, a_sub_id, a_request, a_name = None):
+        """ Index all the products of a validated subscription request.
+
+            Args:
+               a_sub_id : id of the subscription
+               a_request: dictionary returned by parse_and_validate
+               a_name   : optional name of the subscription (the products of a subscription request cannot
+                          have a SUBSCR_NAME, the name is given by the caller). The name is registered for the
+                          subscriber of a_request, so UNSUBSCRIBE by name only removes the subscriptions of
+                          the same subscriber
+        """
+        for product in a_request.get(product_dict_const.PRODUCTLIST, None) or []:
+            self.add(a_sub_id, product)
+
+        if a_name:
+            self._set_name(a_sub_id, (request_owner(a_request), a_name.upper()))
+
+    def remove(self, a_sub_id):
+        """ Remove all the products of a subscription. Return False if the subscription is unknown """
+        name_key = self._sub_names.pop(a_sub_id, None)
+
+        if name_key is not None:
+            self._names[name_key].discard(a_sub_id)
+            if not self._names[name_key]:
+                del self._names[name_key]
+
+        entries = self._subs.pop(a_sub_id, None)
+
+        if entries is None:
+            return False
+
+        for entry in entries:
+            type_key = self._entries.pop(entry)[1]
+            index    = self._types[type_key]
+
+            index.entries.discard(entry)
+            index.location.remove(entry)
+
+            for key in SET_KEYS:
+                index.sets[key].remove(entry)
+
+            for key in RANGE_KEYS:
+                index.ranges[key].remove(entry)
+
+            if not index.entries:
+                del self._types[type_key]
+
+        return True
+
+    def apply_commands(self, a_request):
+        """ Apply the UNSUBSCRIBE commands of a validated subscription request.
+            The subscriptions are given by id (SUBSCR_LIST) or by name (SUBSCR_NAME, see add_request): a name
+            only designates the subscriptions of the subscriber of a_request.
+
+            Args:
+               a_request: dictionary returned by parse_and_validate
+
+            Returns:
+               the list of removed subscription ids
+        """
+        removed = []
+
+        for command in a_request.get(product_dict_const.COMMANDLIST, None) or []:
+            if command.get(const.SUB_COMMAND_K, None) != const.UNSUBSCRIBE_V:
+                continue
+
+            sub_ids = list(command.get(const.SUBSCRLIST_K, None) or [])
+
+            name = command.get(const.SUBSCRNAME_K, None)
+            if name:
+                sub_ids.extend(sorted(self._names.get((request_owner(a_request), name.upper()), ())))
+
+            for sub_id in sub_ids:
+                if self.remove(sub_id):
+                    removed.append(sub_id)
+
+        return removed
+
+    def match(self, a_item):
+        """ Return the subscriptions satisfied by a new product.
+
+            Args:
+               a_item: dictionary describing the product with PRODUCTFAMILY and PRODUCTTYPE and optionally
+                       STATIONS (name or list), LAT and LON (point), MAGTYPE, CHANLIST (value or list)
+                       and the numeric values of RANGE_KEYS (MAG, DEPTH, ...)
+
+            Returns:
+               the set of subscription ids
+        """
+        index = self._types.get(self._type_key(a_item), None)
+
+        if index is None:
+            return set()
+
+        stations = [station.upper() for station in _as_list(a_item.get(const.STATIONS_K, None))]
+        point    = None
+
+        if a_item.get(const.LAT_K, None) is not None and a_item.get(const.LON_K, None) is not None:
+            point = (float(a_item[const.LAT_K]), float(a_item[const.LON_K]))
+
+        # (index, value of the item) of each constraint
+        constraints = [(index.location, (stations, point))]
+
+        for key in SET_KEYS:
+            constraints.append((index.sets[key], [value.upper() for value in _as_list(a_item.get(key, None))]))
+
+        for key in RANGE_KEYS:
+            value = a_item.get(key, None)
+            constraints.append((index.ranges[key], float(value) if value is not None else None))
+
+        # the candidates come from the most selective index, the other constraints are checked on them only
+        sizes    = [constraint_index.estimate(value) for (constraint_index, value) in constraints]
+        selected = constraints.pop(sizes.index(min(sizes)))
+
+        candidates = selected[0].candidates(selected[1])
+
+        self._stats['MATCHES'] += 1
+        self._stats['VISITED'] += len(candidates)
+
+        entries = self._entries
+        result  = set()
+
+        for entry in candidates:
+            for (constraint_index, value) in constraints:
+                if not constraint_index.accepts(entry, value):
+                    break
+            else:
+                result.add(entries[entry][0])
+
+        return result
+
+    def match_stats(self):
+        """ return the number of matches and of candidate entries visited by these matches """
+        return dict(self._stats)
+
+    def snapshot(self, a_path):
+        """ Save the indexed subscriptions in a file (written in a temporary file then renamed) """
+        subscriptions = [(sub_id, [self._entries[entry][2] for entry in entries], self._sub_names.get(sub_id, None)) \
+                         for (sub_id, entries) in self._subs.iteritems()]
+
+        tmp_path = '%s.%d.tmp' % (a_path, os.getpid())
+
+        the_file = open(tmp_path, 'wb')
+        try:
+            cPickle.dump(subscriptions, the_file, PICKLE_PROTOCOL)
+        finally:
+            the_file.close()
+
+        os.rename(tmp_path, a_path)
+
+    def restore(self, a_path):
+        """ Replace the content of the index by the subscriptions saved with snapshot """
+        the_file = open(a_path, 'rb')
+        try:
+            subscriptions = cPickle.load(the_file)
+        finally:
+            the_file.close()
+
+        self.__init__()
+
+        for (sub_id, products, name_key) in subscriptions:
+            for product in products:
+                self.add(sub_id, product)
+
+            if name_key is not None:
+                self._set_name(sub_id, name_key)
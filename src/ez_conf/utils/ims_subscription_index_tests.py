@@ -0,0 +1,218 @@
+'''
+Created on Oct 19, 2026
+
+'''
+
+# unit tests part
+import unittest
+import os
+import random
+import re
+import shutil
+import tempfile
+
+import nms_common.parser.ims20_language.ims_subscription_index as ims_subscription_index
+from nms_common.parser.ims20_language.ims_subscription_index import SubscriptionIndex
+from nms_common.parser.ims20_language.ims_message_parser import IMSParser
+
+
+def tests():
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestSubscriptionIndex)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+
+class TestSubscriptionIndex(unittest.TestCase):
+
+    HEADER    = "BEGIN IMS2.0\nMSG_TYPE subscription\nMSG_ID 1 any_ndc\nE-MAIL %s\n"
+
+    WAVEFORM  = "FREQ daily\nSTA_LIST %s\nCHAN_LIST %s\nWAVEFORM IMS2.0\n"
+
+    BULLETIN  = "FREQ daily\nLAT %s\nLON %s\nMAG %s\nMAG_TYPE mb\nBULL_TYPE reb\nBULLETIN IMS2.0\n"
+
+    def setUp(self):
+        self._parser = IMSParser()
+        self._dir    = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._dir)
+
+    def _request(self, a_body, a_email = 'foo.bar@gmail.com'):
+        """ return a validated subscription request """
+        return self._parser.parse_and_validate_str((self.HEADER % (a_email)) + a_body + 'STOP\n')[1]
+
+    def _build(self):
+        """ return an index of 4 subscriptions """
+        index = SubscriptionIndex()
+
+        index.add_request(1, self._request(self.WAVEFORM % ('ARC*, FINES', 'SH*')), 'arces')
+        index.add_request(2, self._request(self.WAVEFORM % ('*ES', 'BHZ')))
+        index.add_request(3, self._request(self.BULLETIN % ('10 to 20', '10 to 40', '4 to 6')), 'Events')
+        index.add_request(4, self._request(self.BULLETIN % ('-90 to 90', '-180 to 180', '5 to 9'), 'x@y.org'), 'events')
+
+        return index
+
+    @classmethod
+    def _waveform(cls, a_station, a_channel):
+        """ return a waveform item """
+        return { 'PRODUCTFAMILY' : 'DATA', 'PRODUCTTYPE' : 'WAVEFORM', 'STATIONS' : a_station, 'CHANLIST' : a_channel }
+
+    @classmethod
+    def _event(cls, a_lat, a_lon, a_mag):
+        """ return a reb event item """
+        return { 'PRODUCTFAMILY' : 'BULLETIN', 'PRODUCTTYPE' : 'REB', 'LAT' : a_lat, 'LON' : a_lon, 'MAG' : a_mag,
+                 'MAGTYPE' : 'mb' }
+
+    def _check_matches(self, a_index, a_expected):
+        """ check the subscriptions matched by the waveform and event items """
+        items = [ self._waveform('ARCES', 'SHZ'), self._waveform('arc1', 'shn'), self._waveform('FINES', 'BHZ'),
+                  self._waveform(['NOA', 'FINES'], ['SHZ', 'BHZ']), self._event(15, 20, 4.5), self._event(15, 20, 5.5),
+                  self._event(-15, 20, 5.5), self._event(15, 20, 3.0),
+                ]
+
+        self.assertEqual([a_index.match(item) for item in items], a_expected)
+
+    def test_set_index_patterns(self):
+        """ the wildcard patterns indexed by literal prefix match like a scan of all the patterns """
+
+        rand     = random.Random(5)
+        alphabet = 'ABC'
+
+        def random_word(a_wildcards):
+            """ return a random name or pattern """
+            chars = [rand.choice(alphabet + ('*' if a_wildcards else '')) for _ in xrange(rand.randint(0, 4))]
+            return ''.join(chars)
+
+        set_index = ims_subscription_index._SetIndex() #pylint: disable-msg=W0212
+        lists     = {}
+
+        for entry in xrange(300):
+            lists[entry] = [random_word(True) for _ in xrange(rand.randint(1, 3))]
+            set_index.add(entry, lists[entry])
+
+        set_index.add('free', None)
+
+        regexps = {}
+
+        def scan(a_value):
+            """ return the entries matching a value by testing all the lists """
+            result = set()
+
+            for (entry, values) in lists.iteritems():
+                for value in values:
+                    if value not in regexps:
+                        regexps[value] = re.compile('.*'.join([re.escape(part) for part in value.split('*')]) + '$')
+                    if regexps[value].match(a_value):
+                        result.add(entry)
+
+            return result
+
+        values = [random_word(False) for _ in xrange(200)]
+
+        for value in values:
+            self.assertEqual(set_index.matching([value.lower()]), scan(value), value)
+
+        for entry in xrange(0, 300, 2):
+            set_index.remove(entry)
+            del lists[entry]
+
+        for value in values:
+            self.assertEqual(set_index.matching([value]), scan(value), value)
+
+        for value in values:
+            self.assertEqual(set([entry for entry in lists if set_index.accepts(entry, [value])]), scan(value), value)
+
+        for entry in lists.keys():
+            set_index.remove(entry)
+            del lists[entry]
+
+        # the trie is pruned
+        self.assertEqual((set_index.patterns, set_index.lists, set_index.values), ({}, {}, {}))
+        self.assertEqual(set_index.unconstrained, set(['free']))
+
+    def test_add_remove_match(self):
+        """ the items match the subscriptions of their type, location, channels and magnitude """
+
+        index = self._build()
+
+        self.assertEqual(len(index), 4)
+        self._check_matches(index, [set([1]), set([1]), set([2]), set([1, 2]), set([3]), set([3, 4]), set([4]), set()])
+
+        self.assertTrue(index.remove(2))
+        self.assertFalse(index.remove(2))
+        self.assertFalse(2 in index)
+
+        self._check_matches(index, [set([1]), set([1]), set(), set([1]), set([3]), set([3, 4]), set([4]), set()])
+
+    def test_selective_match(self):
+        """ a match only visits the candidates of the most selective index """
+
+        index = SubscriptionIndex()
+
+        # location free bulletins with magnitude ranges spread over 20 buckets
+        for sub_id in xrange(2000):
+            start = (sub_id % 20) * 0.5
+            index.add(sub_id, { 'PRODUCTFAMILY' : 'BULLETIN', 'PRODUCTTYPE' : 'REB',
+                                'MAG' : { 'START' : start, 'END' : start + 0.4 } })
+
+        # waveforms of one station each, all channels
+        for sub_id in xrange(2000, 4000):
+            index.add(sub_id, { 'PRODUCTFAMILY' : 'DATA', 'PRODUCTTYPE' : 'WAVEFORM',
+                                'LOC' : { 'TYPE' : 'STALIST', 'STATIONS' : ['ST%d' % (sub_id)] } })
+
+        index.add(4000, { 'PRODUCTFAMILY' : 'DATA', 'PRODUCTTYPE' : 'WAVEFORM', 'CHANLIST' : ['BH*'],
+                          'LOC' : { 'TYPE' : 'STALIST', 'STATIONS' : ['ST3*'] } })
+
+        event = self._event(15, 20, 4.7)
+        del event['MAGTYPE']
+
+        self.assertEqual(index.match(event), set(range(9, 2000, 20)))
+        self.assertEqual(index.match_stats(), { 'MATCHES' : 1, 'VISITED' : 100 })
+
+        self.assertEqual(index.match(self._waveform('st3456', 'BHZ')), set([3456, 4000]))
+        self.assertEqual(index.match(self._waveform('ST2001', 'SHZ')), set([2001]))
+        self.assertEqual(index.match(self._waveform('NOA', 'SHZ')), set())
+        self.assertEqual(index.match_stats(), { 'MATCHES' : 4, 'VISITED' : 103 })
+
+        # without magnitude only the bulletins without MAG constraint match
+        self.assertEqual(index.match(self._event(15, 20, None)), set())
+        self.assertEqual(index.match_stats()['VISITED'], 103)
+
+    def test_unsubscribe(self):
+        """ the subscriptions are removed by id and by name, a name only designates the subscriptions of its owner """
+
+        index = self._build()
+
+        unsubscribe = "SUBSCR_%s %s\nUNSUBSCRIBE\n"
+
+        self.assertEqual(index.apply_commands(self._request(unsubscribe % ('LIST', '2, 12'))), [2])
+        self.assertEqual(index.apply_commands(self._request(unsubscribe % ('NAME', 'events'))), [3])
+        self.assertEqual(index.apply_commands(self._request(unsubscribe % ('NAME', 'arces'), 'x@y.org')), [])
+        self.assertEqual(index.apply_commands(self._request(unsubscribe % ('NAME', 'EVENTS'), 'X@Y.org')), [4])
+
+        self.assertEqual(len(index), 1)
+        self.assertTrue(1 in index)
+
+    def test_snapshot_restore(self):
+        """ a restored index matches like the saved one and keeps the subscription names """
+
+        index = self._build()
+        index.remove(2)
+
+        path = os.path.join(self._dir, 'subscriptions.pck')
+
+        index.snapshot(path)
+
+        restored = SubscriptionIndex()
+        restored.add_request(42, self._request(self.WAVEFORM % ('NOA', 'SHZ')))
+        restored.restore(path)
+
+        self.assertEqual(len(restored), 3)
+        self.assertFalse(42 in restored)
+        self.assertEqual(os.listdir(self._dir), ['subscriptions.pck'])
+
+        self._check_matches(restored, [set([1]), set([1]), set(), set([1]), set([3]), set([3, 4]), set([4]), set()])
+
+        self.assertEqual(restored.apply_commands(self._request("SUBSCR_NAME arces\nUNSUBSCRIBE\n")), [1])
+
+if __name__ == '__main__':
+    tests()
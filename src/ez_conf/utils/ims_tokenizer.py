@@ -7,6 +7,7 @@ import re
 
 from nms_common.parser.common.regex_util import group, maybe
 from nms_common.parser.exceptions import ParserError
+import nms_common.parser.common.time as parser_time
 
 # pylint: disable-msg=R0903,R0902,R0201,R0913,R0912       
 
@@ -627,6 +628,46 @@ TokenCreator.register_token('NEWLINE', NEWLINE_RE, TokenCreator.TAIL)
 
 
 
+def to_number(a_value):
+    """ convert the value of a NUMBER token in an int or a float. Return None if it is not possible """
+    try:
+        return int(a_value)
+    except ValueError:
+        pass
+    
+    try:
+        return float(a_value)
+    except ValueError:
+        return None
+
+def to_typed_value(a_type, a_value):
+    """ return the typed value of a token value: a datetime for a DATETIME and an int or a float for a NUMBER.
+        None for the other token types or if the conversion fails 
+    """
+    if a_type == 'NUMBER':
+        return to_number(a_value)
+    elif a_type == 'DATETIME':
+        try:
+            return parser_time.imsdate_to_datetime(a_value)
+        except (parser_time.InvalidDateError, ValueError):
+            return None
+    
+    return None
+
+class TypedString(str):
+    """ 
+       Raw string value of a token carrying the typed value computed by the lexer.
+       It is stored in the parsed dictionaries instead of the plain string so that the validator does not convert it again.
+    """
+    
+    def __new__(cls, a_value, a_typed_value = None):
+        obj = str.__new__(cls, a_value)
+        obj.typed_value = a_typed_value
+        return obj
+
+# marker for a typed value that has not been computed yet
+_NOT_COMPUTED = object()
+
 class Token(object):
     """ Token object returned by the Tokenizer """
     
@@ -639,6 +680,7 @@ class Token(object):
         self._parsed_line  = a_parsed_line
         self._line_num     = a_line_num
         self._file_pos     = a_file_pos
+        self._typed_value  = _NOT_COMPUTED
     
     @property
     def type(self):
@@ -650,6 +692,20 @@ class Token(object):
         """ Return the token value """
         return self._value
     
+    @property
+    def typed_value(self):
+        """ Return the typed value (datetime for DATETIME, int or float for NUMBER). 
+            It is computed on first access and None when the token has no typed value.
+        """
+        if self._typed_value is _NOT_COMPUTED:
+            self._typed_value = to_typed_value(self._type, self._value)
+        
+        return self._typed_value
+    
+    def typed_str(self):
+        """ Return the token value as a TypedString carrying the typed value """
+        return TypedString(self._value, self.typed_value)
+    
     @property
     def begin(self):
         """ Return the token begin """
@@ -844,7 +900,27 @@ class IMSTokenizer(object):
     def line_num(self):
         """ return the line_num currently read """
         return self._line_num
+    
+    def set_line_num(self, a_line_num):
+        """ 
+           Set the number of the line read last. 
+           Used when the tokenization is resumed in the middle of a stream to keep the reported line numbers right.
+           
+           Args:
+               a_line_num: line number of the line preceding the one the tokenizer will read next
+        """
+        self._line_num = a_line_num
         
+    def set_line_pos(self, a_line_pos):
+        """
+           Move the cursor in the line of the current token. The next token is matched from a_line_pos.
+           Used by the parser when it has read a part of the current line by itself.
+
+           Args:
+               a_line_pos: position in the line of the current token (after the current token)
+        """
+        self._line_pos = a_line_pos
+
     def io_prog(self):
         """ return the io prog """
         return self._io_prog  
@@ -0,0 +1,163 @@
+'''
+Created on Oct 19, 2026
+
+'''
+
+# unit tests part
+import unittest
+import StringIO
+import datetime
+
+import nms_common.parser.ims20_language.ims_tokenizer as ims_tokenizer
+from nms_common.parser.ims20_language.ims_tokenizer import IMSTokenizer, Token, TokenCreator, TypedString
+from nms_common.parser.ims20_language.ims_message_parser import IMSParser
+from nms_common.utils.time_utils import UTC_TZ
+
+
+def tests():
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestTypedValues)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+
+def tokenize(a_str):
+    """ return the list of the tokens of a string """
+    tokenizer = IMSTokenizer()
+    tokenizer.set_io_prog(StringIO.StringIO(a_str))
+
+    tokens = []
+    token  = tokenizer.next()
+
+    while token.type != TokenCreator.TOKEN_NAMES.ENDMARKER:
+        tokens.append(token)
+        token = tokenizer.next()
+
+    return tokens
+
+
+class TestTypedValues(unittest.TestCase):
+
+    LINES = "TIME 2009/01/01 to 2009/06/15 08:05:09.5\nMAG 3.5 to 12\nLAT -10.5 to 1e1\nDEPTH 0 to .5\n" \
+            "STA_LIST ARCES, FINES\n"
+
+    def setUp(self):
+        self._calls = []
+        self._to_typed_value = ims_tokenizer.to_typed_value
+
+    def tearDown(self):
+        ims_tokenizer.to_typed_value = self._to_typed_value
+
+    def _count_conversions(self):
+        """ count the calls of to_typed_value """
+        def counting_to_typed_value(a_type, a_value):
+            self._calls.append((a_type, a_value))
+            return self._to_typed_value(a_type, a_value)
+
+        ims_tokenizer.to_typed_value = counting_to_typed_value
+
+    def test_to_typed_value(self):
+        """ NUMBER values are ints or floats, DATETIME values UTC datetimes and the other values None """
+
+        for (value, expected) in (('12', 12), ('012', 12), ('3.5', 3.5), ('.5', 0.5), ('1e3', 1000.0), \
+                                  ('2.5E-1', 0.25)):
+            typed_value = ims_tokenizer.to_typed_value('NUMBER', value)
+
+            self.assertEqual(typed_value, expected)
+            self.assertEqual(type(typed_value), type(expected), value)
+
+        self.assertEqual(ims_tokenizer.to_typed_value('NUMBER', '12j'), None)
+
+        self.assertEqual(ims_tokenizer.to_typed_value('DATETIME', '2009/06/15 08:05:09.5'), \
+                         datetime.datetime(2009, 6, 15, 8, 5, 9, 500000, tzinfo = UTC_TZ))
+        self.assertEqual(ims_tokenizer.to_typed_value('DATETIME', '2009-1-2'), \
+                         datetime.datetime(2009, 1, 2, tzinfo = UTC_TZ))
+
+        # the date regexpr accepts days that do not exist
+        self.assertEqual(ims_tokenizer.to_typed_value('DATETIME', '2009/02/30'), None)
+
+        for (token_type, value) in (('ID', 'ARCES'), ('ID', '12'), ('TO', 'to'), ('MINUS', '-')):
+            self.assertEqual(ims_tokenizer.to_typed_value(token_type, value), None)
+
+    def test_typed_string(self):
+        """ a TypedString is the raw string carrying the typed value """
+
+        typed = TypedString('3.50', 3.5)
+
+        self.assertTrue(isinstance(typed, str))
+        self.assertEqual(typed, '3.50')
+        self.assertEqual(str(typed), '3.50')
+        self.assertEqual(hash(typed), hash('3.50'))
+        self.assertEqual(typed.typed_value, 3.5)
+        self.assertEqual(TypedString('ARCES').typed_value, None)
+
+        self.assertEqual(Token('NUMBER', '-0', 0, 2, 1, '-0\n').typed_str().typed_value, 0)
+
+    def test_token_typed_values(self):
+        """ the tokens of the dates and numbers carry their typed value, the other tokens None """
+
+        typed = [(token.type, token.value, token.typed_value) for token in tokenize(self.LINES) \
+                 if token.type in ('DATETIME', 'NUMBER', 'ID')]
+
+        self.assertEqual(typed, [('DATETIME', '2009/01/01', datetime.datetime(2009, 1, 1, tzinfo = UTC_TZ)),
+                                 ('DATETIME', '2009/06/15 08:05:09.5', \
+                                  datetime.datetime(2009, 6, 15, 8, 5, 9, 500000, tzinfo = UTC_TZ)),
+                                 ('NUMBER', '3.5', 3.5), ('NUMBER', '12', 12),
+                                 ('NUMBER', '10.5', 10.5), ('NUMBER', '1e1', 10.0),
+                                 ('NUMBER', '0', 0), ('NUMBER', '.5', 0.5),
+                                 ('ID', 'ARCES', None), ('ID', 'FINES', None)])
+
+        for token in tokenize(self.LINES):
+            typed_str = token.typed_str()
+
+            self.assertTrue(isinstance(typed_str, TypedString))
+            self.assertEqual(typed_str, token.value)
+            self.assertEqual(typed_str.typed_value, token.typed_value)
+
+    def test_lazy_typed_values(self):
+        """ the typed value is computed on the first access only """
+
+        self._count_conversions()
+
+        tokens = tokenize(self.LINES)
+
+        self.assertEqual(self._calls, [])
+
+        number = [token for token in tokens if token.type == 'NUMBER'][0]
+
+        self.assertEqual(number.typed_value, 3.5)
+        self.assertEqual(number.typed_value, 3.5)
+        self.assertEqual(number.typed_str().typed_value, 3.5)
+        self.assertEqual(self._calls, [('NUMBER', '3.5')])
+
+        # a None typed value is memoized too
+        station = [token for token in tokens if token.type == 'ID'][0]
+
+        self.assertEqual(station.typed_value, None)
+        self.assertEqual(station.typed_value, None)
+        self.assertEqual(self._calls, [('NUMBER', '3.5'), ('ID', 'ARCES')])
+
+    def test_parsed_typed_values(self):
+        """ the parsed ranges and dates carry their typed values, negative numbers included """
+
+        message = "BEGIN IMS2.0\nMSG_TYPE request\nMSG_ID 1 any_ndc\nE-MAIL foo@bar.com\n" \
+                  "TIME 2009/01/01 to 2009/01/02 12:00\nLAT -10.5 to 20\nLON -5 to -1.5\nMAG 3.5 to 7\n" \
+                  "STA_LIST ARCES\nBULLETIN IMS2.0\nSTOP\n"
+
+        product = IMSParser().parse_str(message)['PRODUCTLIST'][0]
+
+        expected = { 'DATE' : ('2009/01/01', datetime.datetime(2009, 1, 1, tzinfo = UTC_TZ),
+                               '2009/01/02 12:00', datetime.datetime(2009, 1, 2, 12, 0, tzinfo = UTC_TZ)),
+                     'LAT'  : ('-10.5', -10.5, '20', 20),
+                     'LON'  : ('-5', -5, '-1.5', -1.5),
+                     'MAG'  : ('3.5', 3.5, '7', 7) }
+
+        for (key, (start, typed_start, end, typed_end)) in expected.items():
+            self.assertEqual((product[key]['START'], product[key]['START'].typed_value), (start, typed_start), key)
+            self.assertEqual((product[key]['END'], product[key]['END'].typed_value), (end, typed_end), key)
+            self.assertEqual(type(product[key]['START'].typed_value), type(typed_start), key)
+
+        # the plain strings are not typed
+        self.assertEqual(product['STALIST'], ['ARCES'])
+        self.assertFalse(isinstance(product['STALIST'][0], TypedString))
+
+if __name__ == '__main__':
+    tests()
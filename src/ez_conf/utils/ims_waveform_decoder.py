@@ -0,0 +1,446 @@
+'''
+Created on Oct 19, 2026
+
+Decoding of the waveform sections of the IMS2.0 data messages (DATA_TYPE WAVEFORM) in numpy int32 arrays.
+
+A waveform section is a sequence of segments:
+   WID2 line (station, channel, subformat, number of samples ...)
+   STA2 line (optional)
+   DAT2
+   data lines
+   CHK2 checksum
+The CM6 data are second differences of the samples, each difference written with 6 bits characters
+(the first one holds the sign and 4 bits, the next ones 5 bits, bit 5 set when another character follows).
+The INT data are whitespace separated integers.
+The characters are decoded with numpy array operations on a uint8 view of the data (str, buffer, mmap or
+memoryview) so no python object is created per sample, and the samples are written in a preallocated array.
+'''
+import collections
+import re
+import time
+
+try:
+    import numpy
+except ImportError: # numpy is only needed by the decoding functions
+    numpy = None
+
+# the 64 characters of the CM6 format (the position of a character is its 6 bits value)
+CM6_ALPHABET  = '+-0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+
+# length of the CM6 data lines
+CM6_LINE_SIZE = 80
+
+# a 32 bits difference takes at most 7 characters (4 + 6 * 5 bits)
+CM6_MAX_CHARS = 7
+
+# modulo of the CHK2 checksum
+CHK2_MODULO   = 100000000
+
+# number of samples summed at once by checksum
+CHK2_CHUNK    = 4096
+
+# the chunks of fewer samples are summed by a python loop (cheaper than the numpy calls)
+CHK2_MIN_CHUNK = 64
+
+# subformats that can be decoded
+SUBFORMATS    = ('CM6', 'INT')
+
+SEGMENT_LINE_RE = re.compile(r'^(?P<id>WID2|STA2|DAT2|CHK2)(?:[ \t](?P<value>[^\n]*))?\r?$', re.MULTILINE)
+
+# WID2 fields (start, end) columns (0 based)
+WID2_COLUMNS  = { 'DATE'      : (5, 15),
+                  'TIME'      : (16, 28),
+                  'STATION'   : (29, 34),
+                  'CHANNEL'   : (35, 38),
+                  'AUXID'     : (39, 43),
+                  'SUBFORMAT' : (44, 47),
+                  'NBSAMPLES' : (48, 56),
+                  'SAMPRATE'  : (57, 68),
+                }
+
+WaveformSegment = collections.namedtuple('WaveformSegment', ['wid2', 'subformat', 'nb_samples', 'data', 'checksum'])
+
+# 6 bits value of each byte (-1 for the characters that are not in the alphabet: end of lines, spaces)
+_CM6_VALUES     = None
+
+class WaveformDecodeError(Exception):
+    """ Waveform data that cannot be decoded """
+
+    def __init__(self, a_msg):
+        super(WaveformDecodeError, self).__init__(a_msg)
+
+def _check_numpy(a_function):
+    """ raise ImportError if numpy is not installed """
+    if numpy is None:
+        raise ImportError("%s needs numpy" % (a_function))
+
+def _cm6_values():
+    """ return the decoding table of the CM6 characters """
+    global _CM6_VALUES #pylint: disable-msg=W0603
+
+    if _CM6_VALUES is None:
+        table = numpy.empty(256, dtype = numpy.int16)
+        table.fill(-1)
+        table[numpy.frombuffer(CM6_ALPHABET, dtype = numpy.uint8)] = numpy.arange(64, dtype = numpy.int16)
+
+        _CM6_VALUES = table
+
+    return _CM6_VALUES
+
+def _byte_array(a_data):
+    """ return a uint8 array on the data without copy (str, buffer, mmap or memoryview) """
+    if isinstance(a_data, memoryview):
+        return numpy.asarray(a_data).view(numpy.uint8).ravel()
+
+    return numpy.frombuffer(a_data, dtype = numpy.uint8)
+
+def _output(a_out, a_nb_samples):
+    """ return the a_nb_samples first elements of the output array (allocated if a_out is None) """
+    if a_out is None:
+        return numpy.empty(a_nb_samples, dtype = numpy.int32)
+
+    if a_out.dtype != numpy.int32 or len(a_out) < a_nb_samples:
+        raise WaveformDecodeError("The output array cannot hold %d int32 samples" % (a_nb_samples))
+
+    return a_out[:a_nb_samples]
+
+def decode_cm6(a_data, a_out = None, a_differences = 2):
+    """ Decode CM6 data.
+
+        Args:
+           a_data       : the CM6 characters (str, buffer, mmap or memoryview). The end of lines are ignored
+           a_out        : int32 array where the samples are written (allocated if None)
+           a_differences: number of differences applied to the samples by the encoder (2 in IMS2.0)
+
+        Returns:
+           the int32 array of the samples (a view on the beginning of a_out if given)
+
+        Raises:
+           exception WaveformDecodeError if the data are truncated or a value does not fit in 32 bits
+           exception ImportError if numpy is not installed
+    """
+    _check_numpy('decode_cm6')
+
+    values = _cm6_values()[_byte_array(a_data)]
+    values = values[values >= 0]
+
+    # a sample ends on the first character without the continuation bit
+    ends   = numpy.flatnonzero((values & 0x20) == 0)
+
+    if len(values) and values[-1] & 0x20:
+        raise WaveformDecodeError("The CM6 data end in the middle of a sample")
+
+    out    = _output(a_out, len(ends))
+
+    if not len(ends):
+        return out
+
+    starts = numpy.empty_like(ends)
+    starts[0]  = 0
+    starts[1:] = ends[:-1] + 1
+
+    nb_chars = ends - starts + 1
+
+    if nb_chars.max() > CM6_MAX_CHARS:
+        raise WaveformDecodeError("A CM6 sample of %d characters does not fit in 32 bits" % (nb_chars.max()))
+
+    # bits of each character shifted to their place in the sample
+    bits   = (values & 0x1f).astype(numpy.int64)
+    bits[starts] &= 0x0f
+
+    shifts = 5 * (numpy.repeat(ends, nb_chars) - numpy.arange(len(values)))
+
+    samples = numpy.add.reduceat(bits << shifts, starts)
+    samples[(values[starts] & 0x10) != 0] *= -1
+
+    for _ in xrange(a_differences):
+        numpy.cumsum(samples, out = samples)
+
+    # the C decoders work on 32 bits integers: the overflows wrap the same way
+    out[:] = samples.astype(numpy.int32)
+
+    return out
+
+def _count_words(a_text):
+    """ return the number of whitespace separated words of a string """
+    chars = numpy.frombuffer(a_text, dtype = numpy.uint8)
+    blank = numpy.in1d(chars, numpy.frombuffer(' \t\r\n\v\f', dtype = numpy.uint8))
+
+    # a word starts on a non blank character following a blank one (or at the beginning)
+    return int(numpy.count_nonzero(~blank[1:] & blank[:-1])) + (1 if len(blank) and not blank[0] else 0)
+
+def decode_int(a_data, a_out = None, a_nb_samples = None):
+    """ Decode INT data (whitespace separated integers).
+
+        Args:
+           a_data      : the data (str, buffer, mmap or memoryview)
+           a_out       : int32 array where the samples are written (allocated if None)
+           a_nb_samples: expected number of samples (all the integers of the data if None)
+
+        Returns:
+           the int32 array of the samples (a view on the beginning of a_out if given)
+
+        Raises:
+           exception WaveformDecodeError if the data do not have the expected number of integers or a word
+              is not an integer
+           exception ImportError if numpy is not installed
+    """
+    _check_numpy('decode_int')
+
+    text    = a_data.tobytes() if isinstance(a_data, memoryview) else str(a_data)
+
+    # numpy stops on the first word that is not an integer
+    samples = numpy.fromstring(text, dtype = numpy.int32, sep = ' ')
+
+    if a_nb_samples is None:
+        if len(samples) != _count_words(text):
+            raise WaveformDecodeError("The INT data contain a word that is not an integer after %d samples" % \
+                                      (len(samples)))
+        a_nb_samples = len(samples)
+    elif len(samples) != a_nb_samples:
+        raise WaveformDecodeError("The INT data have %d samples instead of %d" % (len(samples), a_nb_samples))
+
+    out    = _output(a_out, a_nb_samples)
+    out[:] = samples[:a_nb_samples]
+
+    return out
+
+def _checksum_loop(a_total, a_samples):
+    """ return the CHK2 sum of samples reduced sample by sample from a_total """
+    total = a_total
+
+    for sample in a_samples.tolist():
+        total += sample
+        if total >= CHK2_MODULO:
+            total %= CHK2_MODULO
+        elif total <= -CHK2_MODULO:
+            total = -(-total % CHK2_MODULO)
+
+    return total
+
+def _checksum_block(a_total, a_block):
+    """ return the CHK2 sum of a block of samples (reduced by the modulo) from a_total """
+    (low, high) = (int(a_block.min()), int(a_block.max()))
+
+    # samples of the sign of the sum: each reduction removes exactly one modulo
+    if low >= 0 and a_total >= 0:
+        return (a_total + int(a_block.sum())) % CHK2_MODULO
+    elif high <= 0 and a_total <= 0:
+        return -((-a_total - int(a_block.sum())) % CHK2_MODULO)
+
+    # the sums of size samples move by less than the modulo: at most one reduction per chunk
+    size = CHK2_MODULO // max(high, -low)
+
+    if size < CHK2_MIN_CHUNK:
+        return _checksum_loop(a_total, a_block)
+
+    total = a_total
+
+    for start in xrange(0, len(a_block), size):
+        partial = total + numpy.cumsum(a_block[start:start + size])
+        over    = numpy.flatnonzero(numpy.abs(partial) >= CHK2_MODULO)
+        total   = int(partial[-1])
+
+        if len(over):
+            total -= CHK2_MODULO if partial[over[0]] > 0 else -CHK2_MODULO
+
+    return total
+
+def checksum(a_samples):
+    """ Compute the CHK2 checksum of samples.
+        The samples are summed by blocks of CHK2_CHUNK samples. The sum of a block of the sign of the current
+        sum is reduced once by a modulo. The other blocks are cut in chunks short enough to be reduced at most
+        once (with the C truncation of the GSE2.0 algorithm), so the cost does not depend on the number of
+        reductions.
+
+        Args:
+           a_samples: int32 array
+
+        Returns:
+           the checksum (int)
+    """
+    _check_numpy('checksum')
+
+    samples = numpy.asarray(a_samples, dtype = numpy.int64)
+    samples = numpy.fmod(samples, CHK2_MODULO)
+
+    total   = 0
+
+    for start in xrange(0, len(samples), CHK2_CHUNK):
+        total = _checksum_block(total, samples[start:start + CHK2_CHUNK])
+
+    return abs(total)
+
+def _wid2_field(a_line, a_name):
+    """ return a stripped field of a WID2 line """
+    (start, end) = WID2_COLUMNS[a_name]
+
+    return a_line[start:end].strip()
+
+def iter_segments(a_body):
+    """ Yield the segments of a waveform section.
+
+        Args:
+           a_body: the section body (str, buffer or mmap, see ims_data_parser.iter_sections)
+
+        Returns:
+           a generator of WaveformSegment (wid2: dictionary of the WID2 fields, data: buffer on a_body)
+
+        Raises:
+           exception WaveformDecodeError if a segment is not complete
+    """
+    wid2       = None
+    data_start = None
+
+    for matched in SEGMENT_LINE_RE.finditer(a_body):
+
+        line_id = matched.group('id')
+
+        if data_start is None:
+            if line_id == 'WID2':
+                line = 'WID2 ' + (matched.group('value') or '')
+                wid2 = dict([(name, _wid2_field(line, name)) for name in WID2_COLUMNS])
+            elif line_id == 'DAT2':
+                if wid2 is None:
+                    raise WaveformDecodeError("DAT2 line without WID2 line at offset %d" % (matched.start()))
+                data_start = matched.end() + 1
+            elif line_id == 'CHK2':
+                raise WaveformDecodeError("CHK2 line without DAT2 line at offset %d" % (matched.start()))
+
+        elif line_id == 'CHK2':
+            try:
+                nb_samples = int(wid2['NBSAMPLES'])
+                the_sum    = int(matched.group('value').split()[0])
+            except (ValueError, IndexError, AttributeError):
+                raise WaveformDecodeError("Invalid WID2 number of samples or CHK2 checksum at offset %d" % \
+                                          (matched.start()))
+
+            yield WaveformSegment(wid2, wid2['SUBFORMAT'].upper() or 'CM6', nb_samples, \
+                                  buffer(a_body, data_start, matched.start() - data_start), the_sum)
+
+            wid2       = None
+            data_start = None
+
+    if data_start is not None:
+        raise WaveformDecodeError("The waveform section ends without CHK2 line")
+
+def decode_segment(a_segment, a_out = None, a_verify = True):
+    """ Decode the samples of a segment and verify its checksum.
+
+        Args:
+           a_segment: WaveformSegment
+           a_out    : int32 array where the samples are written (allocated if None)
+           a_verify : verify the CHK2 checksum
+
+        Returns:
+           the int32 array of the samples
+
+        Raises:
+           exception WaveformDecodeError if the subformat is not supported, the number of samples
+           is not the WID2 one or the checksum is wrong
+    """
+    if a_segment.subformat == 'CM6':
+        samples = decode_cm6(a_segment.data, a_out)
+    elif a_segment.subformat == 'INT':
+        samples = decode_int(a_segment.data, a_out, a_segment.nb_samples)
+    else:
+        raise WaveformDecodeError("The %s subformat is not supported (%s)" % (a_segment.subformat, \
+                                  ', '.join(SUBFORMATS)))
+
+    if len(samples) != a_segment.nb_samples:
+        raise WaveformDecodeError("%s %s: %d samples decoded instead of %d" % (a_segment.wid2['STATION'], \
+                                  a_segment.wid2['CHANNEL'], len(samples), a_segment.nb_samples))
+
+    if a_verify:
+        the_sum = checksum(samples)
+
+        if the_sum != a_segment.checksum:
+            raise WaveformDecodeError("%s %s: checksum %d instead of %d" % (a_segment.wid2['STATION'], \
+                                      a_segment.wid2['CHANNEL'], the_sum, a_segment.checksum))
+
+    return samples
+
+def encode_cm6(a_samples, a_differences = 2):
+    """ Encode samples in CM6 (lines of CM6_LINE_SIZE characters).
+
+        Args:
+           a_samples    : integer array
+           a_differences: number of differences applied before the encoding
+
+        Returns:
+           the CM6 data (string ending with an end of line)
+    """
+    _check_numpy('encode_cm6')
+
+    diffs = numpy.asarray(a_samples, dtype = numpy.int32).astype(numpy.int64)
+
+    for _ in xrange(a_differences):
+        diffs = numpy.concatenate((diffs[:1], numpy.diff(diffs)))
+
+    # the differences wrap on 32 bits as in the C encoders
+    diffs    = diffs.astype(numpy.int32).astype(numpy.int64)
+
+    if not len(diffs):
+        return ''
+
+    negative = diffs < 0
+    values   = numpy.abs(diffs)
+
+    nb_chars = numpy.ones(len(values), dtype = numpy.int64)
+    for index in xrange(1, CM6_MAX_CHARS):
+        nb_chars += values >= (1 << (4 + 5 * (index - 1)))
+
+    ends     = numpy.cumsum(nb_chars) - 1
+    starts   = ends - nb_chars + 1
+    owners   = numpy.repeat(numpy.arange(len(values)), nb_chars)
+
+    shifts   = 5 * (ends[owners] - numpy.arange(len(owners)))
+    # 5 bits per character with the continuation bit except on the last character of a sample
+    chars    = ((values[owners] >> shifts) & 0x1f) | 0x20
+    chars[ends] &= 0x1f
+
+    # the first character holds the continuation bit, the sign and 4 bits
+    chars[starts] = ((nb_chars > 1) << 5) | (negative << 4) | ((values >> (5 * (nb_chars - 1))) & 0x0f)
+
+    text     = numpy.frombuffer(CM6_ALPHABET, dtype = numpy.uint8)[chars].tostring()
+
+    return ''.join([text[start:start + CM6_LINE_SIZE] + '\n' for start in xrange(0, len(text), CM6_LINE_SIZE)])
+
+def benchmark(a_nb_samples = 1000000, a_repeat = 5, a_subformat = 'CM6'):
+    """ Measure the decoding speed on random samples (a seismic like random walk).
+
+        Args:
+           a_nb_samples: number of samples of the decoded segment
+           a_repeat    : number of decodings (the best time is kept)
+           a_subformat : CM6 or INT
+
+        Returns:
+           the number of samples decoded per second
+    """
+    _check_numpy('benchmark')
+
+    samples = numpy.cumsum(numpy.random.RandomState(0).randint(-500, 500, a_nb_samples)).astype(numpy.int32)
+
+    if a_subformat == 'CM6':
+        data = encode_cm6(samples)
+    else:
+        data = ' '.join(samples.astype(str).tolist())
+
+    segment = WaveformSegment({'STATION' : 'BENCH', 'CHANNEL' : 'SHZ'}, a_subformat, a_nb_samples, \
+                              buffer(data), checksum(samples))
+    out     = numpy.empty(a_nb_samples, dtype = numpy.int32)
+
+    best    = None
+
+    for _ in xrange(a_repeat):
+        start   = time.time()
+        decode_segment(segment, out)
+        elapsed = time.time() - start
+
+        best    = elapsed if best is None else min(best, elapsed)
+
+    return a_nb_samples / max(best, 1e-9)
+
+if __name__ == '__main__':
+    for subformat in SUBFORMATS:
+        print '%s: %.0f samples/s' % (subformat, benchmark(a_subformat = subformat))
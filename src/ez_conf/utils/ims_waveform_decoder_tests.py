@@ -0,0 +1,148 @@
+'''
+Created on Oct 19, 2026
+
+'''
+
+# unit tests part
+import unittest
+
+import numpy
+
+import nms_common.parser.ims20_language.ims_waveform_decoder as decoder
+from nms_common.parser.ims20_language.ims_message_parser import IMSParser
+import nms_common.parser.ims20_language.ims_data_parser as ims_data_parser
+
+
+def tests():
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestWaveformDecoder)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+
+def reference_checksum(a_samples):
+    """ GSE2.0 checksum computed sample by sample """
+    the_sum = 0
+
+    for sample in a_samples:
+        sample = int(sample)
+        if abs(sample) >= decoder.CHK2_MODULO:
+            sample = cmp(sample, 0) * (abs(sample) % decoder.CHK2_MODULO)
+
+        the_sum += sample
+        if abs(the_sum) >= decoder.CHK2_MODULO:
+            the_sum = cmp(the_sum, 0) * (abs(the_sum) % decoder.CHK2_MODULO)
+
+    return abs(the_sum)
+
+
+def segment_lines(a_station, a_subformat, a_samples):
+    """ return the lines of a waveform segment """
+    wid2 = 'WID2 %-10s %-12s %-5s %-3s %-4s %-3s %8d %11.6f' % ('2009/01/01', '00:00:00.000', a_station, 'SHZ', '', \
+                                                               a_subformat, len(a_samples), 40.0)
+    if a_subformat == 'CM6':
+        data = decoder.encode_cm6(a_samples)
+    else:
+        data = ''.join(['%s\n' % (' '.join(['%d' % (sample) for sample in a_samples[start:start + 8]])) \
+                        for start in xrange(0, len(a_samples), 8)])
+
+    return '%s\nSTA2 IMS  70.00 25.00 WGS-84 0.4 0.0\nDAT2\n%sCHK2 %d\n' % (wid2, data, \
+                                                                            reference_checksum(a_samples))
+
+
+class TestWaveformDecoder(unittest.TestCase):
+
+    def setUp(self):
+        self._random = numpy.random.RandomState(42)
+
+    def test_cm6_round_trip(self):
+        """ the CM6 samples are decoded exactly for all the value sizes and the wrapped differences """
+
+        self.assertEqual(decoder.encode_cm6([1, 2, 3]), '-++\n')
+        self.assertEqual(list(decoder.decode_cm6('-++\n')), [1, 2, 3])
+        self.assertEqual(list(decoder.decode_cm6('-++', a_differences = 0)), [1, 0, 0])
+
+        for scale in (8, 1000, 10**6, 2**31 - 1):
+            samples = self._random.randint(-scale, scale, 1000).astype(numpy.int32)
+            data    = decoder.encode_cm6(samples)
+
+            self.assertTrue(max([len(line) for line in data.splitlines()]) <= decoder.CM6_LINE_SIZE)
+
+            out     = numpy.zeros(1200, dtype = numpy.int32)
+            decoded = decoder.decode_cm6(memoryview(data), out)
+
+            self.assertTrue(numpy.array_equal(decoded, samples))
+            self.assertTrue(numpy.array_equal(out[:1000], samples))
+            self.assertEqual(decoder.checksum(samples), reference_checksum(samples))
+
+        self.assertRaises(decoder.WaveformDecodeError, decoder.decode_cm6, data[:-2])
+        self.assertRaises(decoder.WaveformDecodeError, decoder.decode_cm6, data, numpy.zeros(10, dtype = numpy.int32))
+
+    def test_checksum_large_values(self):
+        """ the checksum of samples with a large offset or a large range is the sample by sample one """
+
+        rand = self._random
+
+        for (offset, scale) in ((5 * 10**6, 1000), (-5 * 10**6, 1000), (0, 3 * 10**6), (0, 2**31 - 1),
+                                (99999999, 10), (10**6, 2 * 10**6)):
+            samples = (offset + rand.randint(-scale, scale, 20000)).astype(numpy.int32)
+
+            self.assertEqual(decoder.checksum(samples), reference_checksum(samples), (offset, scale))
+
+        # the sum changes of sign between the blocks
+        samples = numpy.concatenate([numpy.repeat(numpy.int32(sign * 7 * 10**6), 5000) for sign in (1, -1, -1, 1)])
+
+        self.assertEqual(decoder.checksum(samples), reference_checksum(samples))
+        self.assertEqual(decoder.checksum([]), 0)
+
+    def test_data_message_segments(self):
+        """ the segments of a parsed data message are decoded and their checksum verified """
+
+        cm6  = numpy.cumsum(self._random.randint(-500, 500, 700)).astype(numpy.int32)
+        ints = self._random.randint(-10**9, 10**9, 50).astype(numpy.int32)
+
+        message = 'BEGIN IMS2.0\nMSG_TYPE data\nMSG_ID 42 ctbto\nDATA_TYPE WAVEFORM IMS2.0:CM6\n%s%s' \
+                  'DATA_TYPE LOG IMS2.0\nnot a waveform\nSTOP\n' % (segment_lines('ARCES', 'CM6', cm6), \
+                                                                    segment_lines('FINES', 'INT', ints))
+
+        parsed  = IMSParser().parse_str(message)
+        section = parsed['DATASECTIONS'][0]
+
+        self.assertEqual(section['TYPE'], 'WAVEFORM')
+
+        body     = buffer(message, section['OFFSET'], section['LENGTH'])
+        segments = list(decoder.iter_segments(body))
+
+        self.assertEqual([(segment.wid2['STATION'], segment.subformat, segment.nb_samples) for segment in segments], \
+                         [('ARCES', 'CM6', 700), ('FINES', 'INT', 50)])
+
+        out = numpy.empty(1000, dtype = numpy.int32)
+
+        self.assertTrue(numpy.array_equal(decoder.decode_segment(segments[0], out), cm6))
+        self.assertTrue(numpy.array_equal(decoder.decode_segment(segments[1], out), ints))
+
+        # same sections read with the data parser
+        first = ims_data_parser.iter_sections(message, message.find('DATA_TYPE')).next()
+        self.assertEqual(len(list(decoder.iter_segments(first.body))), 2)
+
+        wrong = segments[0]._replace(checksum = segments[0].checksum + 1)
+        self.assertRaises(decoder.WaveformDecodeError, decoder.decode_segment, wrong)
+        self.assertEqual(len(decoder.decode_segment(wrong, a_verify = False)), 700)
+
+        self.assertRaises(decoder.WaveformDecodeError, decoder.decode_segment, segments[1]._replace(nb_samples = 51))
+        self.assertRaises(decoder.WaveformDecodeError, decoder.decode_segment, segments[1]._replace(subformat = 'CM8'))
+
+        truncated = segment_lines('ARCES', 'CM6', cm6).split('CHK2')[0]
+        self.assertRaises(decoder.WaveformDecodeError, list, decoder.iter_segments(truncated))
+
+    def test_int_and_benchmark(self):
+        """ the INT words that are not integers are detected and the benchmark decodes """
+
+        self.assertEqual(list(decoder.decode_int(' 1 -2\n\t3 \n')), [1, -2, 3])
+        self.assertEqual(list(decoder.decode_int('')), [])
+        self.assertRaises(decoder.WaveformDecodeError, decoder.decode_int, '1 2 x3 4')
+        self.assertRaises(decoder.WaveformDecodeError, decoder.decode_int, '1 2 3', None, 4)
+
+        for subformat in decoder.SUBFORMATS:
+            self.assertTrue(decoder.benchmark(1000, 1, subformat) > 0)
+
+if __name__ == '__main__':
+    tests()
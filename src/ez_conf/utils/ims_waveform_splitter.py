@@ -0,0 +1,143 @@
+'''
+Created on Oct 19, 2026
+
+Split the validated WAVEFORM products that are too expensive into smaller products that can be run in parallel.
+
+The cost of a product is its number of station-seconds (number of stations of the LOC STALIST times the
+duration of the DATE window). A product over the budget is cut in time chunks and, when a single station
+already exceeds the budget for a minimal time chunk, in station groups as well.
+Each chunk carries a SPLIT dictionary (index, count, parent product index, time index and station group)
+so the results can be put back together in order.
+'''
+import datetime
+
+import nms_common.parser.common.validator_const as const
+from nms_production_engine_api import product_dict_const
+from nms_common.parser.ims20_language.ims_semantic_validator import copy_structure
+
+START, END = 'START', 'END'
+
+# default budget: 10 station-days
+DEFAULT_MAX_COST     = 10 * 86400
+
+# a product is not cut in time chunks shorter than that (seconds)
+DEFAULT_MIN_DURATION = 3600
+
+def is_waveform(a_product):
+    """ True if a validated product is a waveform """
+    return a_product.get(const.PRODUCTTYPE, None) == 'WAVEFORM' or a_product.get(const.TYPE_K, None) == 'WAVEFORM'
+
+def _stations(a_product):
+    """ return the station list of a validated product (None if the product is not located by stations) """
+    loc = a_product.get('LOC', None)
+
+    if isinstance(loc, dict) and loc.get(const.TYPE_K, None) == const.STALIST_K:
+        return loc.get(const.STATIONS_K, None)
+
+    return None
+
+def _seconds(a_delta):
+    """ return the number of seconds of a timedelta """
+    return a_delta.days * 86400 + a_delta.seconds + a_delta.microseconds / 1000000.0
+
+def product_cost(a_product):
+    """ Return the cost of a validated waveform product in station-seconds.
+        A product without station list counts as one station.
+
+        Args:
+           a_product: validated product dictionary with a DATE dictionary of datetimes
+
+        Returns:
+           the cost (float)
+    """
+    date     = a_product[const.DATE_K]
+    stations = _stations(a_product)
+
+    return max(len(stations) if stations else 1, 1) * _seconds(date[END] - date[START])
+
+def split_product(a_product, a_max_cost = DEFAULT_MAX_COST, a_min_duration = DEFAULT_MIN_DURATION, a_parent = None):
+    """ Split a validated waveform product if it is over the budget.
+
+        Args:
+           a_product     : validated product dictionary
+           a_max_cost    : budget of a chunk in station-seconds
+           a_min_duration: minimal duration of a time chunk in seconds
+           a_parent      : value of the SPLIT PARENT entry (usually the index of the product in its request)
+
+        Returns:
+           the list of chunks ([a_product] if it does not need to be split)
+    """
+    if not is_waveform(a_product) or not isinstance(a_product.get(const.DATE_K, None), dict):
+        return [a_product]
+
+    if product_cost(a_product) <= a_max_cost:
+        return [a_product]
+
+    date     = a_product[const.DATE_K]
+    duration = _seconds(date[END] - date[START])
+    stations = _stations(a_product)
+    nb_sta   = len(stations) if stations else 1
+
+    # keep all the stations together if the time chunks are long enough
+    if stations and float(a_max_cost) / nb_sta < a_min_duration:
+        group_size = max(1, int(a_max_cost // a_min_duration))
+    else:
+        group_size = nb_sta
+
+    chunk_duration = max(1, int(a_max_cost // group_size))
+
+    station_groups = [stations[i:i + group_size] for i in xrange(0, nb_sta, group_size)] if stations else [None]
+
+    time_chunks = []
+    chunk_start = date[START]
+    step        = datetime.timedelta(seconds = chunk_duration)
+
+    while chunk_start < date[END] or not time_chunks:
+        chunk_end = min(chunk_start + step, date[END])
+        time_chunks.append((chunk_start, chunk_end))
+        chunk_start = chunk_end
+
+    count, chunks = len(time_chunks) * len(station_groups), []
+
+    # time major order: the results of a time window are complete before the next one starts
+    for (time_index, (chunk_start, chunk_end)) in enumerate(time_chunks):
+        for (sta_index, group) in enumerate(station_groups):
+
+            chunk = copy_structure(a_product)
+            chunk[const.DATE_K] = { START : chunk_start, END : chunk_end }
+
+            if group is not None:
+                chunk['LOC'][const.STATIONS_K] = list(group)
+
+            chunk[const.SPLIT_K] = { const.SPLIT_INDEX_K  : len(chunks),
+                                     const.SPLIT_COUNT_K  : count,
+                                     const.SPLIT_PARENT_K : a_parent,
+                                     const.SPLIT_TIME_K   : time_index,
+                                     const.SPLIT_STA_K    : sta_index,
+                                   }
+            chunks.append(chunk)
+
+    return chunks
+
+def split_request(a_request, a_max_cost = DEFAULT_MAX_COST, a_min_duration = DEFAULT_MIN_DURATION):
+    """ Split the oversized waveform products of a validated request.
+
+        Args:
+           a_request     : request dictionary returned by parse_and_validate
+           a_max_cost    : budget of a chunk in station-seconds
+           a_min_duration: minimal duration of a time chunk in seconds
+
+        Returns:
+           a new request dictionary whose PRODUCTLIST contains the chunks in place of the split products.
+           The SPLIT PARENT of a chunk is the index of its product in the original PRODUCTLIST
+    """
+    result   = dict(a_request)
+    products = []
+
+    for (index, product) in enumerate(a_request.get(product_dict_const.PRODUCTLIST, None) or []):
+        products.extend(split_product(product, a_max_cost, a_min_duration, index))
+
+    if product_dict_const.PRODUCTLIST in a_request:
+        result[product_dict_const.PRODUCTLIST] = products
+
+    return result
@@ -0,0 +1,107 @@
+'''
+Created on Oct 19, 2026
+
+'''
+
+# unit tests part
+import unittest
+
+import nms_common.parser.ims20_language.ims_waveform_splitter as splitter
+from nms_common.parser.ims20_language.ims_message_parser import IMSParser
+
+
+def tests():
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestWaveformSplitter)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+
+class TestWaveformSplitter(unittest.TestCase):
+
+    REQUEST = "BEGIN IMS2.0\nMSG_TYPE request\nMSG_ID 1 any_ndc\nE-MAIL foo.bar@gmail.com\n" \
+              "TIME %s to %s\nSTA_LIST %s\nWAVEFORM IMS2.0\nMAG 3.5 to 5.0\nMAG_TYPE mb\nBULL_TYPE reb\n" \
+              "BULLETIN IMS2.0\nSTOP\n"
+
+    def _request(self, a_start, a_end, a_stations):
+        """ return a validated request with a WAVEFORM and a BULLETIN product """
+        return IMSParser().parse_and_validate_str(self.REQUEST % (a_start, a_end, a_stations))[1]
+
+    def _check_chunks(self, a_product, a_chunks, a_max_cost):
+        """ check that the chunks are under the budget and cover the product window and stations in order """
+        date = a_product['DATE']
+
+        for (index, chunk) in enumerate(a_chunks):
+            self.assertTrue(splitter.product_cost(chunk) <= a_max_cost)
+            self.assertEqual(chunk['SPLIT']['INDEX'], index)
+            self.assertEqual(chunk['SPLIT']['COUNT'], len(a_chunks))
+
+        # time major order: the windows follow each other and each one has all the stations
+        windows = []
+
+        for chunk in a_chunks:
+            window = (chunk['DATE']['START'], chunk['DATE']['END'])
+            if not windows or windows[-1][0] != window:
+                self.assertEqual(chunk['SPLIT']['TIME_INDEX'], len(windows))
+                windows.append((window, []))
+            windows[-1][1].extend(chunk['LOC']['STATIONS'])
+
+        self.assertEqual(windows[0][0][0], date['START'])
+        self.assertEqual(windows[-1][0][1], date['END'])
+
+        for (previous, current) in zip(windows, windows[1:]):
+            self.assertEqual(previous[0][1], current[0][0])
+
+        for (_, stations) in windows:
+            self.assertEqual(stations, a_product['LOC']['STATIONS'])
+
+    def test_budget_split(self):
+        """ a product over the budget is cut in time chunks with all its stations """
+
+        product = self._request('2009/01/01', '2009/01/03', 'ARCES,FINES')['PRODUCTLIST'][0]
+
+        date    = dict(product['DATE'])
+
+        self.assertEqual(splitter.product_cost(product), 2 * 2 * 86400)
+        self.assertEqual(splitter.split_product(product, 4 * 86400), [product])
+
+        chunks = splitter.split_product(product, 86400, a_parent = 7)
+
+        self.assertEqual(len(chunks), 4)
+        self._check_chunks(product, chunks, 86400)
+
+        self.assertEqual([chunk['SPLIT']['STATION_GROUP'] for chunk in chunks], [0, 0, 0, 0])
+        self.assertEqual(set([chunk['SPLIT']['PARENT'] for chunk in chunks]), set([7]))
+
+        # the product is not modified
+        self.assertEqual(product['DATE'], date)
+        self.assertFalse('SPLIT' in product)
+
+    def test_station_groups(self):
+        """ the stations are grouped when a minimal time chunk of all the stations is over the budget """
+
+        product = self._request('2009/01/01 00:00', '2009/01/01 03:00', 'ARCES,FINES,NOA,SPITS,HFS')['PRODUCTLIST'][0]
+
+        chunks  = splitter.split_product(product, 2 * 3600, 3600)
+
+        self.assertEqual(len(chunks), 9)
+        self._check_chunks(product, chunks, 2 * 3600)
+
+        self.assertEqual([(chunk['SPLIT']['TIME_INDEX'], chunk['SPLIT']['STATION_GROUP']) for chunk in chunks], \
+                         [(time_index, sta_index) for time_index in xrange(3) for sta_index in xrange(3)])
+        self.assertEqual([chunk['LOC']['STATIONS'] for chunk in chunks[:3]], \
+                         [['ARCES', 'FINES'], ['NOA', 'SPITS'], ['HFS']])
+
+    def test_split_request(self):
+        """ only the waveform products are split, the PARENT is the index of the product in the request """
+
+        request = self._request('2009/01/01', '2009/01/03', 'ARCES,FINES')
+        result  = splitter.split_request(request, 86400)
+
+        self.assertEqual(len(request['PRODUCTLIST']), 2)
+        self.assertEqual(len(result['PRODUCTLIST']), 5)
+
+        self.assertEqual([chunk['SPLIT']['PARENT'] for chunk in result['PRODUCTLIST'][:4]], [0, 0, 0, 0])
+        self.assertTrue(result['PRODUCTLIST'][4] is request['PRODUCTLIST'][1])
+        self.assertFalse(splitter.is_waveform(result['PRODUCTLIST'][4]))
+
+if __name__ == '__main__':
+    tests()
@@ -0,0 +1,160 @@
+'''
+Created on Oct 19, 2026
+
+Size bounded Least Recently Used cache used to memoize the parsing functions
+
+'''
+import threading
+
+# indexes in a link of the doubly linked list
+PREV, NEXT, KEY, VALUE = 0, 1, 2, 3
+
+class LRUCache(object):
+    """
+       Dictionary like object keeping at most max_size entries.
+       When full, the least recently used entry is evicted.
+    """
+
+    def __init__(self, a_max_size = 1024):
+        """ constructor
+
+            Args:
+               a_max_size: maximum number of entries kept in the cache
+        """
+        if a_max_size <= 0:
+            raise ValueError("The LRU cache size should be strictly positive (got %s)" % (a_max_size))
+
+        self._max_size = a_max_size
+
+        # key -> link [prev, next, key, value]
+        self._map      = {}
+
+        # sentinel of the circular doubly linked list. root[NEXT] is the most recently used
+        self._root     = []
+        self._root[:]  = [self._root, self._root, None, None]
+
+        self._lock     = threading.Lock()
+
+        self._hits     = 0
+        self._misses   = 0
+
+    @property
+    def max_size(self):
+        """ return the max number of entries """
+        return self._max_size
+
+    @property
+    def hits(self):
+        """ return the number of successful lookups """
+        return self._hits
+
+    @property
+    def misses(self):
+        """ return the number of failed lookups """
+        return self._misses
+
+    def get(self, a_key, a_default = None):
+        """ Return the value associated to a_key and mark it as the most recently used.
+
+            Args:
+               a_key    : key to look for
+               a_default: value returned if the key is not in the cache
+
+            Returns:
+               the cached value or a_default
+        """
+        with self._lock:
+            link = self._map.get(a_key, None)
+
+            if link is None:
+                self._misses += 1
+                return a_default
+
+            self._hits += 1
+            self._move_to_front(link)
+
+            return link[VALUE]
+
+    def put(self, a_key, a_value):
+        """ Add or replace a value in the cache and evict the least recently used one if needed.
+
+            Args:
+               a_key  : hashable key
+               a_value: value to store
+        """
+        with self._lock:
+            link = self._map.get(a_key, None)
+
+            if link is not None:
+                link[VALUE] = a_value
+                self._move_to_front(link)
+                return
+
+            root = self._root
+
+            if len(self._map) >= self._max_size:
+                # recycle the oldest link
+                link = root[PREV]
+                del self._map[link[KEY]]
+
+                link[PREV][NEXT] = root
+                root[PREV]       = link[PREV]
+
+            link = [root, root[NEXT], a_key, a_value]
+            root[NEXT][PREV] = link
+            root[NEXT]       = link
+
+            self._map[a_key] = link
+
+    def pop(self, a_key, a_default = None):
+        """ remove a key from the cache and return its value (a_default if not found) """
+        with self._lock:
+            link = self._map.pop(a_key, None)
+
+            if link is None:
+                return a_default
+
+            link[PREV][NEXT] = link[NEXT]
+            link[NEXT][PREV] = link[PREV]
+
+            return link[VALUE]
+
+    def clear(self):
+        """ empty the cache and reset the statistics """
+        with self._lock:
+            self._map.clear()
+            self._root[:] = [self._root, self._root, None, None]
+            self._hits    = 0
+            self._misses  = 0
+
+    def stats(self):
+        """ return a dictionary with the cache statistics """
+        lookups = self._hits + self._misses
+
+        return { 'SIZE'    : len(self._map),
+                 'MAXSIZE' : self._max_size,
+                 'HITS'    : self._hits,
+                 'MISSES'  : self._misses,
+                 'HITRATE' : (float(self._hits) / lookups) if lookups else 0.0,
+               }
+
+    def __contains__(self, a_key):
+        return a_key in self._map
+
+    def __len__(self):
+        return len(self._map)
+
+    def _move_to_front(self, a_link):
+        """ unlink a_link and insert it just after the root (lock has to be held) """
+        root = self._root
+
+        if root[NEXT] is a_link:
+            return
+
+        a_link[PREV][NEXT] = a_link[NEXT]
+        a_link[NEXT][PREV] = a_link[PREV]
+
+        a_link[PREV]     = root
+        a_link[NEXT]     = root[NEXT]
+        root[NEXT][PREV] = a_link
+        root[NEXT]       = a_link
@@ -9,6 +9,12 @@ common functions and object used in the IMS2.0 parsing process
 import re
 import datetime
 import nms_common.utils.time_utils as common_time
+from nms_common.parser.common.lru_cache import LRUCache
+
+try:
+    import numpy
+except ImportError: # numpy is only needed by the bulk conversion functions
+    numpy = None
 
 IMSDATETIME_PATTERN  = r'(?P<date>(?P<year>(18|19|[2-5][0-9])\d\d)[-/.](?P<month>(0[1-9]|1[012]|[1-9]))[-/.](?P<day>(0[1-9]|[12][0-9]|3[01]|[1-9])))([tT ]?(?P<time>([0-1][0-9]|2[0-3]|[0-9])([:]?([0-5][0-9]|[0-9]))?([:]([0-5][0-9]|[0-9]))?([.]([0-9])+)?))?' # pylint: disable-msg=C0301
 IMSDATETIME_RE       = re.compile(IMSDATETIME_PATTERN)
@@ -16,13 +22,142 @@ IMSDATETIME_RE       = re.compile(IMSDATETIME_PATTERN)
 NLDATETIME_PATTERN  = r'(?P<date>(?P<year>(18|19|[2-5][0-9])\d\d)[-/.]?(?P<month>(0[1-9]|1[012]|[1-9]))[-/.]?(?P<day>(0[1-9]|[12][0-9]|3[01]|[1-9])))([tT ]?(?P<time>([0-1][0-9]|2[0-3]|[0-9])([:]?([0-5][0-9]|[0-9]))?([:]([0-5][0-9]|[0-9]))?([.]([0-9])+)?))?' # pylint: disable-msg=C0301
 NLDATETIME_RE       = re.compile(NLDATETIME_PATTERN)
 
+# number of converted dates memoized by imsdate_to_datetime and nldate_to_datetime
+DATE_CACHE_SIZE     = 4096
+
+_IMSDATE_CACHE      = LRUCache(DATE_CACHE_SIZE)
+_NLDATE_CACHE       = LRUCache(DATE_CACHE_SIZE)
+
+# separators accepted by the fixed width fast path
+DATE_SEPARATORS     = '-/.'
+DATETIME_SEPARATORS = 'tT '
+
+EPOCH               = datetime.datetime(1970, 1, 1, tzinfo = common_time.UTC_TZ)
+
+# lengths of the canonical forms converted in bulk: YYYY/MM/DD, YYYY/MM/DD hh:mm and YYYY/MM/DD hh:mm:ss
+BULK_DATE_LENGTHS   = (10, 16, 19)
+
 class InvalidDateError(Exception):
     """ Invalid IMS Date Error exception """
     def __init__(self, a_msg):
         super(InvalidDateError, self).__init__(a_msg)
 
+def _fast_date_to_datetime(a_date_str): # pylint: disable-msg=R0911
+    """ Convert the canonical fixed width dates YYYY/MM/DD[ hh:mm[:ss[.fff]]] without running the regexpr.
+        
+        Args: a_date_str : a date string
+               
+        Returns: a DateTime Object or None if a_date_str is not in one of the canonical forms.
+                 In that case the caller has to fall back on the regexpr.
+    """
+    length = len(a_date_str)
+    
+    if length != 10 and length != 16 and length != 19 and length < 21:
+        return None
+    
+    if a_date_str[4] not in DATE_SEPARATORS or a_date_str[7] not in DATE_SEPARATORS:
+        return None
+    
+    year, month, day = a_date_str[0:4], a_date_str[5:7], a_date_str[8:10]
+    
+    if not (year.isdigit() and month.isdigit() and day.isdigit()):
+        return None
+    
+    the_year, the_month, the_day = int(year), int(month), int(day)
+    
+    # same ranges as the regexpr (1799 < year < 6000)
+    if not (1800 <= the_year <= 5999) or not (1 <= the_month <= 12) or not (1 <= the_day <= 31):
+        return None
+    
+    the_h, the_min, the_sec, the_microsec = 0, 0, 0, 0
+    
+    if length > 10:
+        
+        if a_date_str[10] not in DATETIME_SEPARATORS or a_date_str[13] != ':':
+            return None
+        
+        hour, minute = a_date_str[11:13], a_date_str[14:16]
+        
+        if not (hour.isdigit() and minute.isdigit()):
+            return None
+        
+        the_h, the_min = int(hour), int(minute)
+        
+        if the_h > 23 or the_min > 59:
+            return None
+        
+        if length > 16:
+            
+            second = a_date_str[17:19]
+            
+            if a_date_str[16] != ':' or not second.isdigit():
+                return None
+            
+            the_sec = int(second)
+            
+            if the_sec > 59:
+                return None
+            
+            if length > 19:
+                
+                if a_date_str[19] != '.' or not a_date_str[20:].isdigit():
+                    return None
+                
+                # same conversion as the regexpr path
+                the_microsec = int(float(a_date_str[19:])*1e6)
+    
+    return datetime.datetime(the_year, the_month, the_day,  the_h, the_min, the_sec, the_microsec, tzinfo = common_time.UTC_TZ)
+
 def imsdate_to_datetime(a_date_str):
-    """ Return datetime from the ims dates
+    """ Return datetime from the ims dates.
+        The canonical forms are converted without the regexpr and all conversions are memoized.
+        
+        Args: a_date_str : a ims2.0 formatted date string
+               
+        Returns: a DateTime Object
+        
+        Raises:
+            exception InvalidIMSDateError if this is an unvalid date
+    """
+    the_datetime = _IMSDATE_CACHE.get(a_date_str)
+    
+    if the_datetime is None:
+        
+        the_datetime = _fast_date_to_datetime(a_date_str)
+        
+        if the_datetime is None:
+            the_datetime = _imsdate_to_datetime_re(a_date_str)
+        
+        _IMSDATE_CACHE.put(a_date_str, the_datetime)
+    
+    return the_datetime
+
+def nldate_to_datetime(a_date_str):
+    """ Return datetime from the NL dates.
+        The canonical forms are converted without the regexpr and all conversions are memoized.
+        
+        Args: a_date_str : a NL formatted date string
+               
+        Returns: a DateTime Object
+        
+        Raises:
+            exception InvalidIMSDateError if this is an unvalid date
+    """
+    the_datetime = _NLDATE_CACHE.get(a_date_str)
+    
+    if the_datetime is None:
+        
+        the_datetime = _fast_date_to_datetime(a_date_str)
+        
+        if the_datetime is None:
+            the_datetime = _nldate_to_datetime_re(a_date_str)
+        
+        _NLDATE_CACHE.put(a_date_str, the_datetime)
+    
+    return the_datetime
+
+def _imsdate_to_datetime_re(a_date_str):
+    """ Return datetime from the ims dates using the IMS2.0 date regexpr
         
         Args: a_date_str : a ims2.0 formatted date string
                
@@ -82,8 +217,8 @@ def imsdate_to_datetime(a_date_str):
     else:
         raise InvalidDateError("The date %s is not a valid IMS2.0 date (could be out of range :1799<date<6000)" %(a_date_str))
 
-def nldate_to_datetime(a_date_str):
-    """ Return datetime from the NL dates
+def _nldate_to_datetime_re(a_date_str):
+    """ Return datetime from the NL dates using the NL date regexpr
         
         Args: a_date_str : a NL formatted date string
                
@@ -143,5 +278,133 @@ def nldate_to_datetime(a_date_str):
 
     else:
         raise InvalidDateError("The date %s is not a valid NL date" %(a_date_str))
-           
-           
\ No newline at end of file
+
+def datetime_to_epoch(a_datetime):
+    """ Return the number of microseconds between the epoch (1970/01/01 UTC) and a tz-aware datetime """
+    delta = a_datetime - EPOCH
+    
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+def imsdates_to_epoch(a_date_strs, a_as_datetime64 = False):
+    """ Convert a sequence of ims dates in microseconds since the epoch.
+        The canonical fixed width forms are converted with numpy array operations, the other 
+        strings go one by one through imsdate_to_datetime.
+        
+        Args: a_date_strs     : a sequence of ims2.0 formatted date strings
+              a_as_datetime64 : if True return a datetime64[us] array instead of an int64 array
+               
+        Returns: a tuple (values, invalid) where values is a numpy int64 (or datetime64[us]) array
+                 and invalid a boolean array set to True for the strings that are not valid dates.
+                 Invalid entries are 0 (or NaT) in values.
+        
+        Raises:
+            exception ImportError if numpy is not installed
+    """
+    if numpy is None:
+        raise ImportError("imsdates_to_epoch needs numpy")
+    
+    date_strs = list(a_date_strs)
+    nb_dates  = len(date_strs)
+    
+    values    = numpy.zeros(nb_dates, dtype = numpy.int64)
+    invalid   = numpy.zeros(nb_dates, dtype = numpy.bool_)
+    # entries that need the per item conversion
+    irregular = numpy.ones(nb_dates, dtype = numpy.bool_)
+    
+    if nb_dates == 0:
+        return (values.astype('M8[us]'), invalid) if a_as_datetime64 else (values, invalid)
+    
+    try:
+        the_strs = numpy.array(date_strs, dtype = 'S32')
+    except (UnicodeError, ValueError, TypeError):
+        the_strs = None
+    
+    if the_strs is not None:
+        lengths = numpy.char.str_len(the_strs)
+        
+        for length in BULK_DATE_LENGTHS:
+            indexes = numpy.flatnonzero(lengths == length)
+            
+            if len(indexes):
+                converted, ok = _bulk_convert(the_strs[indexes].astype('S%d' % (length)), length)
+                
+                values[indexes[ok]]    = converted[ok]
+                irregular[indexes[ok]] = False
+    
+    for index in numpy.flatnonzero(irregular):
+        try:
+            values[index] = datetime_to_epoch(imsdate_to_datetime(date_strs[index]))
+        except (InvalidDateError, ValueError, TypeError):
+            invalid[index] = True
+    
+    if a_as_datetime64:
+        values = values.astype('M8[us]')
+        values[invalid] = numpy.datetime64('NaT')
+    
+    return (values, invalid)
+
+def _bulk_convert(a_strs, a_length):
+    """ Convert an array of fixed width canonical dates of length a_length.
+        
+        Args: a_strs   : numpy array of strings of dtype S<a_length>
+              a_length : 10, 16 or 19
+               
+        Returns: a tuple (microseconds since epoch, ok) where ok is False for the rows 
+                 that are not in the canonical form or not valid dates
+    """
+    chars  = a_strs.view(numpy.uint8).reshape(-1, a_length)
+    digits = chars.astype(numpy.int64) - ord('0')
+    
+    def field(a_begin, a_end):
+        """ integer value of the digits in [a_begin, a_end[ """
+        val = numpy.zeros(len(chars), dtype = numpy.int64)
+        for pos in range(a_begin, a_end):
+            val = val * 10 + digits[:, pos]
+        return val
+    
+    digit_pos = [0, 1, 2, 3, 5, 6, 8, 9]
+    date_seps = numpy.array([ord(c) for c in DATE_SEPARATORS], dtype = numpy.uint8)
+    
+    ok  = numpy.in1d(chars[:, 4], date_seps) & numpy.in1d(chars[:, 7], date_seps)
+    
+    if a_length > 10:
+        digit_pos += [11, 12, 14, 15]
+        ok &= numpy.in1d(chars[:, 10], numpy.array([ord(c) for c in DATETIME_SEPARATORS], dtype = numpy.uint8))
+        ok &= (chars[:, 13] == ord(':'))
+    
+    if a_length > 16:
+        digit_pos += [17, 18]
+        ok &= (chars[:, 16] == ord(':'))
+    
+    the_digits = digits[:, digit_pos]
+    ok &= numpy.all((the_digits >= 0) & (the_digits <= 9), axis = 1)
+    
+    year, month, day = field(0, 4), field(5, 7), field(8, 10)
+    
+    hour, minute, sec = 0, 0, 0
+    
+    if a_length > 10:
+        hour, minute = field(11, 13), field(14, 16)
+        ok &= (hour <= 23) & (minute <= 59)
+    
+    if a_length > 16:
+        sec = field(17, 19)
+        ok &= (sec <= 59)
+    
+    ok &= (year >= 1800) & (year <= 5999) & (month >= 1) & (month <= 12) & (day >= 1)
+    
+    # day has to exist in the month (leap years included)
+    month_len = numpy.array([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31], dtype = numpy.int64)
+    leap      = ((year % 4 == 0) & (year % 100 != 0)) | (year % 400 == 0)
+    month_idx = numpy.where(ok, month, 1)
+    ok &= day <= (month_len[month_idx] + ((month_idx == 2) & leap))
+    
+    # days since the epoch (civil from days algorithm)
+    y_shift = year - (month <= 2)
+    era     = y_shift // 400
+    yoe     = y_shift - era * 400
+    doy     = (153 * (month + numpy.where(month > 2, -3, 9)) + 2) // 5 + day - 1
+    doe     = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    days    = era * 146097 + doe - 719468
+    
+    return ((days * 86400 + hour * 3600 + minute * 60 + sec) * 1000000, ok)
@@ -0,0 +1,105 @@
+'''
+Created on Oct 19, 2026
+
+'''
+
+# unit tests part
+import unittest
+import datetime
+
+import nms_common.parser.common.time as parser_time
+
+
+def tests():
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestIMSDate)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+
+class TestIMSDate(unittest.TestCase):
+
+    CANONICAL_DATES = [ "2009/01/01",
+                        "2009-12-31",
+                        "1999.02.28",
+                        "2009/01/01 12:30",
+                        "2009/01/01T23:59",
+                        "2009/01/01t00:00:00",
+                        "2009/06/15 08:05:09",
+                        "2009/06/15 08:05:09.5",
+                        "2009/06/15 08:05:09.123456",
+                        "5999/12/31 23:59:59.999",
+                      ]
+
+    IRREGULAR_DATES = [ "2009/1/1",
+                        "2009/01/01 1",
+                        "2009/01/01 12:30:5",
+                        "2009/01/01 12:5",
+                        "2009/01/01 12:30:00xyz",
+                        "2009/01/01 12:30:00.",
+                      ]
+
+    def setUp(self):
+        parser_time._IMSDATE_CACHE.clear()
+        parser_time._NLDATE_CACHE.clear()
+
+    def test_fast_path_same_as_regexpr(self):
+        """ the fixed width fast path and the regexpr return the same datetimes """
+
+        for date in self.CANONICAL_DATES:
+            self.assertEqual(parser_time._fast_date_to_datetime(date), parser_time._imsdate_to_datetime_re(date))
+            self.assertEqual(parser_time.imsdate_to_datetime(date), parser_time._imsdate_to_datetime_re(date))
+            self.assertEqual(parser_time.nldate_to_datetime(date), parser_time._nldate_to_datetime_re(date))
+
+    def test_irregular_dates_fall_back(self):
+        """ non canonical dates are converted by the regexpr """
+
+        for date in self.IRREGULAR_DATES:
+            self.assertEqual(parser_time._fast_date_to_datetime(date), None)
+            self.assertEqual(parser_time.imsdate_to_datetime(date), parser_time._imsdate_to_datetime_re(date))
+
+        self.assertEqual(parser_time.nldate_to_datetime("20090101"), parser_time._nldate_to_datetime_re("20090101"))
+
+    def test_invalid_dates(self):
+        """ invalid dates still raise the same errors """
+
+        for date in ("1700/01/01", "2009/13/01 12:00", "2009/01/00", "hello"):
+            self.assertRaises(parser_time.InvalidDateError, parser_time.imsdate_to_datetime, date)
+
+        self.assertRaises(ValueError, parser_time.imsdate_to_datetime, "2009/02/30")
+
+    def test_memoization(self):
+        """ the same string is converted once """
+
+        first  = parser_time.imsdate_to_datetime("2009/01/01 12:30")
+        second = parser_time.imsdate_to_datetime("2009/01/01 12:30")
+
+        self.assertTrue(first is second)
+        self.assertEqual(parser_time._IMSDATE_CACHE.hits, 1)
+        self.assertEqual(first, datetime.datetime(2009, 1, 1, 12, 30, tzinfo = first.tzinfo))
+
+    def test_bulk_conversion(self):
+        """ bulk conversion gives the same epochs as the one by one conversion """
+
+        if parser_time.numpy is None:
+            return
+
+        dates = self.CANONICAL_DATES + self.IRREGULAR_DATES + ["2009/02/29", "2008/02/29 10:11", "1969/12/31 23:59:59", "hello"]
+
+        values, invalid = parser_time.imsdates_to_epoch(dates)
+
+        for (date, value, is_invalid) in zip(dates, values, invalid):
+            try:
+                expected = parser_time.datetime_to_epoch(parser_time.imsdate_to_datetime(date))
+            except (parser_time.InvalidDateError, ValueError):
+                self.assertTrue(is_invalid)
+            else:
+                self.assertFalse(is_invalid)
+                self.assertEqual(value, expected)
+
+        values, invalid = parser_time.imsdates_to_epoch(["1970/01/01 00:00:01", "hello"], a_as_datetime64 = True)
+
+        self.assertEqual(values.dtype, parser_time.numpy.dtype('M8[us]'))
+        self.assertEqual(list(invalid), [False, True])
+
+
+if __name__ == '__main__':
+    tests()
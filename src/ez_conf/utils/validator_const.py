@@ -24,6 +24,7 @@ DATE_K        = 'DATE'
 LAT_K         = 'LAT'
 LON_K         = 'LON'
 STALIST_K     = 'STALIST'
+CHANLIST_K    = 'CHANLIST'
 RELATIVETO_K  = 'RELATIVETO'
 SUBTYPE_K     = 'SUBTYPE'
 STATIONS_K    = 'STATIONS'
@@ -40,4 +41,15 @@ UNSUBSCRIBE_V   = 'UNSUBSCRIBE'
 SUBSCR_PROD_V   = 'SUBSCRPROD'
 
 # List of supported magnitudes
-SUPPORTED_MAG = [ "MB", "MS", "ML" ]
\ No newline at end of file
+SUPPORTED_MAG = [ "MB", "MS", "ML" ]
+
+# Split waveform products (see ims_waveform_splitter)
+SPLIT_K         = 'SPLIT'
+SPLIT_INDEX_K   = 'INDEX'
+SPLIT_COUNT_K   = 'COUNT'
+SPLIT_PARENT_K  = 'PARENT'
+SPLIT_TIME_K    = 'TIME_INDEX'
+SPLIT_STA_K     = 'STATION_GROUP'
+
+# estimated cost of a product and of a request (see ims_cost)
+COST_K          = 'COST'